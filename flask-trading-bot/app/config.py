@@ -72,6 +72,32 @@ class Config:
     def exchange_secret(self) -> str:
         return self.get('exchange.secret', '')
     
+    @property
+    def exchange_async_io(self) -> bool:
+        return self.get('exchange.async_io', False)
+    
+    @property
+    def exchange_pool_size(self) -> int:
+        return self.get('exchange.pool_size', 20)
+    
+    @property
+    def fake_exchange(self) -> dict[str, Any]:
+        return self.get('exchange.fake', {})
+    
+    @property
+    def markets_refresh_interval(self) -> float:
+        return self.get('exchange.markets_refresh_interval', 21600)
+    
+    @property
+    def markets_cache_dir(self) -> str:
+        val = self.get('exchange.markets_cache_dir')
+        if val:
+            return val
+        
+        # Por defecto: flask-trading-bot/user_data/cache
+        base_dir = Path(__file__).resolve().parent.parent
+        return str(base_dir / 'user_data' / 'cache')
+    
     @property
     def timeframe(self) -> str:
         return self.get('timeframe', '5m')
@@ -124,6 +150,106 @@ class Config:
         db_path = base_dir / 'user_data' / 'tradesv3.sqlite'
         return f"sqlite:///{db_path.as_posix()}"
     
+    @property
+    def datadir(self) -> str:
+        val = self.get('datadir')
+        if val:
+            return val
+
+        # Por defecto: flask-trading-bot/user_data/data
+        base_dir = Path(__file__).resolve().parent.parent
+        return str(base_dir / 'user_data' / 'data')
+    
+    @property
+    def hyperopt_results_dir(self) -> str:
+        val = self.get('hyperopt.results_dir')
+        if val:
+            return val
+
+        # Por defecto: flask-trading-bot/user_data/hyperopt_results
+        base_dir = Path(__file__).resolve().parent.parent
+        return str(base_dir / 'user_data' / 'hyperopt_results')
+    
+    @property
+    def ai_models_dir(self) -> str:
+        val = self.get('ai.models_dir')
+        if val:
+            return val
+
+        # Por defecto: flask-trading-bot/user_data/models
+        base_dir = Path(__file__).resolve().parent.parent
+        return str(base_dir / 'user_data' / 'models')
+    
+    @property
+    def ai_features_dir(self) -> str:
+        val = self.get('ai.features_dir')
+        if val:
+            return val
+
+        # Por defecto: flask-trading-bot/user_data/features
+        base_dir = Path(__file__).resolve().parent.parent
+        return str(base_dir / 'user_data' / 'features')
+    
+    @property
+    def ai_model_cache_size(self) -> int:
+        return self.get('ai.model_cache_size', 32)
+    
+    @property
+    def ai_evaluation_window(self) -> int:
+        return self.get('ai.evaluation_window', 500)
+    
+    @property
+    def ai_pooled(self) -> bool:
+        return self.get('ai.pooled', False)
+    
+    @property
+    def ai_refit_every(self) -> int:
+        return self.get('ai.refit.every', 20)
+    
+    @property
+    def ai_warm_iterations(self) -> int:
+        return self.get('ai.refit.warm_iterations', 10)
+    
+    @property
+    def ai_scheduler_enabled(self) -> bool:
+        return self.get('ai.scheduler.enabled', True)
+    
+    @property
+    def ai_scheduler_workers(self) -> int:
+        return self.get('ai.scheduler.workers', 1)
+    
+    @property
+    def ai_scheduler_grace_seconds(self) -> float:
+        return self.get('ai.scheduler.grace_seconds', 5)
+    
+    @property
+    def candle_store_enabled(self) -> bool:
+        return self.get('candle_store.enabled', True)
+    
+    @property
+    def ohlcv_cache_enabled(self) -> bool:
+        return self.get('ohlcv_cache.enabled', True)
+    
+    @property
+    def ohlcv_cache_max_mb(self) -> float:
+        return self.get('ohlcv_cache.max_mb', 64)
+    
+    @property
+    def ohlcv_cache_grace_seconds(self) -> float:
+        return self.get('ohlcv_cache.grace_seconds', 5)
+    
+    @property
+    def ohlcv_cache_live_ttl_seconds(self) -> float:
+        return self.get('ohlcv_cache.live_ttl_seconds', 5)
+    
+    @property
+    def tickers_ttl(self) -> float:
+        return self.get('tickers_ttl', 5)
+    
+    @property
+    def fast_kernels(self) -> bool:
+        return self.get('indicators.fast_kernels', False)
+    
     @property
     def log_level(self) -> str:
         return self.get('logging.level', 'INFO')
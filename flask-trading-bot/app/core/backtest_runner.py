@@ -0,0 +1,208 @@
+"""
+Backtesting en paralelo (estrategia x par) con velas compartidas
+Cada trabajo recibe solo la ruta de su archivo del almacén local y el rango
+de velas (primera y última) que tenía al crearse; el proceso lo abre con
+np.memmap, así que las velas no se copian entre procesos y todos comparten
+la caché de páginas del sistema. El backfill puede reescribir el archivo
+mientras tanto (anteponer histórico, cerrar un hueco): el proceso mide el
+archivo que abre y busca el rango por timestamp, no por posición.
+Los resultados se agregan en un único informe con el tiempo de cada trabajo.
+
+Los procesos no importan app.services (crearía el servicio de exchange y
+cargaría mercados): por eso el formato del registro se repite aquí.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+
+from app.core.backtesting import DEFAULT_FEE, Backtester, summarize
+from app.strategies import get_strategy
+
+if TYPE_CHECKING:
+    from app.services.candle_store import CandleStore
+
+logger = logging.getLogger(__name__)
+
+# Registro del almacén: [timestamp, open, high, low, close, volume] en float64
+# (mismo formato que app.services.candle_store)
+CANDLE_FIELDS = 6
+RECORD_SIZE = CANDLE_FIELDS * np.dtype(np.float64).itemsize
+
+
+class BacktestJob(NamedTuple):
+    """Un trabajo: una estrategia sobre un par (solo metadatos, sin velas)"""
+    strategy_id: str
+    pair: str
+    timeframe: str
+    path: str
+    count: int          # Velas al crear el trabajo (solo para repartir la carga)
+    first_ts: int       # Primera y última vela al crear el trabajo (ms)
+    last_ts: int
+
+
+def open_candles(path: str, first_ts: int | None = None, last_ts: int | None = None) -> np.ndarray:
+    """
+    Velas del archivo del almacén entre first_ts y last_ts (inclusive) como
+    memmap de solo lectura (n, 6), sin copiar
+    El tamaño sale del archivo abierto (os.replace del backfill no lo cambia
+    una vez abierto) y el rango se busca por timestamp.
+    """
+    with open(path, 'rb') as f:
+        count = os.fstat(f.fileno()).st_size // RECORD_SIZE
+        if count <= 0:
+            return np.empty((0, CANDLE_FIELDS), dtype=np.float64)
+        candles = np.memmap(f, dtype=np.float64, mode='r', shape=(count, CANDLE_FIELDS))
+    timestamps = candles[:, 0]
+    lo = 0 if first_ts is None else int(np.searchsorted(timestamps, first_ts, side='left'))
+    hi = count if last_ts is None else int(np.searchsorted(timestamps, last_ts, side='right'))
+    return candles[lo:hi]
+
+
+def run_job(job: BacktestJob, settings: dict) -> dict:
+    """
+    Ejecuta un trabajo (en el proceso del pool)
+
+    Args:
+        job: Estrategia, par y archivo de velas
+        settings: stake_amount, fee, start, end
+
+    Returns:
+        Trades del trabajo y tiempos
+    """
+    began = time.perf_counter()
+    candles = open_candles(job.path, job.first_ts, job.last_ts)
+    if settings['end'] is not None:
+        candles = candles[:np.searchsorted(candles[:, 0], settings['end'])]
+
+    backtester = Backtester(
+        get_strategy(job.strategy_id), None, '', timeframe=job.timeframe,
+        stake_amount=settings['stake_amount'], fee=settings['fee'],
+    )
+    trades = backtester.backtest_pair(job.pair, candles, settings['start'])
+    return {
+        "strategy": job.strategy_id,
+        "pair": job.pair,
+        "timeframe": job.timeframe,
+        "candles": len(candles),
+        "trades": trades,
+        "elapsed": time.perf_counter() - began,
+        "pid": os.getpid(),
+    }
+
+
+class ParallelBacktestRunner:
+    """
+    Backtesting de varias estrategias sobre varios pares en un pool de procesos
+
+    Uso:
+        runner = ParallelBacktestRunner(CandleStore(config.datadir), 'binance', workers=8)
+        report = runner.run(['swing_v1', 'macd'], config.pairlist)
+    """
+
+    def __init__(
+        self,
+        store: 'CandleStore',
+        exchange: str,
+        workers: int | None = None,
+        timeframe: str | None = None,
+        stake_amount: float = 100.0,
+        fee: float = DEFAULT_FEE,
+        starting_balance: float | None = None,
+    ):
+        self.store = store
+        self.exchange = exchange
+        self.workers = workers or os.cpu_count() or 1
+        # None = timeframe de cada estrategia
+        self.timeframe = timeframe
+        self.stake_amount = stake_amount
+        self.fee = fee
+        self.starting_balance = starting_balance if starting_balance is not None else stake_amount
+
+    def jobs(self, strategy_ids: list[str], pairs: list[str]) -> tuple[list[BacktestJob], list[tuple[str, str]]]:
+        """
+        Trabajos a ejecutar (los de más velas primero, para repartir mejor la carga)
+
+        Returns:
+            (trabajos, (estrategia, par) sin velas en el almacén)
+        """
+        jobs, missing = [], []
+        for strategy_id in strategy_ids:
+            timeframe = self.timeframe or get_strategy(strategy_id).timeframe
+            for pair in pairs:
+                # Rango fijado al crear el trabajo: velas que el backfill agregue
+                # o anteponga después quedan fuera (ver open_candles)
+                count = self.store.count(self.exchange, pair, timeframe)
+                first_ts = self.store.first_timestamp(self.exchange, pair, timeframe)
+                last_ts = self.store.last_timestamp(self.exchange, pair, timeframe)
+                if count == 0 or first_ts is None or last_ts is None:
+                    missing.append((strategy_id, pair))
+                    continue
+                path = str(self.store.path_for(self.exchange, pair, timeframe))
+                jobs.append(BacktestJob(strategy_id, pair, timeframe, path, count, first_ts, last_ts))
+        jobs.sort(key=lambda job: job.count, reverse=True)
+        return jobs, missing
+
+    def run(self, strategy_ids: list[str], pairs: list[str], start: int | None = None, end: int | None = None) -> dict:
+        """
+        Ejecuta todos los trabajos y agrega los resultados
+
+        Args:
+            strategy_ids: Ids de STRATEGY_REGISTRY
+            pairs: Pares a simular
+            start: Inicio del periodo (ms); las velas anteriores solo alimentan indicadores
+            end: Fin del periodo (ms, exclusivo)
+
+        Returns:
+            Informe con el resumen por estrategia (total y por par), los trades
+            y el tiempo de cada trabajo
+        """
+        jobs, missing = self.jobs(strategy_ids, pairs)
+        settings = {'stake_amount': self.stake_amount, 'fee': self.fee, 'start': start, 'end': end}
+        began = time.perf_counter()
+
+        results = []
+        if self.workers <= 1:
+            results = [run_job(job, settings) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, max(len(jobs), 1))) as pool:
+                futures = {pool.submit(run_job, job, settings): job for job in jobs}
+                for future in as_completed(futures):
+                    job = futures[future]
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        logger.error(f"Backtest {job.strategy_id} {job.pair} falló: {e}")
+                        missing.append((job.strategy_id, job.pair))
+
+        elapsed = time.perf_counter() - began
+        return self._report(strategy_ids, results, missing, elapsed)
+
+    def _report(self, strategy_ids: list[str], results: list[dict], missing: list[tuple[str, str]], elapsed: float) -> dict:
+        strategies = {}
+        for strategy_id in strategy_ids:
+            own = [r for r in results if r["strategy"] == strategy_id]
+            trades = sorted((t for r in own for t in r["trades"]), key=lambda t: t['open_timestamp'])
+            strategies[strategy_id] = {
+                "summary": summarize(trades, self.starting_balance),
+                "pairs": {r["pair"]: summarize(r["trades"], self.starting_balance) for r in own},
+                "trades": trades,
+            }
+
+        job_time = sum(r["elapsed"] for r in results)
+        return {
+            "strategies": strategies,
+            "jobs": sorted(
+                ({k: r[k] for k in ("strategy", "pair", "timeframe", "candles", "pid")}
+                 | {"trades": len(r["trades"]), "elapsed": round(r["elapsed"], 4)} for r in results),
+                key=lambda j: j["elapsed"], reverse=True,
+            ),
+            "missing": [{"strategy": s, "pair": p} for s, p in missing],
+            "workers": self.workers,
+            "elapsed": round(elapsed, 3),
+            # Suma del tiempo de los trabajos / tiempo real (ideal = workers)
+            "parallelism": round(job_time / elapsed, 2) if elapsed > 0 else 0.0,
+        }
@@ -0,0 +1,359 @@
+"""
+Backtesting vectorizado de estrategias (BaseStrategy)
+Cada par se evalúa una sola vez con populate_indicators / populate_signals
+sobre todo su histórico y las operaciones se simulan con arrays:
+
+- Entrada: señal enter_long (sin exit_long) en el cierre de una vela ->
+  compra a la apertura de la siguiente
+- Salida por señal: exit_long en el cierre de una vela -> venta a la apertura
+  de la siguiente
+- Stoploss: mínimo de la vela <= precio de entrada * (1 + stoploss)
+- ROI: máximo de la vela >= precio de entrada * (1 + ROI exigido por la
+  tabla minimal_roi para la duración del trade, como should_sell_roi)
+- El trade abierto al final del histórico se cierra al último cierre
+
+Dentro de una vela la venta por señal (apertura) va primero, luego el
+stoploss y luego el ROI (orden pesimista). El bucle de Python recorre
+trades, no velas: las señales se buscan con índices precalculados y el
+stoploss/ROI con búsquedas vectorizadas por tramos.
+Los pares se simulan por separado (max_open_trades no se aplica).
+"""
+import logging
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from app.core.indicators import IndicatorEngine
+from app.strategies.base_strategy import BaseStrategy
+
+if TYPE_CHECKING:
+    # Solo para anotaciones: importar app.services crea el servicio de exchange
+    # (carga de mercados), innecesario en los procesos de backtesting
+    from app.services.candle_store import CandleStore
+
+logger = logging.getLogger(__name__)
+
+# Comisión por lado (taker de Binance)
+DEFAULT_FEE = 0.001
+
+# Velas del primer tramo en la búsqueda de stoploss/ROI (se duplica en cada tramo)
+SCAN_CHUNK = 64
+
+EXIT_SIGNAL = 'exit_signal'
+EXIT_ROI = 'roi'
+EXIT_STOPLOSS = 'stop_loss'
+EXIT_FORCE = 'force_exit'
+
+COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+def roi_table(minimal_roi: dict[str, float]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Tabla ROI como arrays para buscar con np.searchsorted
+
+    should_sell_roi vende si el beneficio supera el ROI de CUALQUIER clave
+    <= duración, así que el ROI exigido es el mínimo de esas claves.
+
+    Returns:
+        (minutos ascendentes, ROI exigido a partir de cada minuto)
+    """
+    items = sorted((int(minutes), float(roi)) for minutes, roi in minimal_roi.items())
+    minutes = np.array([m for m, _ in items], dtype=np.float64)
+    required = np.minimum.accumulate(np.array([r for _, r in items], dtype=np.float64))
+    return minutes, required
+
+
+def _next_true(mask: np.ndarray) -> np.ndarray:
+    """next[i] = primer j >= i con mask[j] (len(mask) si no hay)"""
+    n = len(mask)
+    positions = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(positions[::-1])[::-1]
+
+
+def simulate_trades(
+    timestamps: np.ndarray,
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    enter: np.ndarray,
+    exit_: np.ndarray,
+    stoploss: float,
+    minimal_roi: dict[str, float],
+) -> dict[str, np.ndarray]:
+    """
+    Simula los trades long de un par (uno abierto a la vez)
+
+    Args:
+        timestamps, open_, high, low, close: Velas (ms y precios)
+        enter, exit_: Señales booleanas por vela
+        stoploss: Stoploss de la estrategia (ej: -0.10)
+        minimal_roi: Tabla ROI de la estrategia
+
+    Returns:
+        Arrays por trade: entry, exit (índices de vela), open_rate, close_rate, reason
+    """
+    n = len(close)
+    roi_minutes, roi_required = roi_table(minimal_roi)
+    next_entry = _next_true(enter & ~exit_)
+    next_exit = _next_true(exit_)
+
+    entries, exits, open_rates, close_rates, reasons = [], [], [], [], []
+    signal = 0
+    while signal < n:
+        signal = next_entry[signal]
+        entry = signal + 1
+        if entry >= n:
+            break
+        rate = open_[entry]
+        stop_rate = rate * (1 + stoploss)
+
+        # Venta por señal: exit_long en j >= entrada -> apertura de j + 1
+        exit_candle = next_exit[entry] + 1
+        end = min(exit_candle, n)
+
+        exit_at, close_rate, reason = None, None, None
+        start, size = entry, SCAN_CHUNK
+        while start < end and exit_at is None:
+            stop = min(end, start + size)
+            stop_hit = low[start:stop] <= stop_rate
+            minutes = (timestamps[start:stop] - timestamps[entry]) / 60000
+            position = np.searchsorted(roi_minutes, minutes, side='right') - 1
+            roi = np.where(position >= 0, roi_required[np.maximum(position, 0)], np.inf)
+            roi_rate = rate * (1 + roi)
+            roi_hit = high[start:stop] >= roi_rate
+            hit = stop_hit | roi_hit
+            if hit.any():
+                k = int(np.argmax(hit))
+                exit_at = start + k
+                if stop_hit[k]:
+                    # Si la vela abre por debajo del stop se vende a la apertura
+                    close_rate, reason = min(stop_rate, open_[exit_at]), EXIT_STOPLOSS
+                else:
+                    close_rate, reason = max(roi_rate[k], open_[exit_at]), EXIT_ROI
+            start, size = stop, size * 2
+
+        if exit_at is None:
+            if exit_candle < n:
+                exit_at, close_rate, reason = exit_candle, open_[exit_candle], EXIT_SIGNAL
+            else:
+                exit_at, close_rate, reason = n - 1, close[n - 1], EXIT_FORCE
+
+        entries.append(entry)
+        exits.append(exit_at)
+        open_rates.append(rate)
+        close_rates.append(close_rate)
+        reasons.append(reason)
+        # La siguiente entrada necesita una señal desde la vela de salida
+        signal = exit_at
+
+    return {
+        'entry': np.array(entries, dtype=np.int64),
+        'exit': np.array(exits, dtype=np.int64),
+        'open_rate': np.array(open_rates, dtype=np.float64),
+        'close_rate': np.array(close_rates, dtype=np.float64),
+        'reason': np.array(reasons, dtype=object),
+    }
+
+
+def _format_date(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp / 1000, tz=UTC).strftime('%Y-%m-%d %H:%M')
+
+
+def max_drawdown(profits: np.ndarray, starting_balance: float) -> tuple[float, float]:
+    """
+    Máximo drawdown de la curva de balance (trades ordenados por cierre)
+
+    Returns:
+        (drawdown absoluto, drawdown relativo al pico de balance)
+    """
+    if len(profits) == 0:
+        return 0.0, 0.0
+    balance = starting_balance + np.concatenate([[0.0], np.cumsum(profits)])
+    peaks = np.maximum.accumulate(balance)
+    drawdowns = peaks - balance
+    worst = int(np.argmax(drawdowns))
+    return float(drawdowns[worst]), float(drawdowns[worst] / peaks[worst]) if peaks[worst] > 0 else 0.0
+
+
+def summarize(trades: list[dict], starting_balance: float) -> dict:
+    """Métricas de una lista de trades: profit, win rate, drawdown..."""
+    if not trades:
+        return {
+            "trades": 0, "wins": 0, "losses": 0, "win_rate": 0.0,
+            "profit_total_abs": 0.0, "profit_total": 0.0, "profit_mean": 0.0,
+            "max_drawdown_abs": 0.0, "max_drawdown": 0.0, "avg_duration_candles": 0.0,
+        }
+    ordered = sorted(trades, key=lambda t: t['close_timestamp'])
+    ratios = np.array([t['profit_ratio'] for t in ordered])
+    profits = np.array([t['profit_abs'] for t in ordered])
+    drawdown_abs, drawdown = max_drawdown(profits, starting_balance)
+    wins = int((profits > 0).sum())
+    return {
+        "trades": len(ordered),
+        "wins": wins,
+        "losses": len(ordered) - wins,
+        "win_rate": round(wins / len(ordered), 4),
+        "profit_total_abs": round(float(profits.sum()), 4),
+        "profit_total": round(float(profits.sum()) / starting_balance, 4) if starting_balance else 0.0,
+        "profit_mean": round(float(ratios.mean()), 6),
+        "max_drawdown_abs": round(drawdown_abs, 4),
+        "max_drawdown": round(drawdown, 4),
+        "avg_duration_candles": round(float(np.mean([t['duration_candles'] for t in ordered])), 2),
+    }
+
+
+class Backtester:
+    """
+    Backtesting de una estrategia sobre las velas del almacén local
+
+    Uso:
+        backtester = Backtester(CryptoSwingV1, CandleStore(config.datadir), 'binance', config=config)
+        result = backtester.run(['BTC/USDT', 'ETH/USDT'], start=..., end=...)
+    """
+
+    def __init__(
+        self,
+        strategy_cls: type[BaseStrategy],
+        store: 'CandleStore | None',
+        exchange: str,
+        timeframe: str | None = None,
+        config=None,
+        stake_amount: float = 100.0,
+        fee: float = DEFAULT_FEE,
+        starting_balance: float | None = None,
+        fast_kernels: bool = True,
+        params: dict | None = None,
+    ):
+        self.strategy_cls = strategy_cls
+        self.store = store
+        self.exchange = exchange
+        self.timeframe = timeframe or strategy_cls.timeframe
+        self.config = config
+        self.stake_amount = stake_amount
+        self.fee = fee
+        self.starting_balance = starting_balance if starting_balance is not None else stake_amount
+        # Indicadores con app.core.kernels: mismos valores que pandas_ta (ver
+        # benchmark_indicators.py) y mucho más rápido en históricos largos
+        self.fast_kernels = fast_kernels
+        # Valores de los parámetros optimizables (None = por defecto)
+        self.params = params
+
+    def load_candles(self, pair: str, end: int | None = None) -> np.ndarray:
+        """Velas del par (n, 6) hasta `end` (ms, exclusivo)"""
+        candles = self.store.load(self.exchange, pair, self.timeframe)
+        if end is not None:
+            candles = candles[candles[:, 0] < end]
+        return candles
+
+    def signals(self, candles: np.ndarray, indicators: IndicatorEngine | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Indicadores y señales de todo el histórico (populate_* una sola vez)
+
+        Args:
+            candles: Velas (n, 6)
+            indicators: Motor de indicadores de esas mismas velas, reutilizable entre
+                ejecuciones (hyperopt: solo se calculan los valores de parámetros nuevos)
+
+        Returns:
+            (enter_long, exit_long) booleanos por vela
+        """
+        df = pd.DataFrame(candles, columns=COLUMNS) if indicators is None else indicators.dataframe.copy()
+        strategy = self.strategy_cls(self.config, indicators=indicators, params=self.params)
+        strategy.use_fast_kernels = strategy.use_fast_kernels or self.fast_kernels
+        df = strategy.populate_indicators(df)
+        df = strategy.populate_signals(df)
+        return df['enter_long'].to_numpy() == 1, df['exit_long'].to_numpy() == 1
+
+    def backtest_pair(
+        self,
+        pair: str,
+        candles: np.ndarray,
+        start: int | None = None,
+        indicators: IndicatorEngine | None = None,
+    ) -> list[dict]:
+        """
+        Trades de un par
+
+        Args:
+            pair: Par de trading
+            candles: Velas (n, 6); las anteriores a `start` sirven de arranque de indicadores
+            start: Primera vela (ms) en la que se permiten entradas
+            indicators: Motor de indicadores de `candles` (ver signals)
+
+        Returns:
+            Lista de trades (dicts serializables a JSON)
+        """
+        if len(candles) < 2:
+            return []
+        enter, exit_ = self.signals(candles, indicators)
+        if start is not None:
+            enter &= candles[:, 0] >= start
+
+        strategy = self.strategy_cls
+        result = simulate_trades(
+            candles[:, 0], candles[:, 1], candles[:, 2], candles[:, 3], candles[:, 4],
+            enter, exit_, strategy.stoploss, strategy.minimal_roi,
+        )
+        # Beneficio neto de comisiones (compra y venta)
+        ratios = result['close_rate'] * (1 - self.fee) / (result['open_rate'] * (1 + self.fee)) - 1
+
+        trades = []
+        for i in range(len(result['entry'])):
+            entry, exit_at = int(result['entry'][i]), int(result['exit'][i])
+            open_ts, close_ts = int(candles[entry, 0]), int(candles[exit_at, 0])
+            trades.append({
+                "pair": pair,
+                "open_timestamp": open_ts,
+                "close_timestamp": close_ts,
+                "open_date": _format_date(open_ts),
+                "close_date": _format_date(close_ts),
+                "open_rate": float(result['open_rate'][i]),
+                "close_rate": float(result['close_rate'][i]),
+                "profit_ratio": round(float(ratios[i]), 6),
+                "profit_abs": round(float(ratios[i]) * self.stake_amount, 6),
+                "duration_candles": exit_at - entry,
+                "exit_reason": result['reason'][i],
+            })
+        return trades
+
+    def run(self, pairs: Iterable[str], start: int | None = None, end: int | None = None) -> dict:
+        """
+        Backtesting de varios pares
+
+        Args:
+            pairs: Pares a simular
+            start: Inicio del periodo (ms); las velas anteriores solo alimentan indicadores
+            end: Fin del periodo (ms, exclusivo)
+
+        Returns:
+            Diccionario con trades, resumen global y resumen por par
+        """
+        all_trades: list[dict] = []
+        per_pair: dict[str, dict] = {}
+        missing = []
+        for pair in pairs:
+            candles = self.load_candles(pair, end)
+            if len(candles) == 0:
+                missing.append(pair)
+                continue
+            trades = self.backtest_pair(pair, candles, start)
+            all_trades.extend(trades)
+            per_pair[pair] = summarize(trades, self.starting_balance)
+
+        if missing:
+            logger.warning(f"Sin velas {self.timeframe} en el almacén para: {', '.join(missing)}")
+        all_trades.sort(key=lambda t: t['open_timestamp'])
+        return {
+            "strategy": self.strategy_cls.__name__,
+            "timeframe": self.timeframe,
+            "stake_amount": self.stake_amount,
+            "fee": self.fee,
+            "summary": summarize(all_trades, self.starting_balance),
+            "pairs": per_pair,
+            "missing": missing,
+            "trades": all_trades,
+        }
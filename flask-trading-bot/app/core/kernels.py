@@ -0,0 +1,233 @@
+"""
+Kernels de indicadores sobre arrays float64
+Versiones de rsi / atr / adx / bbands / macd / sma de pandas_ta sin las
+Series y DataFrames intermedios. Siguen el mismo camino que pandas_ta:
+
+- Con TA-Lib instalado llaman a TA-Lib directamente (pandas_ta hace lo mismo)
+- Sin TA-Lib replican las fórmulas de pandas_ta; la recurrencia de las
+  medias exponenciales usa numba si está instalado y si no la de pandas,
+  y las ventanas móviles usan el rolling compilado de pandas
+
+El resultado es el mismo que el de pandas_ta (la semilla de la EMA y las
+ventanas usan las mismas reducciones).
+"""
+import logging
+import sys
+
+import numpy as np
+import pandas as pd
+from pandas_ta import Imports
+
+logger = logging.getLogger(__name__)
+
+if Imports['talib']:
+    import talib
+else:
+    talib = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+EPSILON = sys.float_info.epsilon
+
+
+def backend() -> str:
+    """Implementación activa: 'talib', 'numba' o 'numpy'"""
+    if talib is not None:
+        return 'talib'
+    return 'numba' if njit is not None else 'numpy'
+
+
+# ----------------------------------------------------------------------
+# Primitivas
+# ----------------------------------------------------------------------
+
+def _ewm_loop(values: np.ndarray, alpha: float, adjust: bool, min_periods: int) -> np.ndarray:
+    """Recurrencia de pandas `Series.ewm().mean()` (ignore_na=False)"""
+    n = len(values)
+    out = np.empty(n)
+    new_wt = 1.0 if adjust else alpha
+    old_wt_factor = 1.0 - alpha
+    weighted = np.nan
+    old_wt = 1.0
+    nobs = 0
+    for i in range(n):
+        cur = values[i]
+        is_observation = cur == cur
+        nobs += is_observation
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if is_observation:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+                if adjust:
+                    old_wt += new_wt
+                else:
+                    old_wt = 1.0
+        elif is_observation:
+            weighted = cur
+        out[i] = weighted if nobs >= min_periods else np.nan
+    return out
+
+
+_ewm_jit = njit(cache=True)(_ewm_loop) if njit is not None else None
+
+
+def ewm_mean(values: np.ndarray, alpha: float, adjust: bool, min_periods: int = 0) -> np.ndarray:
+    """Equivalente a pd.Series(values).ewm(alpha=alpha, adjust=adjust, min_periods=min_periods).mean()"""
+    if _ewm_jit is not None:
+        return _ewm_jit(values, alpha, adjust, max(min_periods, 1))
+    return pd.Series(values).ewm(alpha=alpha, adjust=adjust, min_periods=min_periods).mean().to_numpy()
+
+
+def rma(values: np.ndarray, length: int) -> np.ndarray:
+    """Media de Wilder de pandas_ta"""
+    return ewm_mean(values, 1.0 / length, adjust=True, min_periods=length)
+
+
+def rolling_mean(values: np.ndarray, length: int) -> np.ndarray:
+    """rolling(length).mean() (ventana O(n) compilada de pandas, la misma que usa pandas_ta)"""
+    return pd.Series(values).rolling(length).mean().to_numpy()
+
+
+def rolling_std(values: np.ndarray, length: int, ddof: int = 1) -> np.ndarray:
+    """Raíz de rolling(length).var(ddof), como pandas_ta stdev"""
+    return np.sqrt(pd.Series(values).rolling(length).var(ddof=ddof).to_numpy())
+
+
+def _non_zero_range(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """pandas_ta non_zero_range: si alguna diferencia es 0 suma epsilon a toda la serie"""
+    diff = high - low
+    if (diff == 0).any():
+        diff = diff + EPSILON
+    return diff
+
+
+def _zero(values: np.ndarray) -> np.ndarray:
+    """pandas_ta zero: valores menores que epsilon pasan a 0"""
+    return np.where(np.abs(values) < EPSILON, 0.0, values)
+
+
+# ----------------------------------------------------------------------
+# Indicadores (mismos argumentos y salidas que pandas_ta)
+# ----------------------------------------------------------------------
+
+def sma(close: np.ndarray, length: int) -> np.ndarray:
+    if talib is not None:
+        return talib.SMA(close, length)
+    return rolling_mean(close, length)
+
+
+def ema(close: np.ndarray, length: int) -> np.ndarray:
+    """EMA de pandas_ta: sembrada con la SMA de las primeras `length` velas"""
+    if talib is not None:
+        return talib.EMA(close, length)
+    seeded = close.copy()
+    # Misma reducción que pandas_ta (Series.mean) para que la semilla coincida
+    seeded[length - 1] = pd.Series(close[:length]).mean()
+    seeded[:length - 1] = np.nan
+    return ewm_mean(seeded, 2.0 / (length + 1.0), adjust=False)
+
+
+def rsi(close: np.ndarray, length: int = 14) -> np.ndarray:
+    """RSI de Wilder"""
+    if talib is not None:
+        return talib.RSI(close, length)
+    negative = np.empty_like(close)
+    negative[0] = np.nan
+    negative[1:] = close[1:] - close[:-1]
+    positive = negative.copy()
+    positive[positive < 0] = 0
+    negative[negative > 0] = 0
+    positive_avg = rma(positive, length)
+    negative_avg = rma(negative, length)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 * positive_avg / (positive_avg + np.abs(negative_avg))
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    ranges = np.vstack([_non_zero_range(high, low), high - prev_close, prev_close - low])
+    tr = np.abs(ranges).max(axis=0)
+    tr[0] = np.nan
+    return tr
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int = 14) -> np.ndarray:
+    """ATR de Wilder"""
+    if talib is not None:
+        return talib.ATR(high, low, close, length)
+    return rma(true_range(high, low, close), length)
+
+
+def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int = 14) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    ADX de pandas_ta (el ATR interno usa TA-Lib si está disponible)
+
+    Returns:
+        (adx, dmp, dmn)
+    """
+    atr_ = atr(high, low, close, length)
+    up = np.empty_like(high)
+    dn = np.empty_like(low)
+    up[0] = dn[0] = np.nan
+    up[1:] = high[1:] - high[:-1]
+    dn[1:] = low[:-1] - low[1:]
+
+    pos = _zero(np.where((up > dn) & (up > 0), up, 0.0))
+    neg = _zero(np.where((dn > up) & (dn > 0), dn, 0.0))
+    pos[0] = neg[0] = np.nan
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = 100.0 / atr_
+        dmp = k * rma(pos, length)
+        dmn = k * rma(neg, length)
+        dx = 100.0 * np.abs(dmp - dmn) / (dmp + dmn)
+    return rma(dx, length), dmp, dmn
+
+
+def bbands(close: np.ndarray, length: int = 20, std: float = 2.0) -> tuple[np.ndarray, ...]:
+    """
+    Bollinger de pandas_ta (desviación poblacional)
+
+    Returns:
+        (lower, mid, upper, bandwidth, percent)
+    """
+    if talib is not None:
+        upper, mid, lower = talib.BBANDS(close, length, std, std, 0)
+    else:
+        mid = rolling_mean(close, length)
+        deviations = std * rolling_std(close, length, ddof=0)
+        lower = mid - deviations
+        upper = mid + deviations
+    ulr = _non_zero_range(upper, lower)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bandwidth = 100 * ulr / mid
+        percent = _non_zero_range(close, lower) / ulr
+    return lower, mid, upper, bandwidth, percent
+
+
+def macd(close: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD de pandas_ta
+
+    Returns:
+        (macd, hist, signal)
+    """
+    if slow < fast:
+        fast, slow = slow, fast
+    if talib is not None:
+        macd_, signal_, hist = talib.MACD(close, fast, slow, signal)
+        return macd_, hist, signal_
+
+    macd_ = ema(close, fast) - ema(close, slow)
+    signal_ = np.full_like(macd_, np.nan)
+    valid = np.flatnonzero(~np.isnan(macd_))
+    # La señal arranca en el primer MACD válido (como pandas_ta)
+    if len(valid) >= signal:
+        signal_[valid[0]:] = ema(macd_[valid[0]:], signal)
+    return macd_, macd_ - signal_, signal_
@@ -0,0 +1,564 @@
+"""
+Indicadores incrementales (streaming)
+Mismos indicadores y nombres que app.core.indicators, pero con estado:
+cada vela nueva cuesta O(1) en lugar de recalcular todo el histórico.
+
+- update(candle): agrega una vela CERRADA (avanza el estado)
+- peek(candle): valor si `candle` fuera la siguiente vela, sin avanzar el
+  estado; sirve para la vela en curso, que cambia con cada tick
+- state() / restore(): checkpoint del estado para persistirlo o reanudar
+
+Los valores coinciden con pandas / pandas_ta sin TA-Lib (precisión de
+coma flotante): las medias exponenciales replican la recurrencia de
+`Series.ewm` y las ventanas recalculan su suma exacta cada `length`
+velas para no acumular error. El epsilon que pandas_ta suma a los rangos
+nulos (non_zero_range) se aplica vela a vela.
+"""
+import copy
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+from app.core.indicators import indicator_key
+from app.utils.timeframes import is_candle_closed
+
+Candle = Mapping[str, float]
+Value = float | dict[str, float]
+
+NAN = float('nan')
+_EPSILON = 2.220446049250313e-16  # sys.float_info.epsilon (pandas_ta.utils.zero)
+
+
+def _isnan(x: float) -> bool:
+    return x != x
+
+
+def _non_zero(x: float) -> float:
+    """pandas_ta non_zero_range por valor: un rango 0 pasa a ser epsilon"""
+    return _EPSILON if x == 0 else x
+
+
+def _div(a: float, b: float) -> float:
+    """División IEEE (inf / nan en lugar de ZeroDivisionError), como numpy"""
+    if b == 0:
+        if a == 0 or _isnan(a):
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class _Ewm:
+    """
+    Media exponencial con la misma recurrencia que pandas `Series.ewm().mean()`
+    (ignore_na=False), incluyendo adjust=True/False, min_periods y NaN.
+    """
+
+    def __init__(self, alpha: float, adjust: bool, min_periods: int = 0):
+        self.new_wt = 1.0 if adjust else alpha
+        self.old_wt_factor = 1.0 - alpha
+        self.adjust = adjust
+        self.min_periods = max(min_periods, 1)
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+
+    def step(self, x: float, commit: bool) -> float:
+        weighted, old_wt, nobs = self.weighted, self.old_wt, self.nobs
+        is_observation = not _isnan(x)
+        nobs += is_observation
+
+        if not _isnan(weighted):
+            old_wt *= self.old_wt_factor
+            if is_observation:
+                if weighted != x:
+                    weighted = (old_wt * weighted + self.new_wt * x) / (old_wt + self.new_wt)
+                old_wt = old_wt + self.new_wt if self.adjust else 1.0
+        elif is_observation:
+            weighted = x
+
+        if commit:
+            self.weighted, self.old_wt, self.nobs = weighted, old_wt, nobs
+        return weighted if nobs >= self.min_periods else NAN
+
+
+def _rma(length: int) -> _Ewm:
+    """Media de Wilder de pandas_ta (ewm alpha=1/length, adjust=True)"""
+    return _Ewm(1.0 / length, adjust=True, min_periods=length)
+
+
+class _Window:
+    """
+    Ventana deslizante de `length` valores con suma y suma de cuadrados
+    centrados (Welford), recalculadas desde cero cada `length` velas.
+    """
+
+    def __init__(self, length: int):
+        self.length = length
+        self.values: deque[float] = deque(maxlen=length)
+        self.nobs = 0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self.same_run = 0
+        self.since_resync = 0
+
+    def _evicted(self) -> float | None:
+        return self.values[0] if len(self.values) == self.length else None
+
+    @staticmethod
+    def _add(nobs: int, mean: float, ssqdm: float, x: float) -> tuple[int, float, float]:
+        nobs += 1
+        delta = x - mean
+        mean += delta / nobs
+        ssqdm += delta * (x - mean)
+        return nobs, mean, ssqdm
+
+    @staticmethod
+    def _remove(nobs: int, mean: float, ssqdm: float, x: float) -> tuple[int, float, float]:
+        nobs -= 1
+        if nobs == 0:
+            return 0, 0.0, 0.0
+        delta = x - mean
+        mean -= delta / nobs
+        ssqdm -= delta * (x - mean)
+        return nobs, mean, max(ssqdm, 0.0)
+
+    def stats(self, x: float, commit: bool) -> tuple[int, float, float, int]:
+        """
+        Agrega `x` a la ventana
+
+        Returns:
+            (nobs, media, suma de cuadrados centrados, racha de valores iguales)
+        """
+        evicted = self._evicted()
+        nobs, mean, ssqdm = self.nobs, self.mean, self.ssqdm
+        if evicted is not None and not _isnan(evicted):
+            nobs, mean, ssqdm = self._remove(nobs, mean, ssqdm, evicted)
+        if not _isnan(x):
+            nobs, mean, ssqdm = self._add(nobs, mean, ssqdm, x)
+
+        last = self.values[-1] if self.values else NAN
+        same_run = self.same_run + 1 if x == last else 1
+        if same_run >= nobs > 0:
+            # Ventana plana: valores exactos, sin ruido de las sumas
+            mean, ssqdm = x, 0.0
+
+        if commit:
+            self.values.append(x)
+            self.same_run = same_run
+            self.since_resync += 1
+            if self.since_resync >= self.length:
+                nobs, mean, ssqdm = self._resync()
+            self.nobs, self.mean, self.ssqdm = nobs, mean, ssqdm
+        return nobs, mean, ssqdm, same_run
+
+    def _resync(self) -> tuple[int, float, float]:
+        """Recalcula media y dispersión exactas (acota el error acumulado)"""
+        self.since_resync = 0
+        valid = [v for v in self.values if not _isnan(v)]
+        if not valid:
+            return 0, 0.0, 0.0
+        mean = math.fsum(valid) / len(valid)
+        return len(valid), mean, math.fsum((v - mean) ** 2 for v in valid)
+
+
+class StreamingIndicator(ABC):
+    """Indicador incremental: O(1) por vela"""
+
+    def update(self, candle: Candle) -> Value:
+        """Agrega una vela cerrada y devuelve el valor del indicador"""
+        return self._step(candle, True)
+
+    def peek(self, candle: Candle) -> Value:
+        """Valor con `candle` como vela siguiente (en curso), sin avanzar el estado"""
+        return self._step(candle, False)
+
+    @abstractmethod
+    def _step(self, candle: Candle, commit: bool) -> Value:
+        """Calcula el valor con la vela dada; solo modifica el estado si `commit`"""
+
+    def state(self) -> dict[str, Any]:
+        """Checkpoint del estado (copia independiente, serializable con pickle)"""
+        return copy.deepcopy(self.__dict__)
+
+    def restore(self, state: dict[str, Any]) -> None:
+        """Restaura un checkpoint de state()"""
+        self.__dict__.update(copy.deepcopy(state))
+
+
+# ----------------------------------------------------------------------
+# Medias y extremos
+# ----------------------------------------------------------------------
+
+class RollingMean(StreamingIndicator):
+    """rolling(length).mean() (y pandas_ta sma)"""
+
+    def __init__(self, source: str = 'close', length: int = 10):
+        self.source = source
+        self.window = _Window(length)
+
+    def _step(self, candle: Candle, commit: bool) -> float:
+        nobs, mean, _, _ = self.window.stats(candle[self.source], commit)
+        return mean if nobs >= self.window.length else NAN
+
+
+class RollingStd(StreamingIndicator):
+    """rolling(length).std(ddof)"""
+
+    def __init__(self, source: str = 'close', length: int = 20, ddof: int = 1):
+        self.source = source
+        self.ddof = ddof
+        self.window = _Window(length)
+
+    @staticmethod
+    def std(nobs: int, ssqdm: float, same_run: int, ddof: int) -> float:
+        if nobs <= ddof:
+            return NAN
+        if same_run >= nobs:
+            return 0.0
+        return math.sqrt(max(ssqdm, 0.0) / (nobs - ddof))
+
+    def _step(self, candle: Candle, commit: bool) -> float:
+        nobs, _, ssqdm, same_run = self.window.stats(candle[self.source], commit)
+        if nobs < self.window.length:
+            return NAN
+        return self.std(nobs, ssqdm, same_run, self.ddof)
+
+
+class RollingExtreme(StreamingIndicator):
+    """rolling(length).max() / .min() con deque monótona (O(1) amortizado)"""
+
+    def __init__(self, source: str = 'close', length: int = 20, mode: str = 'max'):
+        self.source = source
+        self.length = length
+        self.sign = 1.0 if mode == 'max' else -1.0
+        self.count = 0
+        self.nobs = 0
+        self.valid: deque[bool] = deque(maxlen=length)
+        # (índice, valor) con valores monótonos: el primero es el extremo de la ventana
+        self.candidates: deque[tuple[int, float]] = deque()
+
+    def _step(self, candle: Candle, commit: bool) -> float:
+        x = candle[self.source]
+        is_valid = not _isnan(x)
+        index = self.count
+        oldest = index - self.length + 1
+
+        # Extremo de la ventana tras agregar x: el candidato que sale de la
+        # ventana (a lo sumo el primero) se salta
+        best = NAN
+        for position in range(min(2, len(self.candidates))):
+            idx, value = self.candidates[position]
+            if idx >= oldest:
+                best = value
+                break
+        if is_valid and (_isnan(best) or self.sign * x >= self.sign * best):
+            best = x
+
+        evicted_valid = len(self.valid) == self.length and self.valid[0]
+        nobs = self.nobs - evicted_valid + is_valid
+
+        if commit:
+            self.count += 1
+            self.nobs = nobs
+            self.valid.append(is_valid)
+            while self.candidates and self.candidates[0][0] < oldest:
+                self.candidates.popleft()
+            if is_valid:
+                while self.candidates and self.sign * self.candidates[-1][1] <= self.sign * x:
+                    self.candidates.pop()
+                self.candidates.append((index, x))
+
+        return best if nobs >= self.length else NAN
+
+
+class EMA(StreamingIndicator):
+    """
+    Media exponencial
+    sma_seed=False: ewm(span, adjust=False) desde la primera vela (MACD manual)
+    sma_seed=True: pandas_ta ema, sembrada con la SMA de las primeras `length` velas
+    """
+
+    def __init__(self, source: str = 'close', length: int = 10, sma_seed: bool = False):
+        self.source = source
+        self.length = length
+        self.sma_seed = sma_seed
+        self.ewm = _Ewm(2.0 / (length + 1.0), adjust=False)
+        self.seed_values: list[float] = []
+
+    def _step(self, candle: Candle, commit: bool) -> float:
+        return self.step_value(candle[self.source], commit)
+
+    def step_value(self, x: float, commit: bool) -> float:
+        if not self.sma_seed or len(self.seed_values) >= self.length:
+            return self.ewm.step(x, commit)
+
+        # Periodo de siembra: NaN hasta completar `length` valores
+        values = self.seed_values + [x]
+        if commit:
+            self.seed_values.append(x)
+        if len(values) < self.length:
+            return NAN
+        seed = sum(values) / self.length
+        return self.ewm.step(seed, commit)
+
+
+# ----------------------------------------------------------------------
+# Osciladores
+# ----------------------------------------------------------------------
+
+class RSI(StreamingIndicator):
+    """RSI de Wilder (pandas_ta rsi sin TA-Lib)"""
+
+    def __init__(self, source: str = 'close', length: int = 14):
+        self.source = source
+        self.prev = NAN
+        self.positive = _rma(length)
+        self.negative = _rma(length)
+
+    def _step(self, candle: Candle, commit: bool) -> float:
+        x = candle[self.source]
+        delta = x - self.prev
+        positive = 0.0 if delta < 0 else delta
+        negative = 0.0 if delta > 0 else delta
+        positive_avg = self.positive.step(positive, commit)
+        negative_avg = self.negative.step(negative, commit)
+        if commit:
+            self.prev = x
+        return _div(100.0 * positive_avg, positive_avg + abs(negative_avg))
+
+
+class RSISMA(StreamingIndicator):
+    """RSI con medias simples de ganancias/pérdidas (TrendStrategy)"""
+
+    def __init__(self, source: str = 'close', length: int = 14):
+        self.source = source
+        self.prev = NAN
+        self.gain = RollingMean('gain', length)
+        self.loss = RollingMean('loss', length)
+
+    def _step(self, candle: Candle, commit: bool) -> float:
+        x = candle[self.source]
+        delta = x - self.prev
+        moves = {'gain': delta if delta > 0 else 0.0, 'loss': -delta if delta < 0 else 0.0}
+        gain = self.gain._step(moves, commit)
+        loss = self.loss._step(moves, commit)
+        if commit:
+            self.prev = x
+        return 100 - _div(100, 1 + _div(gain, loss))
+
+
+class MACD(StreamingIndicator):
+    """
+    MACD -> {'macd', 'signal', 'hist'}
+    sma_seed=True replica pandas_ta macd; False el MACD manual con ewm
+    """
+
+    def __init__(self, source: str = 'close', fast: int = 12, slow: int = 26, signal: int = 9,
+                 sma_seed: bool = False):
+        if sma_seed and slow < fast:
+            fast, slow = slow, fast
+        self.source = source
+        self.fast = EMA(source, fast, sma_seed)
+        self.slow = EMA(source, slow, sma_seed)
+        self.signal = EMA('macd', signal, sma_seed)
+
+    def _step(self, candle: Candle, commit: bool) -> dict[str, float]:
+        macd = self.fast._step(candle, commit) - self.slow._step(candle, commit)
+        # La señal arranca en el primer MACD válido
+        signal = NAN if _isnan(macd) else self.signal.step_value(macd, commit)
+        return {'macd': macd, 'signal': signal, 'hist': macd - signal}
+
+
+# ----------------------------------------------------------------------
+# Volatilidad y tendencia (usan high/low/close)
+# ----------------------------------------------------------------------
+
+class _TrueRange:
+    """True Range de pandas_ta (NaN en la primera vela)"""
+
+    def __init__(self):
+        self.prev_close = NAN
+
+    def step(self, candle: Candle, commit: bool) -> float:
+        high, low, prev_close = candle['high'], candle['low'], self.prev_close
+        if commit:
+            self.prev_close = candle['close']
+        if _isnan(prev_close):
+            return NAN
+        return max(abs(_non_zero(high - low)), abs(high - prev_close), abs(prev_close - low))
+
+
+class ATR(StreamingIndicator):
+    """ATR de Wilder (pandas_ta atr sin TA-Lib)"""
+
+    def __init__(self, source: str = 'close', length: int = 14):
+        self.true_range = _TrueRange()
+        self.rma = _rma(length)
+
+    def _step(self, candle: Candle, commit: bool) -> float:
+        return self.rma.step(self.true_range.step(candle, commit), commit)
+
+
+class ADX(StreamingIndicator):
+    """ADX de pandas_ta -> {'adx', 'dmp', 'dmn'}"""
+
+    def __init__(self, source: str = 'close', length: int = 14):
+        self.atr = ATR(length=length)
+        self.pos = _rma(length)
+        self.neg = _rma(length)
+        self.adx = _rma(length)
+        self.prev_high = NAN
+        self.prev_low = NAN
+
+    @staticmethod
+    def _zero(x: float) -> float:
+        return 0.0 if abs(x) < _EPSILON else x
+
+    def _step(self, candle: Candle, commit: bool) -> dict[str, float]:
+        high, low = candle['high'], candle['low']
+        atr = self.atr._step(candle, commit)
+
+        up = high - self.prev_high
+        dn = self.prev_low - low
+        if _isnan(up) or _isnan(dn):
+            pos = neg = NAN
+        else:
+            pos = self._zero(up if (up > dn and up > 0) else 0.0)
+            neg = self._zero(dn if (dn > up and dn > 0) else 0.0)
+        if commit:
+            self.prev_high, self.prev_low = high, low
+
+        k = _div(100.0, atr)
+        dmp = k * self.pos.step(pos, commit)
+        dmn = k * self.neg.step(neg, commit)
+        dx = _div(100.0 * abs(dmp - dmn), dmp + dmn)
+        return {'adx': self.adx.step(dx, commit), 'dmp': dmp, 'dmn': dmn}
+
+
+class BBands(StreamingIndicator):
+    """
+    Bandas de Bollinger
+    ddof=0: pandas_ta bbands -> {'lower', 'mid', 'upper', 'bandwidth', 'percent'}
+    ddof=1: rolling.std muestral (bbands_sample) -> {'lower', 'mid', 'upper'}
+    """
+
+    def __init__(self, source: str = 'close', length: int = 20, std: float = 2.0, ddof: int = 0):
+        self.source = source
+        self.std = std
+        self.ddof = ddof
+        self.window = _Window(length)
+
+    def _step(self, candle: Candle, commit: bool) -> dict[str, float]:
+        x = candle[self.source]
+        nobs, mean, ssqdm, same_run = self.window.stats(x, commit)
+        if nobs < self.window.length:
+            mid = dev = NAN
+        else:
+            mid = mean
+            dev = RollingStd.std(nobs, ssqdm, same_run, self.ddof) * self.std
+
+        bands = {'lower': mid - dev, 'mid': mid, 'upper': mid + dev}
+        if self.ddof == 0:
+            width = _non_zero(bands['upper'] - bands['lower'])
+            bands['bandwidth'] = _div(100 * width, mid)
+            bands['percent'] = _div(_non_zero(x - bands['lower']), width)
+        return bands
+
+
+# Mismos nombres que app.core.indicators.INDICATORS
+STREAMING_INDICATORS: dict[str, Callable[..., StreamingIndicator]] = {
+    'sma': RollingMean,
+    'rolling_mean': RollingMean,
+    'rolling_std': lambda source, length: RollingStd(source, length, ddof=1),
+    'rolling_max': lambda source, length: RollingExtreme(source, length, 'max'),
+    'rolling_min': lambda source, length: RollingExtreme(source, length, 'min'),
+    'ema': EMA,
+    'rsi': RSI,
+    'rsi_sma': RSISMA,
+    'macd': lambda source, **params: MACD(source, sma_seed=True, **params),
+    'macd_ewm': lambda source, **params: MACD(source, sma_seed=False, **params),
+    'atr': ATR,
+    'adx': ADX,
+    'bbands': lambda source, **params: BBands(source, ddof=0, **params),
+    'bbands_sample': lambda source, **params: BBands(source, ddof=1, **params),
+}
+
+
+class StreamingIndicatorSet:
+    """
+    Conjunto de indicadores incrementales para un (par, timeframe)
+
+    Uso típico en el loop en vivo:
+        indicators = StreamingIndicatorSet()
+        indicators.add('rsi', length=14)
+        indicators.warmup(ohlcv)                  # histórico (una vez)
+        values = indicators.feed(ohlcv, '1d')     # en cada tick: O(1)
+    """
+
+    def __init__(self):
+        self._indicators: dict[tuple, StreamingIndicator] = {}
+        self.last_timestamp: int | None = None
+
+    def add(self, name: str, source: str = 'close', **params: Any) -> tuple:
+        """Registra un indicador (mismos argumentos que IndicatorEngine.get)"""
+        key = indicator_key(name, source, params)
+        if key not in self._indicators:
+            self._indicators[key] = STREAMING_INDICATORS[name](source, **params)
+        return key
+
+    @staticmethod
+    def _candle(row: list | Candle) -> Candle:
+        if isinstance(row, Mapping):
+            return row
+        return {'timestamp': row[0], 'open': row[1], 'high': row[2], 'low': row[3], 'close': row[4], 'volume': row[5]}
+
+    def update(self, row: list | Candle) -> dict[tuple, Value]:
+        """Agrega una vela cerrada a todos los indicadores"""
+        candle = self._candle(row)
+        self.last_timestamp = candle.get('timestamp', self.last_timestamp)
+        return {key: ind.update(candle) for key, ind in self._indicators.items()}
+
+    def peek(self, row: list | Candle) -> dict[tuple, Value]:
+        """Valores con la vela en curso, sin avanzar el estado"""
+        candle = self._candle(row)
+        return {key: ind.peek(candle) for key, ind in self._indicators.items()}
+
+    def warmup(self, ohlcv: Iterable[list]) -> None:
+        """Alimenta velas cerradas del histórico (una sola vez por serie)"""
+        for row in ohlcv:
+            self.update(row)
+
+    def feed(self, ohlcv: list[list], timeframe: str, now: int | None = None) -> dict[tuple, Value]:
+        """
+        Procesa las velas CCXT más recientes
+
+        Las velas cerradas posteriores a la última procesada avanzan el
+        estado; la vela en curso (si existe) solo se evalúa con peek().
+
+        Returns:
+            Valores de cada indicador en la última vela recibida
+        """
+        values: dict[tuple, Value] = {}
+        for row in ohlcv:
+            if self.last_timestamp is not None and row[0] <= self.last_timestamp:
+                continue
+            if is_candle_closed(row[0], timeframe, now):
+                values = self.update(row)
+            else:
+                values = self.peek(row)
+        return values
+
+    def state(self) -> dict[str, Any]:
+        """Checkpoint de todos los indicadores"""
+        return {
+            'last_timestamp': self.last_timestamp,
+            'indicators': {key: ind.state() for key, ind in self._indicators.items()},
+        }
+
+    def restore(self, state: dict[str, Any]) -> None:
+        """Restaura un checkpoint (los indicadores deben estar registrados con add)"""
+        self.last_timestamp = state['last_timestamp']
+        for key, ind_state in state['indicators'].items():
+            self._indicators[key].restore(ind_state)
@@ -13,6 +13,8 @@ from app.config import config
 from app.models import Order, Trade
 from app.services import exchange_service
 from app.services.analysis_service import analysis_service
+from app.services.screener_service import screener_service
+from app.services.training_scheduler import training_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -144,6 +146,68 @@ def ticker(pair: str):
     return jsonify(ticker_data)
 
 
+@api_bp.route('/tickers', methods=['GET'])
+@handle_errors
+def tickers():
+    """
+    Obtiene los tickers de varios pares en una sola respuesta
+    Query params: pairs (separados por coma, por defecto la pairlist)
+    """
+    pairs_param = request.args.get('pairs')
+    pairs = [p.strip() for p in pairs_param.split(',') if p.strip()] if pairs_param else config.pairlist
+    
+    tickers_data = exchange_service.get_tickers(pairs)
+    
+    return jsonify({
+        "tickers": tickers_data,
+        # Pares sin ticker (no listados por el exchange o con error)
+        "missing": [p for p in pairs if p not in tickers_data],
+        "total": len(tickers_data)
+    })
+
+
+@api_bp.route('/screener', methods=['GET'])
+@handle_errors
+def screener():
+    """
+    Señales de todas las estrategias para varios pares (evaluación en lote)
+    Query params: pairs (separados por coma, por defecto la pairlist), timeframe
+    """
+    pairs_param = request.args.get('pairs')
+    pairs = [p.strip() for p in pairs_param.split(',') if p.strip()] if pairs_param else config.pairlist
+    timeframe = request.args.get('timeframe', config.timeframe)
+    
+    return jsonify(screener_service.scan(pairs, timeframe))
+
+
+@api_bp.route('/ai/predict', methods=['GET', 'POST'])
+@handle_errors
+def ai_predict():
+    """
+    Predicción de la IA para varios pares en una sola petición
+    Pares en el body JSON ({"pairs": [...]}) o en el query param pairs
+    (separados por coma); por defecto la pairlist. Query param: timeframe
+    """
+    body = request.get_json(silent=True) or {}
+    pairs = body.get('pairs')
+    if not pairs:
+        pairs_param = request.args.get('pairs')
+        pairs = [p.strip() for p in pairs_param.split(',') if p.strip()] if pairs_param else config.pairlist
+    timeframe = body.get('timeframe') or request.args.get('timeframe', config.timeframe)
+    
+    return jsonify(screener_service.predict(pairs, timeframe))
+
+
+@api_bp.route('/ai/status', methods=['GET'])
+@handle_errors
+def ai_status():
+    """
+    Estado del entrenamiento de la IA: cola, duración de los entrenamientos
+    y antigüedad del modelo publicado de cada par
+    """
+    return jsonify(training_scheduler.status())
+
+
 @api_bp.route('/ohlcv/<path:pair>', methods=['GET'])
 @handle_errors
 def ohlcv(pair: str):
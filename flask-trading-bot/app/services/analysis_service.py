@@ -1,25 +1,28 @@
 
+import asyncio
 import logging
 import time
 import requests
 import pandas as pd
 from app.config import config
 from app.services import exchange_service
+from app.core.indicators import IndicatorEngine
+from app.utils.singleflight import SingleFlight, coalesce
 
 # Importar Estrategias
-from app.strategies.crypto_swing_v1 import CryptoSwingV1
-from app.strategies.trend_strategy import TrendStrategy
-from app.strategies.macd_strategy import MacdStrategy
-from app.strategies.bollinger_strategy import BollingerStrategy
-from app.strategies.turtle_soup_strategy import TurtleSoupStrategy
-from app.strategies.rsi_divergence_strategy import RsiDivergenceStrategy
+from app.strategies import STRATEGY_REGISTRY, max_startup_candles
 
 logger = logging.getLogger(__name__)
 
+# Velas con las que entrena AIPredictor (una vez por vela cerrada, ver model_registry)
+AI_HISTORY_CANDLES = 500
+
 class AnalysisService:
     def __init__(self):
         self.fng_cache = { "value": None, "timestamp": 0 }
+        self._inflight = SingleFlight()
 
+    @coalesce
     def get_fear_and_greed(self):
         """Obtiene el índice de Miedo y Codicia con caché de 1 hora"""
         now = time.time()
@@ -47,13 +50,38 @@ class AnalysisService:
         # Retorno por defecto si falla
         return {"value": 50, "classification": "Neutral"}
 
+    def _fetch_market_inputs(self, pair: str, limit: int):
+        """
+        Velas + Fear & Greed del par
+        Con exchange.async_io las peticiones se lanzan en paralelo.
+        """
+        if not config.exchange_async_io:
+            ohlcv = exchange_service.get_ohlcv(pair, timeframe=config.timeframe, limit=limit)
+            return ohlcv, self.get_fear_and_greed() if ohlcv else None
+        
+        from app.services.async_exchange_service import get_async_exchange
+        async_exchange = get_async_exchange()
+        return async_exchange.gather(
+            async_exchange.service.get_ohlcv(pair, timeframe=config.timeframe, limit=limit),
+            asyncio.to_thread(self.get_fear_and_greed),
+        )
+
+    @staticmethod
+    def candles_needed() -> int:
+        """Velas a descargar: la estrategia más exigente y el histórico de la IA"""
+        startup = max_startup_candles()
+        if startup <= 0:
+            return AI_HISTORY_CANDLES
+        return max(startup, AI_HISTORY_CANDLES)
+
     def analyze_pair(self, pair: str):
         """
         Analiza un par usando TODAS las estrategias disponibles
         Devuelve una "Matriz de Decisiones" para el Dashboard
         """
-        limit = 500 
-        ohlcv = exchange_service.get_ohlcv(pair, timeframe=config.timeframe, limit=limit)
+        limit = self.candles_needed()
+        # Velas + Fear & Greed (Psicología)
+        ohlcv, fng_index = self._fetch_market_inputs(pair, limit)
         
         if not ohlcv:
             return None
@@ -61,20 +89,24 @@ class AnalysisService:
         df_base = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
         latest_close = df_base['close'].iloc[-1]
         
-        # Fear & Greed (Psicología)
-        fng_index = self.get_fear_and_greed()
-        
 
         
         # Lista de Estrategias a consultar
-        strategy_instances = [
-            {"id": "swing_v1", "name": "CryptoSwing V1 (Master)", "cls": CryptoSwingV1, "main": True},
-            {"id": "turtle", "name": "Turtle Soup (Liquidity)", "cls": TurtleSoupStrategy, "main": False},
-            {"id": "rsi_div", "name": "RSI Divergence", "cls": RsiDivergenceStrategy, "main": False},
-            {"id": "trend", "name": "Classic Trend (RSI)", "cls": TrendStrategy, "main": False},
-            {"id": "macd", "name": "Momentum MACD", "cls": MacdStrategy, "main": False},
-            {"id": "bollinger", "name": "Volatilidad Bollinger", "cls": BollingerStrategy, "main": False}
-        ]
+        strategy_instances = STRATEGY_REGISTRY
+        
+        # Indicadores de la IA y del contexto LLM (todo el histórico)
+        indicators = IndicatorEngine(df_base, kernels=config.fast_kernels)
+        
+        # Cada estrategia se evalúa solo sobre sus últimas startup_candle_count velas.
+        # Un motor por ventana distinta, que calcula una vez la unión de los
+        # indicadores declarados por las estrategias de esa ventana
+        window_engines = {len(df_base): indicators}
+        for meta in strategy_instances:
+            cls = meta["cls"]
+            window = cls.analysis_window(len(df_base))
+            if window not in window_engines:
+                window_engines[window] = IndicatorEngine(df_base.iloc[-window:], kernels=config.fast_kernels)
+            window_engines[window].compute(cls.required_indicators, kernels=True if cls.use_fast_kernels else None)
         
         detailed_results = []
         
@@ -84,18 +116,18 @@ class AnalysisService:
         master_df = None
         
         for meta in strategy_instances:
-            # Copia fresca para cálculos
-            df = df_base.copy()
+            # Copia fresca de la ventana de la estrategia
+            engine = window_engines[meta["cls"].analysis_window(len(df_base))]
+            df = engine.dataframe.copy()
             
             # Instanciar y Calcular
-            strategy = meta["cls"](config)
+            strategy = meta["cls"](config, indicators=engine)
             df = strategy.populate_indicators(df)
-            df = strategy.populate_entry_trend(df)
-            df = strategy.populate_exit_trend(df)
             
             if meta["main"]: master_df = df.copy()
             
-            last = df.iloc[-1]
+            # Señales solo de la última vela (el resto del histórico no se usa aquí)
+            last = strategy.populate_signals(df, tail=1).iloc[-1]
             
             # --- Lógica de Niveles y Señales ---
             signal = "NEUTRAL"
@@ -270,8 +302,15 @@ class AnalysisService:
         ai_result = None
         try:
             from app.ai_predictor import AIPredictor
+            from app.services.training_scheduler import training_scheduler
+            # Con el scheduler activo la petición no entrena: usa el último modelo publicado
+            scheduled = training_scheduler.running
             predictor = AIPredictor()
-            ai_result = predictor.predict(df)
+            ai_result = predictor.predict(
+                df_base, indicators, pair=pair, timeframe=config.timeframe, train=not scheduled
+            )
+            if scheduled and (ai_result is None or ai_result.get('model_stale')):
+                training_scheduler.request(pair)
         except Exception as e:
             logger.error(f"AI Error: {e}")
 
@@ -283,11 +322,11 @@ class AnalysisService:
             
             # --- Enriquecimiento de Datos para GPT (On-the-fly) ---
             # 1. Volumen Relativo (vs media 20)
-            v_sma = context_df['volume'].rolling(20).mean()
+            v_sma = indicators.get('rolling_mean', 'volume', length=20)
             context_df['vol_rel'] = (context_df['volume'] / v_sma).round(2)
             
             # 2. Distancia SMA 50 (Extensión)
-            sma50 = context_df['close'].rolling(50).mean()
+            sma50 = indicators.get('rolling_mean', length=50)
             context_df['dist_sma50%'] = ((context_df['close'] - sma50) / sma50 * 100).round(2)
             
             # 3. Patrón Doji (Indecisión)
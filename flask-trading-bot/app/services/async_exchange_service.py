@@ -0,0 +1,253 @@
+"""
+Servicio de Exchange asíncrono (ccxt.async_support)
+Mismos métodos públicos que ExchangeService pero con firma async, para
+pedir velas, tickers y balances de varios pares en paralelo. Comparte
+con el servicio síncrono el almacén de velas, la caché de OHLCV y el
+snapshot de tickers.
+"""
+import asyncio
+import atexit
+import inspect
+import logging
+import threading
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+import aiohttp
+import ccxt.async_support as ccxt_async
+
+from app.config import config
+from app.services.exchange_service import FAKE_EXCHANGE, ExchangeService, get_exchange_service
+from app.services.fake_exchange import AsyncFakeExchange
+from app.utils.timeframes import now_ms
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncExchangeService:
+    """
+    Variante asíncrona de ExchangeService
+    Usa una sesión aiohttp propia con pool de conexiones (keep-alive)
+    reutilizada por todas las peticiones del exchange.
+    """
+
+    def __init__(self, sync_service: ExchangeService):
+        self._sync = sync_service
+        self._exchange_name = config.exchange_name
+        self._exchange: ccxt_async.Exchange | None = None
+        self._session: aiohttp.ClientSession | None = None
+        # Llamadas idénticas concurrentes comparten la misma tarea
+        self._pending: dict[Hashable, asyncio.Task] = {}
+
+    async def get_exchange(self) -> ccxt_async.Exchange:
+        """Crea (una sola vez) la instancia async del exchange"""
+        if self._exchange is None and self._exchange_name == FAKE_EXCHANGE:
+            # El simulado comparte estado (órdenes, rate limit) con el síncrono
+            self._exchange = AsyncFakeExchange(self._sync.exchange)
+        elif self._exchange is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=config.exchange_pool_size, ttl_dns_cache=300)
+            )
+            exchange_config = self._sync.exchange_config()
+            exchange_config['session'] = self._session
+
+            exchange_class = getattr(ccxt_async, self._exchange_name)
+            self._exchange = exchange_class(exchange_config)
+
+            # Reusar los mercados ya cargados por el servicio síncrono
+            sync_exchange = self._sync.exchange
+            if sync_exchange is not None and sync_exchange.markets:
+                self._exchange.set_markets(sync_exchange.markets, sync_exchange.currencies)
+        return self._exchange
+
+    async def close(self) -> None:
+        """Cierra el exchange y la sesión HTTP"""
+        if self._exchange is not None:
+            await self._exchange.close()
+            self._exchange = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _coalesced(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Single-flight asíncrono: una tarea por clave entre llamadas concurrentes"""
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def get_balance(self, currency: str | None = None) -> dict[str, Any]:
+        """Obtiene el balance de la cuenta (ver ExchangeService.get_balance)"""
+        try:
+            exchange = await self.get_exchange()
+            balance = await self._coalesced(('fetch_balance',), exchange.fetch_balance)
+            return ExchangeService.format_balance(balance, currency)
+        except Exception as e:
+            logger.error(f"Error al obtener balance: {e}")
+            return {}
+
+    async def get_ticker(self, pair: str) -> dict[str, Any]:
+        """Obtiene el ticker de un par desde el snapshot compartido"""
+        return (await self.get_tickers([pair])).get(pair, {})
+
+    async def get_tickers(self, pairs: list[str] | None = None) -> dict[str, dict[str, Any]]:
+        """Obtiene los tickers de varios pares (ver ExchangeService.get_tickers)"""
+        pairs = self._sync.listed_pairs(list(pairs) if pairs else config.pairlist)
+
+        cached = self._sync.cached_tickers(pairs)
+        if cached is not None:
+            return cached
+
+        refresh_pairs = self._sync.ticker_refresh_pairs(pairs)
+        snapshot = await self._coalesced(
+            ('tickers', refresh_pairs), lambda: self._refresh_tickers(refresh_pairs)
+        )
+        return {p: snapshot[p] for p in pairs if p in snapshot}
+
+    async def _refresh_tickers(self, pairs: tuple[str, ...]) -> dict[str, dict[str, Any]]:
+        tickers: dict[str, dict[str, Any]] = {}
+        try:
+            exchange = await self.get_exchange()
+            if exchange.has.get('fetchTickers'):
+                raw = await exchange.fetch_tickers(list(pairs))
+            else:
+                # Un par con error no descarta los demás
+                fetched = await asyncio.gather(*(exchange.fetch_ticker(p) for p in pairs), return_exceptions=True)
+                raw = {}
+                for pair, ticker in zip(pairs, fetched):
+                    if isinstance(ticker, Exception):
+                        logger.error(f"Error al obtener ticker de {pair}: {ticker}")
+                    else:
+                        raw[pair] = ticker
+            tickers = {p: ExchangeService.format_ticker(t) for p, t in raw.items() if p in pairs}
+        except Exception as e:
+            logger.error(f"Error al obtener tickers de {', '.join(pairs)}: {e}")
+
+        self._sync.remember_tickers(tickers)
+        return tickers
+
+    async def get_ohlcv(self, pair: str, timeframe: str = '5m', limit: int = 100) -> list[list]:
+        """Obtiene velas OHLCV (ver ExchangeService.get_ohlcv)"""
+        cached = self._sync.cached_ohlcv(pair, timeframe, limit)
+        if cached is not None:
+            return cached
+        return await self._coalesced(
+            ('ohlcv', pair, timeframe, limit), lambda: self._fetch_ohlcv(pair, timeframe, limit)
+        )
+
+    async def _refresh_live(self, pair: str, timeframe: str, stale: list[list]) -> list[list]:
+        # Solo la vela en curso: las cerradas de la ventana siguen vigentes
+        exchange = await self.get_exchange()
+        fetched = await exchange.fetch_ohlcv(pair, timeframe, since=int(stale[-1][0]), limit=1)
+        return self._sync.complete_live_refresh(pair, timeframe, stale, fetched)
+
+    async def _fetch_ohlcv(self, pair: str, timeframe: str, limit: int) -> list[list]:
+        try:
+            stale = self._sync.stale_live_ohlcv(pair, timeframe, limit)
+            if stale is not None:
+                return await self._refresh_live(pair, timeframe, stale)
+            exchange = await self.get_exchange()
+            now = now_ms()
+            request = self._sync.plan_ohlcv_fetch(pair, timeframe, limit, now)
+            fetched = await exchange.fetch_ohlcv(pair, timeframe, **request)
+            return self._sync.complete_ohlcv_fetch(pair, timeframe, limit, now, request, fetched)
+        except Exception as e:
+            logger.error(f"Error al obtener OHLCV de {pair}: {e}")
+            return []
+
+    async def create_order(
+        self,
+        pair: str,
+        order_type: str,
+        side: str,
+        amount: float,
+        price: float | None = None
+    ) -> dict[str, Any]:
+        """Crea una orden (misma lógica de simulación que el servicio síncrono)"""
+        return await asyncio.to_thread(self._sync.create_order, pair, order_type, side, amount, price)
+
+    async def cancel_order(self, order_id: str, pair: str) -> dict[str, Any]:
+        """Cancela una orden (misma lógica de simulación que el servicio síncrono)"""
+        return await asyncio.to_thread(self._sync.cancel_order, order_id, pair)
+
+    async def fetch_order(self, order_id: str, pair: str) -> dict[str, Any]:
+        """Obtiene información de una orden"""
+        try:
+            exchange = await self.get_exchange()
+            return await exchange.fetch_order(order_id, pair)
+        except Exception as e:
+            logger.error(f"Error al obtener orden {order_id}: {e}")
+            return {}
+
+    async def get_fee(self, pair: str, order_type: str = 'limit', side: str = 'buy') -> float:
+        """Comisión del exchange (metadatos de mercado, sin I/O)"""
+        return self._sync.get_fee(pair, order_type, side)
+
+    async def get_markets(self) -> list[str]:
+        """Lista de mercados disponibles (sin I/O)"""
+        return self._sync.get_markets()
+
+    async def validate_pair(self, pair: str) -> bool:
+        """Valida si un par existe en el exchange (sin I/O)"""
+        return self._sync.validate_pair(pair)
+
+
+class SyncExchangeFacade:
+    """
+    Fachada síncrona sobre AsyncExchangeService para las rutas Flask
+    Corre un event loop propio en una thread daemon; cada método público
+    del servicio async se expone con la misma firma pero bloqueante.
+    """
+
+    def __init__(self, service: AsyncExchangeService):
+        self.service = service
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name='exchange-async-loop', daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def run(self, coro: Awaitable[Any], timeout: float | None = None) -> Any:
+        """Ejecuta una corrutina en el loop del servicio y espera el resultado"""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def gather(self, *coros: Awaitable[Any]) -> list[Any]:
+        """Ejecuta varias corrutinas en paralelo y devuelve sus resultados en orden"""
+        async def _gather():
+            return await asyncio.gather(*coros)
+        return self.run(_gather())
+
+    def close(self) -> None:
+        """Cierra el exchange async y detiene el loop"""
+        if not self._loop.is_running():
+            return
+        try:
+            self.run(self.service.close(), timeout=10)
+        except Exception as e:
+            logger.warning(f"Error cerrando exchange async: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.service, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        def _blocking(*args, **kwargs):
+            return self.run(attr(*args, **kwargs))
+        return _blocking
+
+
+# Instancia global (lazy: solo se crea si se usa el modo async)
+_async_exchange_instance = None
+_async_exchange_lock = threading.Lock()
+
+def get_async_exchange() -> SyncExchangeFacade:
+    """Obtiene la fachada global del servicio de exchange async"""
+    global _async_exchange_instance
+    with _async_exchange_lock:
+        if _async_exchange_instance is None:
+            _async_exchange_instance = SyncExchangeFacade(AsyncExchangeService(get_exchange_service()))
+    return _async_exchange_instance
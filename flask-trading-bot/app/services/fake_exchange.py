@@ -0,0 +1,750 @@
+"""
+Exchange simulado (compatible con la interfaz CCXT que usa el bot)
+Sirve mercados, velas, tickers, balances y órdenes a partir de datos
+sintéticos deterministas o de velas grabadas en el almacén local, con
+latencia, jitter, errores y rate limit configurables. Permite medir
+throughput y latencias de cola sin depender de Binance.
+
+Se activa con `"exchange": {"name": "fake", "fake": {...}}` en config.json.
+Con `fake.url` el bot usa un servidor HTTP simulado (ver
+fake_exchange_server.py) en lugar de la instancia en proceso.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import math
+import random
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+import ccxt
+import numpy as np
+import requests
+
+from app.services.candle_store import CandleStore
+from app.utils.timeframes import now_ms, timeframe_to_msecs
+
+logger = logging.getLogger(__name__)
+
+# Ciclos (periodo en segundos, amplitud del log-precio) del precio sintético
+_PRICE_CYCLES = (
+    (6 * 3600, 0.004),
+    (36 * 3600, 0.012),
+    (9 * 86400, 0.035),
+    (40 * 86400, 0.08),
+    (200 * 86400, 0.22),
+)
+_PRICE_NOISE = 0.002
+_DEFAULT_LIMIT = 500
+
+
+def _hash01(keys: np.ndarray, salt: int) -> np.ndarray:
+    """Ruido uniforme [0, 1) determinista por clave (splitmix64 vectorizado)"""
+    z = keys.astype(np.uint64) + np.uint64(salt)
+    z = z * np.uint64(0x9E3779B97F4A7C15)
+    z ^= z >> np.uint64(30)
+    z = z * np.uint64(0xBF58476D1CE4E5B9)
+    z ^= z >> np.uint64(27)
+    z = z * np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+class _FakeExchangeBase(ABC):
+    """Atributos y helpers de mercados comunes al exchange local y al remoto"""
+
+    id = 'fake'
+    name = 'Fake Exchange'
+    has = {
+        'fetchOHLCV': True,
+        'fetchTicker': True,
+        'fetchTickers': True,
+        'fetchBalance': True,
+        'createOrder': True,
+        'cancelOrder': True,
+        'fetchOrder': True,
+    }
+
+    def __init__(self):
+        self.markets: dict[str, dict[str, Any]] | None = None
+        self.currencies: dict[str, dict[str, Any]] | None = None
+        self.rateLimit = 0
+
+    def set_markets(self, markets: dict[str, Any], currencies: dict[str, Any] | None = None) -> dict[str, Any]:
+        """Equivalente a ccxt.Exchange.set_markets"""
+        self.markets = dict(markets)
+        self.currencies = dict(currencies) if currencies else self.currencies or {}
+        return self.markets
+
+    def market(self, symbol: str) -> dict[str, Any]:
+        """Mercado de un símbolo (lanza BadSymbol si no existe)"""
+        if not self.markets:
+            self.load_markets()
+        if symbol not in self.markets:
+            raise ccxt.BadSymbol(f"{self.id} no tiene el mercado {symbol}")
+        return self.markets[symbol]
+
+    def create_market_order(self, symbol: str, side: str, amount: float, price: float | None = None,
+                            params: dict | None = None) -> dict[str, Any]:
+        return self.create_order(symbol, 'market', side, amount)
+
+    def create_limit_order(self, symbol: str, side: str, amount: float, price: float,
+                           params: dict | None = None) -> dict[str, Any]:
+        return self.create_order(symbol, 'limit', side, amount, price)
+
+    @abstractmethod
+    def load_markets(self, reload: bool = False, params: dict | None = None) -> dict[str, Any]:
+        """Carga (o devuelve) los mercados, como ccxt.Exchange.load_markets"""
+
+    @abstractmethod
+    def create_order(self, symbol: str, type: str, side: str, amount: float,
+                     price: float | None = None, params: dict | None = None) -> dict[str, Any]:
+        """Crea una orden, como ccxt.Exchange.create_order"""
+
+
+class FakeExchange(_FakeExchangeBase):
+    """
+    Exchange simulado en proceso
+
+    Opciones (todas opcionales):
+        latency_ms: Latencia base por petición
+        jitter_ms: Media de la cola exponencial sumada a la latencia
+        error_rate: Probabilidad [0, 1] de responder con un error de red
+        rate_limit_per_second: Peticiones por segundo antes de responder 429 (0 = sin límite)
+        seed: Semilla de precios, jitter y errores
+        source: Exchange del almacén local cuyas velas se reproducen (None = sintético)
+        pairs: Pares adicionales a la pairlist
+        balances: Saldo inicial por moneda
+        spread_bps: Spread bid/ask en puntos básicos
+        fee: Comisión maker/taker
+    """
+
+    def __init__(self, options: dict[str, Any] | None = None, pairs: list[str] | None = None,
+                 datadir: str | Path | None = None):
+        super().__init__()
+        options = options or {}
+        self._pairs = sorted(set(pairs or []) | set(options.get('pairs', [])))
+        self._latency = options.get('latency_ms', 0) / 1000
+        self._jitter = options.get('jitter_ms', 0) / 1000
+        self._error_rate = options.get('error_rate', 0.0)
+        self._rate = options.get('rate_limit_per_second', 0)
+        self._seed = int(options.get('seed', 42))
+        self._spread = options.get('spread_bps', 2) / 10000
+        self._fee = options.get('fee', 0.001)
+        self.rateLimit = int(1000 / self._rate) if self._rate else 0
+
+        # Reproducción de velas grabadas
+        self._source = options.get('source')
+        self._store = CandleStore(datadir) if self._source and datadir else None
+        self._recorded: dict[tuple[str, str], np.ndarray] = {}
+
+        # Latencia, errores y token bucket
+        self._rng = random.Random(self._seed)
+        self._rng_lock = threading.Lock()
+        self._tokens = float(max(1, self._rate))
+        self._tokens_at = time.monotonic()
+
+        # Órdenes y balances simulados
+        self._state_lock = threading.RLock()
+        self._balances = {
+            currency: {'free': float(amount), 'used': 0.0}
+            for currency, amount in options.get('balances', {'USDT': 10000}).items()
+        }
+        self._orders: dict[str, dict[str, Any]] = {}
+        self._order_ids = itertools.count(1)
+
+    # ------------------------------------------------------------------
+    # Simulación de red
+    # ------------------------------------------------------------------
+
+    def _admit(self) -> tuple[float, Exception | None]:
+        """
+        Decide la latencia y el posible error de una petición
+
+        Returns:
+            (segundos de espera, excepción a lanzar o None)
+        """
+        with self._rng_lock:
+            delay = self._latency
+            if self._jitter > 0:
+                delay += self._rng.expovariate(1 / self._jitter)
+
+            if self._rate > 0:
+                now = time.monotonic()
+                self._tokens = min(float(max(1, self._rate)), self._tokens + (now - self._tokens_at) * self._rate)
+                self._tokens_at = now
+                if self._tokens < 1:
+                    return delay, ccxt.RateLimitExceeded(f"{self.id} 429 Too Many Requests")
+                self._tokens -= 1
+
+            if self._error_rate > 0 and self._rng.random() < self._error_rate:
+                return delay, ccxt.ExchangeNotAvailable(f"{self.id} 503 Service Unavailable")
+        return delay, None
+
+    def _call(self, method: str, *args) -> Any:
+        delay, error = self._admit()
+        if delay > 0:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+        return getattr(self, f'_{method}')(*args)
+
+    async def call_async(self, method: str, *args) -> Any:
+        """Igual que las llamadas síncronas pero esperando con asyncio.sleep"""
+        delay, error = self._admit()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return getattr(self, f'_{method}')(*args)
+
+    # ------------------------------------------------------------------
+    # API compatible con CCXT
+    # ------------------------------------------------------------------
+
+    def load_markets(self, reload: bool = False, params: dict | None = None) -> dict[str, Any]:
+        if self.markets and not reload:
+            return self.markets
+        return self._call('load_markets')
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: int | None = None,
+                    limit: int | None = None, params: dict | None = None) -> list[list]:
+        return self._call('fetch_ohlcv', symbol, timeframe, since, limit)
+
+    def fetch_ticker(self, symbol: str, params: dict | None = None) -> dict[str, Any]:
+        return self._call('fetch_ticker', symbol)
+
+    def fetch_tickers(self, symbols: list[str] | None = None, params: dict | None = None) -> dict[str, Any]:
+        return self._call('fetch_tickers', symbols)
+
+    def fetch_balance(self, params: dict | None = None) -> dict[str, Any]:
+        return self._call('fetch_balance')
+
+    def create_order(self, symbol: str, type: str, side: str, amount: float,
+                     price: float | None = None, params: dict | None = None) -> dict[str, Any]:
+        return self._call('create_order', symbol, type, side, amount, price)
+
+    def cancel_order(self, id: str, symbol: str | None = None, params: dict | None = None) -> dict[str, Any]:
+        return self._call('cancel_order', id, symbol)
+
+    def fetch_order(self, id: str, symbol: str | None = None, params: dict | None = None) -> dict[str, Any]:
+        return self._call('fetch_order', id, symbol)
+
+    # ------------------------------------------------------------------
+    # Mercados
+    # ------------------------------------------------------------------
+
+    def market(self, symbol: str) -> dict[str, Any]:
+        # Los mercados locales se generan sin pasar por la red simulada
+        if not self.markets:
+            self._load_markets()
+        return super().market(symbol)
+
+    def _load_markets(self) -> dict[str, Any]:
+        markets = {}
+        currencies = {}
+        for symbol in self._pairs:
+            base, quote = symbol.split('/')
+            markets[symbol] = {
+                'id': f'{base}{quote}',
+                'symbol': symbol,
+                'base': base,
+                'quote': quote,
+                'baseId': base,
+                'quoteId': quote,
+                'active': True,
+                'type': 'spot',
+                'spot': True,
+                'taker': self._fee,
+                'maker': self._fee,
+                'precision': {'amount': 1e-8, 'price': 1e-8},
+                'limits': {'amount': {'min': 1e-8, 'max': None}, 'cost': {'min': 1.0, 'max': None}},
+                'info': {},
+            }
+            for code in (base, quote):
+                currencies[code] = {'id': code, 'code': code, 'precision': 1e-8}
+        return self.set_markets(markets, currencies)
+
+    # ------------------------------------------------------------------
+    # Velas
+    # ------------------------------------------------------------------
+
+    def _symbol_params(self, symbol: str) -> tuple[int, float, np.ndarray]:
+        """Salt, precio base y fases del precio sintético de un símbolo"""
+        salt = (zlib.crc32(symbol.encode()) ^ self._seed) & 0xFFFFFFFF
+        rng = np.random.default_rng(salt)
+        base_price = 10 ** rng.uniform(-1, 4.5)
+        phases = rng.uniform(0, 2 * math.pi, len(_PRICE_CYCLES))
+        return salt, base_price, phases
+
+    def _price_at(self, symbol: str, ts_ms: np.ndarray) -> np.ndarray:
+        """Precio sintético en cada instante (mismo valor en todos los timeframes)"""
+        salt, base_price, phases = self._symbol_params(symbol)
+        seconds = ts_ms // 1000
+        log_price = (_hash01(seconds, salt) - 0.5) * 2 * _PRICE_NOISE
+        for (period, amplitude), phase in zip(_PRICE_CYCLES, phases):
+            log_price = log_price + amplitude * np.sin(2 * math.pi * seconds / period + phase)
+        return base_price * np.exp(log_price)
+
+    def _synthetic_ohlcv(self, symbol: str, timeframe: str, since: int | None, limit: int) -> np.ndarray:
+        tf_ms = timeframe_to_msecs(timeframe)
+        now = now_ms()
+        current_open = now // tf_ms * tf_ms
+
+        if since is None:
+            start = current_open - (limit - 1) * tf_ms
+        else:
+            start = -(-since // tf_ms) * tf_ms
+        end = min(start + limit * tf_ms, current_open + tf_ms)
+        opens = np.arange(start, end, tf_ms, dtype=np.int64)
+        if len(opens) == 0:
+            return np.empty((0, 6))
+
+        # La vela en curso cierra "ahora"
+        closes_at = np.minimum(opens + tf_ms, now)
+        open_ = self._price_at(symbol, opens)
+        close = self._price_at(symbol, closes_at)
+
+        salt, base_price, _ = self._symbol_params(symbol)
+        keys = opens // 1000
+        wick = min(0.05, _PRICE_NOISE * math.sqrt(tf_ms / 60000))
+        high = np.maximum(open_, close) * (1 + _hash01(keys, salt + 1) * wick)
+        low = np.minimum(open_, close) * (1 - _hash01(keys, salt + 2) * wick)
+        volume = 1000 / base_price * (tf_ms / 60000) * (0.5 + _hash01(keys, salt + 3))
+
+        return np.column_stack([opens, open_, high, low, close, volume])
+
+    def _recorded_ohlcv(self, symbol: str, timeframe: str) -> np.ndarray | None:
+        """Velas grabadas del almacén local (None si no hay)"""
+        if self._store is None:
+            return None
+        key = (symbol, timeframe)
+        with self._state_lock:
+            if key not in self._recorded:
+                self._recorded[key] = self._store.load(self._source, symbol, timeframe)
+            rows = self._recorded[key]
+        return rows if len(rows) else None
+
+    def _ohlcv(self, symbol: str, timeframe: str, since: int | None, limit: int | None) -> np.ndarray:
+        self.market(symbol)
+        limit = limit or _DEFAULT_LIMIT
+        recorded = self._recorded_ohlcv(symbol, timeframe)
+        if recorded is None:
+            return self._synthetic_ohlcv(symbol, timeframe, since, limit)
+        if since is None:
+            return recorded[-limit:]
+        return recorded[recorded[:, 0] >= since][:limit]
+
+    def _fetch_ohlcv(self, symbol: str, timeframe: str, since: int | None, limit: int | None) -> list[list]:
+        return CandleStore.to_ohlcv(self._ohlcv(symbol, timeframe, since, limit))
+
+    # ------------------------------------------------------------------
+    # Tickers
+    # ------------------------------------------------------------------
+
+    def _fetch_ticker(self, symbol: str) -> dict[str, Any]:
+        day = self._ohlcv(symbol, '1h', None, 24)
+        if len(day) == 0:
+            raise ccxt.BadSymbol(f"{self.id} sin datos para {symbol}")
+        timestamp = int(day[-1, 0]) if self._store is not None else now_ms()
+        last = float(day[-1, 4])
+        open_ = float(day[0, 1])
+        return {
+            'symbol': symbol,
+            'timestamp': timestamp,
+            'datetime': ccxt.Exchange.iso8601(timestamp),
+            'high': float(day[:, 2].max()),
+            'low': float(day[:, 3].min()),
+            'bid': last * (1 - self._spread / 2),
+            'ask': last * (1 + self._spread / 2),
+            'open': open_,
+            'close': last,
+            'last': last,
+            'change': last - open_,
+            'percentage': (last / open_ - 1) * 100,
+            'baseVolume': float(day[:, 5].sum()),
+            'quoteVolume': float((day[:, 5] * day[:, 4]).sum()),
+            'info': {},
+        }
+
+    def _fetch_tickers(self, symbols: list[str] | None) -> dict[str, Any]:
+        if not self.markets:
+            self._load_markets()
+        return {symbol: self._fetch_ticker(symbol) for symbol in (symbols or list(self.markets))}
+
+    # ------------------------------------------------------------------
+    # Balance y órdenes
+    # ------------------------------------------------------------------
+
+    def _fetch_balance(self) -> dict[str, Any]:
+        with self._state_lock:
+            balance: dict[str, Any] = {'info': {}, 'free': {}, 'used': {}, 'total': {}}
+            for currency, data in self._balances.items():
+                total = data['free'] + data['used']
+                balance[currency] = {'free': data['free'], 'used': data['used'], 'total': total}
+                balance['free'][currency] = data['free']
+                balance['used'][currency] = data['used']
+                balance['total'][currency] = total
+            return balance
+
+    def _wallet(self, currency: str) -> dict[str, float]:
+        return self._balances.setdefault(currency, {'free': 0.0, 'used': 0.0})
+
+    def _reserve(self, order: dict[str, Any], price: float) -> None:
+        """Mueve a 'used' el saldo que compromete una orden"""
+        market = self.markets[order['symbol']]
+        currency, amount = (
+            (market['quote'], order['amount'] * price) if order['side'] == 'buy'
+            else (market['base'], order['amount'])
+        )
+        wallet = self._wallet(currency)
+        if wallet['free'] < amount:
+            raise ccxt.InsufficientFunds(f"{self.id}: saldo insuficiente de {currency}")
+        wallet['free'] -= amount
+        wallet['used'] += amount
+        order['_reserved'] = (currency, amount)
+
+    def _release(self, order: dict[str, Any]) -> None:
+        currency, amount = order.pop('_reserved')
+        wallet = self._wallet(currency)
+        wallet['used'] -= amount
+        wallet['free'] += amount
+
+    def _fill(self, order: dict[str, Any], price: float) -> None:
+        """Ejecuta una orden completa al precio dado"""
+        market = self.markets[order['symbol']]
+        self._release(order)
+        cost = order['amount'] * price
+        fee = cost * market['taker']
+        base, quote = self._wallet(market['base']), self._wallet(market['quote'])
+        if order['side'] == 'buy':
+            quote['free'] -= cost + fee
+            base['free'] += order['amount']
+        else:
+            base['free'] -= order['amount']
+            quote['free'] += cost - fee
+        order.update({
+            'status': 'closed',
+            'filled': order['amount'],
+            'remaining': 0.0,
+            'average': price,
+            'cost': cost,
+            'fee': {'currency': market['quote'], 'cost': fee, 'rate': market['taker']},
+            'lastTradeTimestamp': now_ms(),
+        })
+
+    def _try_fill(self, order: dict[str, Any]) -> None:
+        """Ejecuta una orden abierta si el precio actual la cruza"""
+        if order['status'] != 'open':
+            return
+        ticker = self._fetch_ticker(order['symbol'])
+        if order['type'] == 'market':
+            self._fill(order, ticker['ask'] if order['side'] == 'buy' else ticker['bid'])
+        elif order['side'] == 'buy' and ticker['ask'] <= order['price']:
+            self._fill(order, order['price'])
+        elif order['side'] == 'sell' and ticker['bid'] >= order['price']:
+            self._fill(order, order['price'])
+
+    @staticmethod
+    def _public(order: dict[str, Any]) -> dict[str, Any]:
+        return {k: v for k, v in order.items() if not k.startswith('_')}
+
+    def _create_order(self, symbol: str, type: str, side: str, amount: float, price: float | None) -> dict[str, Any]:
+        self.market(symbol)
+        if type not in ('market', 'limit'):
+            raise ccxt.InvalidOrder(f"{self.id}: tipo de orden no soportado {type}")
+        if type == 'limit' and not price:
+            raise ccxt.InvalidOrder(f"{self.id}: precio requerido para órdenes limit")
+
+        with self._state_lock:
+            timestamp = now_ms()
+            order = {
+                'id': str(next(self._order_ids)),
+                'clientOrderId': None,
+                'timestamp': timestamp,
+                'datetime': ccxt.Exchange.iso8601(timestamp),
+                'lastTradeTimestamp': None,
+                'symbol': symbol,
+                'type': type,
+                'side': side,
+                'price': price,
+                'amount': float(amount),
+                'filled': 0.0,
+                'remaining': float(amount),
+                'cost': 0.0,
+                'average': None,
+                'status': 'open',
+                'fee': None,
+                'trades': [],
+                'info': {},
+            }
+            reserve_price = price or self._fetch_ticker(symbol)['ask'] * (1 + self.markets[symbol]['taker'])
+            self._reserve(order, reserve_price)
+            self._orders[order['id']] = order
+            self._try_fill(order)
+            return self._public(order)
+
+    def _find_order(self, id: str) -> dict[str, Any]:
+        order = self._orders.get(str(id))
+        if order is None:
+            raise ccxt.OrderNotFound(f"{self.id}: orden {id} no encontrada")
+        return order
+
+    def _cancel_order(self, id: str, symbol: str | None) -> dict[str, Any]:
+        with self._state_lock:
+            order = self._find_order(id)
+            if order['status'] != 'open':
+                raise ccxt.OrderNotFound(f"{self.id}: orden {id} ya está {order['status']}")
+            self._release(order)
+            order['status'] = 'canceled'
+            return self._public(order)
+
+    def _fetch_order(self, id: str, symbol: str | None) -> dict[str, Any]:
+        with self._state_lock:
+            order = self._find_order(id)
+            self._try_fill(order)
+            return self._public(order)
+
+
+class AsyncFakeExchange:
+    """
+    Envoltorio con la interfaz de ccxt.async_support
+    Sobre un FakeExchange en proceso la latencia se espera con asyncio.sleep
+    (sin ocupar threads); sobre el cliente remoto cada llamada va a una thread.
+    """
+
+    def __init__(self, exchange: _FakeExchangeBase):
+        self._inner = exchange
+
+    def __getattr__(self, name: str) -> Any:
+        # markets, currencies, has, rateLimit, set_markets, market...
+        return getattr(self._inner, name)
+
+    async def _run(self, method: str, *args) -> Any:
+        if isinstance(self._inner, FakeExchange):
+            return await self._inner.call_async(method, *args)
+        return await asyncio.to_thread(getattr(self._inner, method), *args)
+
+    async def load_markets(self, reload: bool = False, params: dict | None = None) -> dict[str, Any]:
+        if self._inner.markets and not reload:
+            return self._inner.markets
+        return await self._run('load_markets')
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: int | None = None,
+                          limit: int | None = None, params: dict | None = None) -> list[list]:
+        return await self._run('fetch_ohlcv', symbol, timeframe, since, limit)
+
+    async def fetch_ticker(self, symbol: str, params: dict | None = None) -> dict[str, Any]:
+        return await self._run('fetch_ticker', symbol)
+
+    async def fetch_tickers(self, symbols: list[str] | None = None, params: dict | None = None) -> dict[str, Any]:
+        return await self._run('fetch_tickers', symbols)
+
+    async def fetch_balance(self, params: dict | None = None) -> dict[str, Any]:
+        return await self._run('fetch_balance')
+
+    async def create_order(self, symbol: str, type: str, side: str, amount: float,
+                           price: float | None = None, params: dict | None = None) -> dict[str, Any]:
+        return await self._run('create_order', symbol, type, side, amount, price)
+
+    async def cancel_order(self, id: str, symbol: str | None = None, params: dict | None = None) -> dict[str, Any]:
+        return await self._run('cancel_order', id, symbol)
+
+    async def fetch_order(self, id: str, symbol: str | None = None, params: dict | None = None) -> dict[str, Any]:
+        return await self._run('fetch_order', id, symbol)
+
+    async def close(self) -> None:
+        """Nada que cerrar: el exchange envuelto pertenece al servicio síncrono"""
+
+
+class RemoteFakeExchange(_FakeExchangeBase):
+    """Cliente del servidor HTTP simulado (misma interfaz que FakeExchange)"""
+
+    def __init__(self, url: str, timeout: float = 10):
+        super().__init__()
+        self._url = url.rstrip('/')
+        self._timeout = timeout
+        self._session = requests.Session()
+
+    def _request(self, method: str, path: str, params: dict | None = None, body: dict | None = None) -> Any:
+        try:
+            response = self._session.request(
+                method, f"{self._url}{path}", params=params, json=body, timeout=self._timeout
+            )
+        except requests.Timeout as e:
+            raise ccxt.RequestTimeout(str(e)) from e
+        except requests.RequestException as e:
+            raise ccxt.NetworkError(str(e)) from e
+
+        data = response.json()
+        if response.status_code >= 400:
+            # El servidor devuelve el nombre de la excepción CCXT original
+            error_class = getattr(ccxt, data.get('error', ''), None)
+            if not (isinstance(error_class, type) and issubclass(error_class, ccxt.BaseError)):
+                error_class = ccxt.NetworkError if response.status_code >= 500 else ccxt.ExchangeError
+            raise error_class(data.get('message', response.reason))
+        return data
+
+    def load_markets(self, reload: bool = False, params: dict | None = None) -> dict[str, Any]:
+        if self.markets and not reload:
+            return self.markets
+        data = self._request('GET', '/markets')
+        self.rateLimit = data.get('rateLimit', 0)
+        return self.set_markets(data['markets'], data['currencies'])
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = '1m', since: int | None = None,
+                    limit: int | None = None, params: dict | None = None) -> list[list]:
+        return self._request('GET', '/ohlcv', {'symbol': symbol, 'timeframe': timeframe, 'since': since, 'limit': limit})
+
+    def fetch_ticker(self, symbol: str, params: dict | None = None) -> dict[str, Any]:
+        return self._request('GET', '/ticker', {'symbol': symbol})
+
+    def fetch_tickers(self, symbols: list[str] | None = None, params: dict | None = None) -> dict[str, Any]:
+        return self._request('GET', '/tickers', {'symbols': ','.join(symbols) if symbols else None})
+
+    def fetch_balance(self, params: dict | None = None) -> dict[str, Any]:
+        return self._request('GET', '/balance')
+
+    def create_order(self, symbol: str, type: str, side: str, amount: float,
+                     price: float | None = None, params: dict | None = None) -> dict[str, Any]:
+        return self._request('POST', '/order', body={
+            'symbol': symbol, 'type': type, 'side': side, 'amount': amount, 'price': price,
+        })
+
+    def cancel_order(self, id: str, symbol: str | None = None, params: dict | None = None) -> dict[str, Any]:
+        return self._request('POST', '/order/cancel', body={'id': id, 'symbol': symbol})
+
+    def fetch_order(self, id: str, symbol: str | None = None, params: dict | None = None) -> dict[str, Any]:
+        return self._request('GET', '/order', {'id': id, 'symbol': symbol})
+
+
+class FakeExchangeServer:
+    """
+    Servidor HTTP (JSON) sobre un FakeExchange
+
+    Rutas:
+        GET  /markets, /ohlcv, /ticker, /tickers, /balance, /order
+        POST /order, /order/cancel
+    Los errores CCXT se devuelven con su código HTTP (429, 503...) y el
+    nombre de la excepción, que RemoteFakeExchange vuelve a lanzar.
+    """
+
+    ERROR_STATUS = (
+        (ccxt.RateLimitExceeded, 429),
+        (ccxt.NetworkError, 503),
+        (ccxt.OrderNotFound, 404),
+        (ccxt.BadRequest, 400),
+        (ccxt.InsufficientFunds, 400),
+        (ccxt.InvalidOrder, 400),
+    )
+
+    def __init__(self, exchange: FakeExchange, host: str = '127.0.0.1', port: int = 8800):
+        self.exchange = exchange
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _routes(self) -> dict[tuple[str, str], Any]:
+        ex = self.exchange
+
+        def _int(value: str | None) -> int | None:
+            return int(value) if value else None
+
+        return {
+            ('GET', '/markets'): lambda q, b: {
+                'markets': ex.load_markets(), 'currencies': ex.currencies, 'rateLimit': ex.rateLimit,
+            },
+            ('GET', '/ohlcv'): lambda q, b: ex.fetch_ohlcv(
+                q['symbol'], q.get('timeframe', '1m'), _int(q.get('since')), _int(q.get('limit'))
+            ),
+            ('GET', '/ticker'): lambda q, b: ex.fetch_ticker(q['symbol']),
+            ('GET', '/tickers'): lambda q, b: ex.fetch_tickers(q['symbols'].split(',') if q.get('symbols') else None),
+            ('GET', '/balance'): lambda q, b: ex.fetch_balance(),
+            ('GET', '/order'): lambda q, b: ex.fetch_order(q['id'], q.get('symbol')),
+            ('POST', '/order'): lambda q, b: ex.create_order(
+                b['symbol'], b['type'], b['side'], b['amount'], b.get('price')
+            ),
+            ('POST', '/order/cancel'): lambda q, b: ex.cancel_order(b['id'], b.get('symbol')),
+        }
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _dispatch(self, method: str) -> None:
+                parsed = urlparse(self.path)
+                route = server._routes().get((method, parsed.path))
+                if route is None:
+                    return self._send(404, {'error': 'NotFound', 'message': parsed.path})
+
+                query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                try:
+                    length = int(self.headers.get('Content-Length') or 0)
+                    body = json.loads(self.rfile.read(length)) if length else {}
+                    self._send(200, route(query, body))
+                except ccxt.BaseError as e:
+                    status = next((code for cls, code in server.ERROR_STATUS if isinstance(e, cls)), 500)
+                    self._send(status, {'error': type(e).__name__, 'message': str(e)})
+                except (KeyError, ValueError) as e:
+                    self._send(400, {'error': 'BadRequest', 'message': str(e)})
+
+            def _send(self, status: int, payload: Any) -> None:
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def serve_forever(self) -> None:
+        logger.info(f"Exchange simulado escuchando en {self.url}")
+        self._httpd.serve_forever()
+
+    def start(self) -> None:
+        """Sirve en una thread daemon (para usarlo dentro de otro proceso)"""
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-exchange', daemon=True)
+        self._thread.start()
+
+    def shutdown(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def create_fake_exchange(options: dict[str, Any], pairs: list[str], datadir: str | Path) -> _FakeExchangeBase:
+    """
+    Crea el exchange simulado según config (`exchange.fake`)
+
+    Args:
+        options: Opciones de FakeExchange; con `url` se usa el servidor HTTP
+        pairs: Pares a listar como mercados
+        datadir: Almacén de velas para reproducir (`source`)
+
+    Returns:
+        FakeExchange en proceso o RemoteFakeExchange
+    """
+    if options.get('url'):
+        return RemoteFakeExchange(options['url'], timeout=options.get('timeout', 10))
+    return FakeExchange(options, pairs, datadir)
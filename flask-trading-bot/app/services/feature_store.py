@@ -0,0 +1,202 @@
+"""
+Almacén de features de la IA (append-only)
+Un archivo binario por (par, timeframe, conjunto de features) con una fila
+de float64 por vela CERRADA (AIPredictor.STORE_COLUMNS) y, al lado, el
+checkpoint de los indicadores incrementales (FeatureStream). Cada vela
+cerrada nueva se calcula en O(1) y se agrega al final: el entrenamiento y la
+inferencia leen arrays contiguos sin recalcular la ventana con pandas.
+
+La serie se calcula desde la primera vela guardada, así que los indicadores
+exponenciales (RSI, MACD, ADX, ATR) no dependen del arranque de la ventana
+de cada petición como en prepare_data. Si las velas recibidas no empalman
+con la última guardada (bot detenido más tiempo que la ventana), la serie
+se reconstruye con ellas.
+"""
+import logging
+import pickle
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.ai_predictor import AIPredictor, FeatureStream
+from app.config import config
+from app.utils.timeframes import is_candle_closed, timeframe_to_msecs
+
+logger = logging.getLogger(__name__)
+
+# Columnas por fila y tamaño del registro en disco
+ROW_FIELDS = len(AIPredictor.STORE_COLUMNS)
+RECORD_SIZE = ROW_FIELDS * np.dtype(np.float64).itemsize
+
+
+class FeatureStore:
+    """
+    Features por vela cerrada de cada (par, timeframe, conjunto de features)
+
+    Uso:
+        feature_store.update(pair, '1d', ohlcv)          # solo velas nuevas
+        features, candle_ts = feature_store.latest(pair, '1d', ohlcv)
+        rows = feature_store.rows(pair, '1d', limit=500)
+    """
+
+    def __init__(self, base_dir: str | Path):
+        self._base_dir = Path(base_dir)
+        self._streams: dict[Path, FeatureStream] = {}
+        self._locks: dict[Path, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+        self.appended = 0
+        self.rebuilds = 0
+
+    def path_for(self, pair: str, timeframe: str, feature_set: str | None = None) -> Path:
+        """Ruta de las features (ej: features/BTC_USDT-1d-3f2a9c1b.bin)"""
+        safe_pair = pair.replace('/', '_').replace(':', '_')
+        return self._base_dir / f"{safe_pair}-{timeframe}-{feature_set or AIPredictor.feature_set()}.bin"
+
+    def _lock(self, path: Path) -> threading.RLock:
+        with self._locks_guard:
+            if path not in self._locks:
+                self._locks[path] = threading.RLock()
+            return self._locks[path]
+
+    @staticmethod
+    def _count(path: Path) -> int:
+        try:
+            return path.stat().st_size // RECORD_SIZE
+        except FileNotFoundError:
+            return 0
+
+    def _stream(self, path: Path) -> FeatureStream | None:
+        """Estado en memoria o desde el checkpoint en disco (None si no hay serie válida)"""
+        stream = self._streams.get(path)
+        if stream is not None:
+            return stream
+
+        try:
+            with open(path.with_suffix('.state'), 'rb') as f:
+                state = pickle.load(f)
+            stream = FeatureStream()
+            stream.restore(state['stream'])
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Checkpoint corrupto o de otra versión: se reconstruye la serie
+            logger.warning(f"No se pudo cargar el estado de {path.name}: {e}")
+            return None
+        if state['rows'] != self._count(path):
+            # Escritura interrumpida entre las filas y el checkpoint
+            return None
+        self._streams[path] = stream
+        return stream
+
+    @staticmethod
+    def _save_state(path: Path, stream: FeatureStream, rows: int) -> None:
+        tmp = path.with_suffix('.state.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump({'rows': rows, 'stream': stream.state()}, f)
+        tmp.replace(path.with_suffix('.state'))
+
+    def update(self, pair: str, timeframe: str, ohlcv: list[list], now: int | None = None) -> int:
+        """
+        Agrega las filas de las velas cerradas posteriores a la última guardada
+
+        Args:
+            pair: Par de trading
+            timeframe: Timeframe de las velas
+            ohlcv: Velas CCXT recientes (la última puede estar en curso)
+            now: Momento actual en ms (por defecto el reloj)
+
+        Returns:
+            Cantidad de filas agregadas
+        """
+        closed = [row for row in ohlcv if is_candle_closed(row[0], timeframe, now)]
+        if not closed:
+            return 0
+
+        path = self.path_for(pair, timeframe)
+        with self._lock(path):
+            stream = self._stream(path)
+            if stream is None or closed[0][0] > stream.last_timestamp + timeframe_to_msecs(timeframe):
+                return self._rebuild(path, closed)
+
+            new = [row for row in closed if row[0] > stream.last_timestamp]
+            if not new:
+                return 0
+            rows = np.array([stream.update(row) for row in new], dtype=np.float64)
+            try:
+                with open(path, 'ab') as f:
+                    rows.tofile(f)
+                self._save_state(path, stream, self._count(path))
+            except OSError as e:
+                # El estado en memoria ya avanzó: se relee (o reconstruye) en la próxima llamada
+                self._streams.pop(path, None)
+                logger.warning(f"No se pudieron guardar las features {path.name}: {e}")
+                return 0
+            self.appended += len(rows)
+            return len(rows)
+
+    def _rebuild(self, path: Path, closed: list[list]) -> int:
+        """Calcula la serie completa desde las velas dadas y reemplaza la guardada"""
+        stream = FeatureStream()
+        rows = np.array([stream.update(row) for row in closed], dtype=np.float64)
+        self._streams[path] = stream
+        self.rebuilds += 1
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            rows.tofile(tmp)
+            tmp.replace(path)
+            self._save_state(path, stream, len(rows))
+        except OSError as e:
+            logger.warning(f"No se pudieron guardar las features {path.name}: {e}")
+        logger.info(f"Features {path.name}: {len(rows)} velas calculadas")
+        return len(rows)
+
+    def rows(self, pair: str, timeframe: str, limit: int | None = None) -> np.ndarray:
+        """
+        Últimas `limit` filas guardadas (todas si es None)
+
+        Returns:
+            Array (velas x AIPredictor.STORE_COLUMNS), la última es la última vela cerrada
+        """
+        path = self.path_for(pair, timeframe)
+        with self._lock(path):
+            total = self._count(path)
+            count = total if limit is None else min(limit, total)
+            if count <= 0:
+                return np.empty((0, ROW_FIELDS), dtype=np.float64)
+            with open(path, 'rb') as f:
+                f.seek((total - count) * RECORD_SIZE)
+                data = np.fromfile(f, dtype=np.float64, count=count * ROW_FIELDS)
+        return data.reshape(-1, ROW_FIELDS)
+
+    def latest(
+        self, pair: str, timeframe: str, ohlcv: list[list], now: int | None = None
+    ) -> tuple[np.ndarray | None, int | None]:
+        """
+        Features de la última vela recibida (la vela en curso se evalúa sin guardarla)
+
+        Returns:
+            (features en el orden de AIPredictor.FEATURES, timestamp de la última vela cerrada)
+            o (None, None) si no hay velas cerradas
+        """
+        self.update(pair, timeframe, ohlcv, now)
+        path = self.path_for(pair, timeframe)
+        with self._lock(path):
+            stream = self._stream(path)
+            if stream is None or stream.last_row is None:
+                return None, None
+            last = ohlcv[-1]
+            if last[0] > stream.last_timestamp and not is_candle_closed(last[0], timeframe, now):
+                row = stream.peek(last)[-len(AIPredictor.FEATURES):]
+            else:
+                row = [stream.last_row[col] for col in AIPredictor.FEATURES]
+            return np.array(row, dtype=np.float64), int(stream.last_timestamp)
+
+    def stats(self) -> dict:
+        """Series en memoria y contadores de filas calculadas"""
+        return {"series": len(self._streams), "appended": self.appended, "rebuilds": self.rebuilds}
+
+
+# Instancia global
+feature_store = FeatureStore(config.ai_features_dir)
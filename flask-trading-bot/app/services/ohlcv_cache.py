@@ -0,0 +1,135 @@
+"""
+Caché en memoria de OHLCV alineada a cierres de vela
+Cada entrada vence en el próximo cierre de vela de su timeframe (+ margen)
+y se desalojan las menos usadas (LRU) al superar el presupuesto de memoria.
+La vela en curso (la última, aún abierta) vence antes, a los `live_ttl`
+segundos: las velas cerradas de la ventana siguen sirviendo y solo se pide
+al exchange esa vela (ver ExchangeService.get_ohlcv).
+"""
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from app.utils.timeframes import next_candle_close_ms, now_ms, timeframe_to_msecs
+
+
+@dataclass
+class _CacheEntry:
+    candles: list[list]
+    covers: int         # Mayor `limit` que esta ventana satisface
+    expires_at: float   # Epoch en segundos
+    nbytes: int
+    live_until: float   # Vence la vela en curso (inf si la última ya cerró)
+
+
+def _estimate_nbytes(candles: list[list]) -> int:
+    """Tamaño aproximado en memoria de una lista de velas CCXT"""
+    if not candles:
+        return sys.getsizeof(candles)
+    row = candles[0]
+    row_bytes = sys.getsizeof(row) + sum(sys.getsizeof(v) for v in row)
+    return sys.getsizeof(candles) + row_bytes * len(candles)
+
+
+class OhlcvCache:
+    """
+    Caché LRU por (par, timeframe) con vencimiento en el cierre de vela
+    Una sola ventana por clave: pedidos con `limit` menor se sirven
+    como slice de la ventana más grande ya descargada.
+    """
+
+    def __init__(self, max_bytes: int, grace_seconds: float = 5.0, live_ttl: float = 5.0):
+        self._max_bytes = max_bytes
+        self._grace_seconds = grace_seconds
+        self._live_ttl = live_ttl
+        self._entries: OrderedDict[tuple[str, str], _CacheEntry] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, pair: str, timeframe: str, limit: int, stale_live: bool = False) -> list[list] | None:
+        """
+        Devuelve las últimas `limit` velas si están en caché y vigentes
+
+        Args:
+            stale_live: Devolver la ventana aunque la vela en curso esté vencida
+                (para actualizar solo esa vela con refresh_live)
+
+        Returns:
+            Lista de velas o None si no hay entrada válida
+        """
+        key = (pair, timeframe)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if now >= entry.expires_at:
+                self._remove(key)
+                return None
+            if limit > entry.covers or (not stale_live and now >= entry.live_until):
+                return None
+            self._entries.move_to_end(key)
+            return entry.candles[-limit:]
+
+    def refresh_live(self, pair: str, timeframe: str, candle: list) -> None:
+        """Reemplaza la vela en curso de la ventana y renueva su vencimiento"""
+        with self._lock:
+            entry = self._entries.get((pair, timeframe))
+            if entry is None or entry.candles[-1][0] != candle[0]:
+                return
+            entry.candles = [*entry.candles[:-1], candle]
+            entry.live_until = time.time() + self._live_ttl
+
+    def put(self, pair: str, timeframe: str, limit: int, candles: list[list]) -> None:
+        """
+        Guarda la ventana descargada para `limit` velas
+
+        Args:
+            pair: Par de trading
+            timeframe: Timeframe
+            limit: Cantidad de velas pedida al exchange
+            candles: Velas recibidas (pueden ser menos si no hay más historia)
+        """
+        if not candles:
+            return
+
+        key = (pair, timeframe)
+        now = now_ms()
+        expires_at = next_candle_close_ms(timeframe, now) / 1000 + self._grace_seconds
+        live = candles[-1][0] + timeframe_to_msecs(timeframe) > now
+        entry = _CacheEntry(
+            candles=candles,
+            covers=max(limit, len(candles)),
+            expires_at=expires_at,
+            nbytes=_estimate_nbytes(candles),
+            live_until=time.time() + self._live_ttl if live else math.inf,
+        )
+        if entry.nbytes > self._max_bytes:
+            return
+
+        with self._lock:
+            current = self._entries.get(key)
+            if current is not None and current.covers > entry.covers and time.time() < current.expires_at:
+                # Ya hay una ventana más grande y vigente
+                return
+            if current is not None:
+                self._remove(key)
+
+            self._entries[key] = entry
+            self._size += entry.nbytes
+            while self._size > self._max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+
+    def clear(self) -> None:
+        """Vacía la caché"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.nbytes
@@ -0,0 +1,259 @@
+"""
+Servicio de Screener
+Evalúa todas las estrategias sobre muchos pares a la vez: las velas de la
+pairlist se alinean en un CandlePanel (pares x tiempo) y cada estrategia
+calcula sus indicadores y señales en una sola pasada vectorizada
+(BaseStrategy.batch_signals). Devuelve la matriz de señales par x estrategia.
+También la predicción de la IA para muchos pares: las features salen del
+almacén incremental (feature_store) y cada par usa su modelo ya entrenado
+(model_registry), o todos el modelo conjunto de la pairlist (ai.pooled).
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.ai_predictor import AIPredictor
+from app.config import config
+from app.core.panel import CandlePanel, PanelEngine
+from app.services import exchange_service
+from app.services.analysis_service import AnalysisService
+from app.services.feature_store import feature_store
+from app.services.model_evaluation import model_evaluator
+from app.services.model_registry import model_registry
+from app.services.training_scheduler import training_scheduler
+from app.strategies import STRATEGY_REGISTRY, max_startup_candles
+
+logger = logging.getLogger(__name__)
+
+# Velas por par cuando alguna estrategia usa todo el histórico
+DEFAULT_CANDLES = 500
+# Descargas simultáneas sin exchange.async_io
+FETCH_WORKERS = 8
+
+
+class ScreenerService:
+    """Matriz de señales de todas las estrategias para una lista de pares"""
+
+    @staticmethod
+    def candles_needed() -> int:
+        """Velas a descargar por par: la estrategia más exigente"""
+        startup = max_startup_candles()
+        return startup if startup > 0 else DEFAULT_CANDLES
+
+    def _fetch_ohlcv(self, pairs: list[str], timeframe: str, limit: int) -> dict[str, list[list]]:
+        """
+        Velas de todos los pares
+        Con exchange.async_io las peticiones se lanzan en paralelo en el loop async;
+        si no, en un pool de hilos (las velas en caché no llegan a la red).
+        """
+        if config.exchange_async_io:
+            from app.services.async_exchange_service import get_async_exchange
+            async_exchange = get_async_exchange()
+            results = async_exchange.gather(*(
+                async_exchange.service.get_ohlcv(pair, timeframe=timeframe, limit=limit) for pair in pairs
+            ))
+        else:
+            with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+                results = list(pool.map(lambda pair: exchange_service.get_ohlcv(pair, timeframe, limit), pairs))
+        return dict(zip(pairs, results))
+
+    @staticmethod
+    def _last_columns(panel: CandlePanel) -> np.ndarray:
+        """Última vela de cada par (los pares sin velas recientes no acaban en la última columna)"""
+        n_pairs, n_times = panel.shape
+        if not n_times:
+            return np.zeros(n_pairs, dtype=int)
+        valid = ~np.isnan(panel['close'])
+        return n_times - 1 - np.argmax(valid[:, ::-1], axis=1)
+
+    def scan(self, pairs: list[str] | None = None, timeframe: str | None = None) -> dict:
+        """
+        Evalúa todas las estrategias sobre varios pares
+
+        Args:
+            pairs: Pares a evaluar (por defecto la pairlist)
+            timeframe: Timeframe de las velas (por defecto el de la configuración)
+
+        Returns:
+            Diccionario con la lista de estrategias y, por par, la señal de cada una
+            (COMPRA / VENTA / NEUTRAL) en su última vela
+        """
+        pairs = pairs or config.pairlist
+        timeframe = timeframe or config.timeframe
+        start = time.perf_counter()
+
+        limit = self.candles_needed()
+        ohlcv = self._fetch_ohlcv(pairs, timeframe, limit)
+        fetched = time.perf_counter()
+
+        panel = CandlePanel.from_ohlcv(ohlcv, window=limit)
+        n_pairs, n_times = panel.shape
+        missing = [pair for pair in pairs if pair not in panel.pairs]
+
+        last = self._last_columns(panel)
+        rows = np.arange(n_pairs)
+
+        # Un motor por ventana distinta: las estrategias con la misma ventana comparten indicadores
+        engines: dict[int, PanelEngine] = {}
+        signals = {pair: {} for pair in panel.pairs}
+        for meta in STRATEGY_REGISTRY:
+            cls = meta["cls"]
+            window = cls.analysis_window(n_times)
+            if window not in engines:
+                engines[window] = PanelEngine(panel.tail(window))
+            engine = engines[window]
+            engine.compute(cls.required_indicators)
+
+            enter, exit_ = cls(config).batch_signals(engine)
+            # Posición de la última vela de cada par dentro de la ventana
+            column = last - (n_times - window)
+            in_window = column >= 0
+            column = np.maximum(column, 0)
+            enter_last = enter[rows, column] & in_window
+            exit_last = exit_[rows, column] & in_window
+
+            for row, pair in enumerate(panel.pairs):
+                if enter_last[row]:
+                    signals[pair][meta["id"]] = "COMPRA"
+                elif exit_last[row]:
+                    signals[pair][meta["id"]] = "VENTA"
+                else:
+                    signals[pair][meta["id"]] = "NEUTRAL"
+
+        results = []
+        for row, pair in enumerate(panel.pairs):
+            strategy_signals = signals[pair]
+            results.append({
+                "pair": pair,
+                "price": float(panel['close'][row, last[row]]),
+                "timestamp": int(panel.timestamps[last[row]]),
+                "signals": strategy_signals,
+                "buy": sum(1 for s in strategy_signals.values() if s == "COMPRA"),
+                "sell": sum(1 for s in strategy_signals.values() if s == "VENTA"),
+            })
+
+        elapsed = time.perf_counter() - start
+        logger.debug(
+            f"Screener: {n_pairs} pares x {len(STRATEGY_REGISTRY)} estrategias en {elapsed * 1000:.0f}ms "
+            f"(descarga {(fetched - start) * 1000:.0f}ms)"
+        )
+        return {
+            "timeframe": timeframe,
+            "strategies": [{"id": meta["id"], "name": meta["name"]} for meta in STRATEGY_REGISTRY],
+            "results": results,
+            "missing": missing,
+            "total": len(results),
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "fetch_ms": round((fetched - start) * 1000, 1),
+        }
+
+    def predict(self, pairs: list[str] | None = None, timeframe: str | None = None) -> dict:
+        """
+        Predicción de la IA para varios pares en una sola pasada
+
+        Las features de cada par salen del almacén incremental (feature_store):
+        solo se calculan las velas cerradas nuevas y la vela en curso, y cada
+        par se evalúa con su último modelo publicado. Nunca se entrena aquí:
+        los pares sin modelo se devuelven con available=False (y se encolan
+        en el scheduler de la IA). Con ai.pooled todos los pares se evalúan
+        con el modelo conjunto en una sola predict_proba.
+
+        Args:
+            pairs: Pares a evaluar (por defecto la pairlist)
+            timeframe: Timeframe de las velas (por defecto el de la configuración)
+
+        Returns:
+            Diccionario con una entrada por par, ordenadas por fuerza de la señal
+        """
+        pairs = pairs or config.pairlist
+        timeframe = timeframe or config.timeframe
+        start = time.perf_counter()
+
+        # Mismas velas que el análisis: el almacén de features solo calcula las cerradas nuevas
+        limit = AnalysisService.candles_needed()
+        ohlcv = self._fetch_ohlcv(pairs, timeframe, limit)
+        fetched = time.perf_counter()
+
+        missing = [pair for pair in pairs if not ohlcv.get(pair)]
+        predictor = AIPredictor()
+        pooled = config.ai_pooled
+        feature_set = AIPredictor.feature_set(pooled)
+        pooled_model = model_registry.latest(AIPredictor.POOLED_KEY, timeframe, feature_set) if pooled else None
+        now = time.time()
+        results, untrained, ready = [], [], []
+        for pair in pairs:
+            candles = ohlcv.get(pair)
+            if not candles:
+                continue
+            entry = {
+                "pair": pair,
+                "price": float(candles[-1][4]),
+                "timestamp": int(candles[-1][0]),
+                "available": False,
+            }
+            results.append(entry)
+            trained = pooled_model if pooled else model_registry.latest(pair, timeframe, feature_set)
+            if trained is None:
+                untrained.append(pair)
+                continue
+            if pooled and pair not in trained.pairs:
+                # Se predice igual (pair_id desconocido) y se suma al próximo entrenamiento
+                untrained.append(pair)
+            features, candle_ts = feature_store.latest(pair, timeframe, candles)
+            if features is None or not np.isfinite(features).all():
+                continue
+            ready.append((entry, trained, features, candle_ts))
+
+        if pooled and ready:
+            X = AIPredictor.pooled_features(
+                np.array([features for _, _, features, _ in ready]),
+                [entry["price"] for entry, _, _, _ in ready],
+                [AIPredictor.pair_id(pooled_model.pairs, entry["pair"]) for entry, _, _, _ in ready],
+            )
+            probas = pooled_model.model.predict_proba(X)[:, 1]
+        else:
+            probas = [trained.model.predict_proba(features.reshape(1, -1))[0][1] for _, trained, features, _ in ready]
+
+        for (entry, trained, features, candle_ts), proba_up in zip(ready, probas):
+            proba_up = float(proba_up)
+            evaluation = model_evaluator.metrics(AIPredictor.POOLED_KEY if pooled else entry["pair"], timeframe, feature_set)
+            direction, confidence = predictor.decision(proba_up)
+            entry.update({
+                "available": True,
+                "direction": direction,
+                "probability": round(confidence, 1),
+                "proba_up": round(proba_up, 4),
+                "model_accuracy": round((evaluation['accuracy'] if evaluation else trained.score) * 100, 1),
+                "model_age": round(now - trained.trained_at),
+                "model_stale": trained.candle_ts < candle_ts,
+                "evaluation": evaluation,
+            })
+            if entry["model_stale"] and entry["pair"] not in untrained:
+                untrained.append(entry["pair"])
+
+        if training_scheduler.running:
+            for pair in untrained:
+                training_scheduler.request(pair)
+
+        # Primero las señales (LONG/SHORT) por fuerza real |proba_up - 0.5|,
+        # luego NEUTRAL y al final los pares sin predicción
+        results.sort(key=lambda r: (
+            r["available"],
+            r.get("direction", "NEUTRAL") != "NEUTRAL",
+            abs(r.get("proba_up", 0.5) - 0.5),
+        ), reverse=True)
+        elapsed = time.perf_counter() - start
+        return {
+            "timeframe": timeframe,
+            "results": results,
+            "missing": missing,
+            "untrained": untrained,
+            "total": len(results),
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "fetch_ms": round((fetched - start) * 1000, 1),
+        }
+
+
+screener_service = ScreenerService()
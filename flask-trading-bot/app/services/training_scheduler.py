@@ -0,0 +1,388 @@
+"""
+Entrenamiento de la IA en segundo plano
+En cada cierre de vela se reentrenan los modelos de los pares de la pairlist
+(y de los pares analizados desde el dashboard) en un pool de procesos
+acotado: el entrenamiento no ocupa el GIL de las threads web. Cada modelo
+nuevo se publica en model_registry de forma atómica y los análisis usan
+siempre el último publicado, sin entrenar dentro de la petición.
+
+Con ai.pooled se entrena un solo modelo para todos los pares en seguimiento
+(AIPredictor.pooled_arrays) en lugar de uno por par: un trabajo por vela
+cerrada, con las filas de todos los pares en el mismo fit.
+
+Los procesos entrenan sobre filas pre-binneadas (app.core.binned_dataset):
+con pocas velas nuevas el modelo anterior continúa con unas iteraciones extra
+y el entrenamiento completo se repite cada ai.refit.every velas.
+"""
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.ai_predictor import AIPredictor, train_job
+from app.config import config
+from app.services import exchange_service
+from app.services.feature_store import feature_store
+from app.services.model_evaluation import model_evaluator
+from app.services.model_registry import TrainedModel, model_registry
+from app.utils.timeframes import next_candle_close_ms, timeframe_to_msecs
+
+logger = logging.getLogger(__name__)
+
+
+class TrainingScheduler:
+    """
+    Cola de entrenamientos por par con un pool de `workers` procesos
+
+    Uso:
+        training_scheduler.start()      # al arrancar el servidor
+        training_scheduler.request(pair)
+        training_scheduler.status()
+    """
+
+    def __init__(self, timeframe: str, workers: int = 1, grace_seconds: float = 5.0, pooled: bool = False):
+        self.timeframe = timeframe
+        self.workers = max(1, workers)
+        self.grace_seconds = grace_seconds
+        self.pooled = pooled
+        self._pairs: list[str] = []
+        self._queue: deque[str] = deque()       # Pares (o AIPredictor.POOLED_KEY)
+        self._running: dict[str, float] = {}    # par -> inicio (epoch)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pool: ProcessPoolExecutor | None = None
+        self._retried: set[str] = set()         # Pares reencolados tras un pool roto
+        self._next_cycle = 0.0
+        self._last_cycle: float | None = None
+        # Métricas
+        self.trainings = 0
+        self.warm_starts = 0
+        self.failures = 0
+        self.skipped = 0
+        self.pool_restarts = 0
+        self.last_error: str | None = None
+        self.last_train_seconds: float | None = None
+        self.total_train_seconds = 0.0
+        self.max_queue_depth = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, pairs: list[str] | None = None) -> None:
+        """Lanza la thread del scheduler y encola un primer entrenamiento de cada par"""
+        if self.running:
+            return
+        with self._lock:
+            for pair in pairs if pairs is not None else config.pairlist:
+                if pair not in self._pairs:
+                    self._pairs.append(pair)
+        self._stop.clear()
+        self._pool = self._new_pool()
+        self._thread = threading.Thread(target=self._loop, name='ai-training', daemon=True)
+        self._thread.start()
+        logger.info(f"Scheduler de IA iniciado: {len(self._pairs)} pares {self.timeframe}, {self.workers} procesos")
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn: un fork desde el servidor web (con threads) puede heredar locks tomados
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+        )
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        """
+        Reemplaza un pool roto (un proceso murió: OOM, señal...) por uno nuevo
+        Un pool roto rechaza todos los trabajos siguientes: sin esto la IA
+        dejaría de entrenar hasta reiniciar el servidor.
+        """
+        with self._lock:
+            # Varios trabajos del mismo pool fallan a la vez: se reemplaza una sola vez
+            if self._pool is not broken or self._stop.is_set():
+                return
+            self._pool = self._new_pool()
+            self.pool_restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Pool de entrenamiento IA roto: se creó uno nuevo")
+
+    def _requeue(self, pair: str, error: Exception) -> None:
+        """Vuelve a encolar un trabajo perdido con el pool roto (una vez: si se repite es un fallo)"""
+        with self._lock:
+            retry = pair not in self._retried
+            self._retried.add(pair)
+            if retry:
+                self._running.pop(pair, None)
+        if not retry:
+            self._failed(pair, error)
+            return
+        logger.warning(f"Entrenamiento IA {pair} perdido con el pool roto: se vuelve a encolar")
+        self.enqueue(pair)
+
+    def stop(self) -> None:
+        """Detiene la thread y el pool (los entrenamientos en curso se descartan)"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def request(self, pair: str) -> None:
+        """
+        Pide el modelo de un par (ej: analizado desde el dashboard)
+        Si no estaba en seguimiento se entrena ya y en cada cierre de vela siguiente.
+        """
+        with self._lock:
+            if pair not in self._pairs:
+                self._pairs.append(pair)
+        # Modelo conjunto: el par se suma en el próximo entrenamiento
+        self.enqueue(AIPredictor.POOLED_KEY if self.pooled else pair)
+
+    def enqueue(self, pair: str) -> None:
+        """Encola el reentrenamiento de un par (sin duplicados)"""
+        with self._lock:
+            if pair in self._queue or pair in self._running:
+                return
+            self._queue.append(pair)
+            self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+        self._wake.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            if time.time() >= self._next_cycle:
+                self._last_cycle = time.time()
+                with self._lock:
+                    pairs = [AIPredictor.POOLED_KEY] if self.pooled else list(self._pairs)
+                for pair in pairs:
+                    self.enqueue(pair)
+                # Un poco después del cierre para que el exchange ya tenga la vela
+                self._next_cycle = next_candle_close_ms(self.timeframe) / 1000 + self.grace_seconds
+
+            self._dispatch()
+            self._wake.wait(timeout=max(0.0, self._next_cycle - time.time()))
+            self._wake.clear()
+
+    def _dispatch(self) -> None:
+        """Envía trabajos al pool mientras haya procesos libres"""
+        while not self._stop.is_set():
+            with self._lock:
+                if not self._queue or len(self._running) >= self.workers:
+                    return
+                pair = self._queue.popleft()
+                self._running[pair] = time.time()
+
+            try:
+                if pair == AIPredictor.POOLED_KEY:
+                    training, pairs = self._pooled_training_set()
+                else:
+                    training, pairs = self._training_set(pair), None
+                if training is None:
+                    self.skipped += 1
+                    self._finish(pair)
+                    continue
+                pool = self._pool
+                future = pool.submit(train_job, *training)
+            except BrokenProcessPool as e:
+                self._replace_pool(pool)
+                self._requeue(pair, e)
+                continue
+            except Exception as e:
+                self._failed(pair, e)
+                continue
+            future.add_done_callback(lambda f, pair=pair, pairs=pairs, pool=pool: self._on_done(pair, f, pairs, pool))
+
+    def _training_set(self, pair: str) -> tuple | None:
+        """
+        Argumentos de train_job desde el almacén de features, con tantas velas
+        como la ventana del análisis, o None si el modelo ya es de la última vela
+        cerrada o no hay datos suficientes. Antes de reemplazar el modelo
+        publicado se evalúa con las velas cerradas que no vio (fold walk-forward).
+        """
+        from app.services.analysis_service import AnalysisService
+        limit = AnalysisService.candles_needed()
+        candles = exchange_service.get_ohlcv(pair, timeframe=self.timeframe, limit=limit)
+        if not candles or len(candles) < 2:
+            return None
+        feature_set = AIPredictor.feature_set()
+        trained = model_registry.latest(pair, self.timeframe, feature_set)
+        if trained is not None and trained.candle_ts >= self.last_closed_candle(candles):
+            return None
+        # Solo se calculan las features de las velas cerradas nuevas
+        feature_store.update(pair, self.timeframe, candles)
+        X, y, candle_ts, timestamps = AIPredictor.training_arrays(feature_store.rows(pair, self.timeframe, limit))
+        if len(X) < 100:
+            return None
+        model_evaluator.score(pair, self.timeframe, feature_set, trained, X, y, timestamps)
+        # Sin historial de evaluación el proceso también calcula los folds walk-forward
+        bootstrap = model_evaluator.last_timestamp(pair, self.timeframe, feature_set) is None
+        return X, y, candle_ts, timestamps, bootstrap, model_registry.dataset_for(pair, self.timeframe, feature_set)
+
+    def _pooled_training_set(self) -> tuple[tuple | None, list[str]]:
+        """
+        Argumentos de train_job del modelo conjunto (mismas reglas que
+        _training_set) y los pares de cada pair_id. Las features de todos
+        los pares salen del almacén: por vela cerrada solo se calcula una
+        fila nueva por par.
+        """
+        from app.services.analysis_service import AnalysisService
+        limit = AnalysisService.candles_needed()
+        feature_set = AIPredictor.feature_set(pooled=True)
+        key = AIPredictor.POOLED_KEY
+        trained = model_registry.latest(key, self.timeframe, feature_set)
+        with self._lock:
+            pairs = AIPredictor.pooled_pairs(trained, self._pairs)
+
+        rows, last_closed = {}, None
+        for pair in pairs:
+            candles = exchange_service.get_ohlcv(pair, timeframe=self.timeframe, limit=limit)
+            if not candles or len(candles) < 2:
+                continue
+            feature_store.update(pair, self.timeframe, candles)
+            rows[pair] = feature_store.rows(pair, self.timeframe, limit)
+            last_closed = max(last_closed or 0, self.last_closed_candle(candles))
+        if not rows:
+            return None, pairs
+        # Los pares sin velas no entran en trained.pairs (se suman cuando tengan filas)
+        pairs = AIPredictor.pooled_pairs(trained, rows)
+        if trained is not None and trained.candle_ts >= last_closed and set(rows) <= set(trained.pairs):
+            return None, pairs
+
+        X, y, candle_ts, timestamps = AIPredictor.pooled_arrays(rows, pairs)
+        if len(X) < 100:
+            return None, pairs
+        model_evaluator.score(key, self.timeframe, feature_set, trained, X, y, timestamps)
+        bootstrap = model_evaluator.last_timestamp(key, self.timeframe, feature_set) is None
+        dataset = model_registry.dataset_for(key, self.timeframe, feature_set, pairs)
+        return (X, y, candle_ts, timestamps, bootstrap, dataset), pairs
+
+    def last_closed_candle(self, candles: list[list] | None = None) -> int:
+        """Timestamp (apertura) de la última vela cerrada"""
+        tf_ms = timeframe_to_msecs(self.timeframe)
+        last_closed = next_candle_close_ms(self.timeframe) - 2 * tf_ms
+        if candles:
+            last_closed = min(last_closed, int(candles[-1][0]))
+        return last_closed
+
+    def _on_done(self, pair: str, future: Future, pairs: list[str] | None = None,
+                 pool: ProcessPoolExecutor | None = None) -> None:
+        # Callback en la thread del pool: solo publica y despierta al scheduler
+        if future.cancelled():
+            self._finish(pair)
+            return
+        try:
+            result = future.result()
+        except BrokenProcessPool as e:
+            self._replace_pool(pool)
+            self._requeue(pair, e)
+            return
+        except Exception as e:
+            self._failed(pair, e)
+            return
+
+        if result is None:
+            self.skipped += 1
+        else:
+            model, folds, samples, candle_ts, train_seconds, refit = result
+            feature_set = AIPredictor.feature_set(pooled=pair == AIPredictor.POOLED_KEY)
+            if folds is not None:
+                model_evaluator.record(pair, self.timeframe, feature_set, *folds)
+            evaluation = model_evaluator.metrics(pair, self.timeframe, feature_set)
+            score = evaluation['accuracy'] if evaluation else 0.0
+            model_registry.put(pair, self.timeframe, feature_set, TrainedModel(
+                model=model,
+                score=score,
+                candle_ts=candle_ts,
+                samples=samples,
+                trained_at=time.time(),
+                train_seconds=train_seconds,
+                pairs=tuple(pairs or ()),
+            ))
+            self.trainings += 1
+            if refit == 'warm':
+                self.warm_starts += 1
+            self.last_train_seconds = train_seconds
+            self.total_train_seconds += train_seconds
+            logger.info(f"Modelo IA {pair} {self.timeframe} publicado ({refit}, {train_seconds:.2f}s, accuracy walk-forward {score:.3f})")
+        with self._lock:
+            self._retried.discard(pair)
+        self._finish(pair)
+
+    def _failed(self, pair: str, error: Exception) -> None:
+        with self._lock:
+            self._retried.discard(pair)
+        self.failures += 1
+        self.last_error = f"{pair}: {error}"
+        logger.error(f"Entrenamiento IA {pair} falló: {error}")
+        self._finish(pair)
+
+    def _finish(self, pair: str) -> None:
+        with self._lock:
+            self._running.pop(pair, None)
+        self._wake.set()
+
+    def status(self) -> dict:
+        """Estado del scheduler, métricas y antigüedad del modelo de cada par"""
+        now = time.time()
+        with self._lock:
+            # Sin start()/request() todavía: los pares de la pairlist
+            pairs = list(self._pairs) or list(config.pairlist)
+            queued = len(self._queue)
+            in_progress = {pair: round(now - started, 1) for pair, started in self._running.items()}
+
+        last_closed = self.last_closed_candle()
+        feature_set = AIPredictor.feature_set(self.pooled)
+        pooled = model_registry.latest(AIPredictor.POOLED_KEY, self.timeframe, feature_set) if self.pooled else None
+        models = []
+        for pair in pairs:
+            trained = pooled if self.pooled else model_registry.latest(pair, self.timeframe, feature_set)
+            if trained is None or (self.pooled and pair not in trained.pairs):
+                models.append({"pair": pair, "available": False})
+                continue
+            models.append({
+                "pair": pair,
+                "available": True,
+                "age": round(now - trained.trained_at),
+                "candle_ts": trained.candle_ts,
+                "stale": trained.candle_ts < last_closed,
+                "accuracy": round(trained.score * 100, 1),
+                "samples": trained.samples,
+                "train_seconds": trained.train_seconds,
+            })
+
+        return {
+            "running": self.running,
+            "timeframe": self.timeframe,
+            "workers": self.workers,
+            "pooled": self.pooled,
+            "queue_depth": queued + len(in_progress),
+            "queued": queued,
+            "in_progress": in_progress,
+            "max_queue_depth": self.max_queue_depth,
+            "trainings": self.trainings,
+            "warm_starts": self.warm_starts,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "pool_restarts": self.pool_restarts,
+            "last_error": self.last_error,
+            "last_train_seconds": self.last_train_seconds,
+            "avg_train_seconds": round(self.total_train_seconds / self.trainings, 3) if self.trainings else None,
+            "last_cycle_at": self._last_cycle,
+            "next_cycle_at": self._next_cycle if self.running else None,
+            "models": models,
+            "registry": model_registry.stats(),
+            "features": feature_store.stats(),
+        }
+
+
+# Instancia global
+training_scheduler = TrainingScheduler(
+    config.timeframe,
+    workers=config.ai_scheduler_workers,
+    grace_seconds=config.ai_scheduler_grace_seconds,
+    pooled=config.ai_pooled,
+)
@@ -1,4 +1,6 @@
 from .base_strategy import BaseStrategy
+from app.core.indicators import requires
+from app.core.panel import shift
 import pandas as pd
 import numpy as np
 
@@ -17,25 +19,30 @@ class MacdStrategy(BaseStrategy):
     
     stoploss = -0.15 # 15% Stoploss (Damos mucho margen)
     timeframe = '1d'
+
+    # Convergencia de las EMAs 12/26/9 + máximo del histograma en 20 velas (fiabilidad)
+    startup_candle_count = 120
+
+    required_indicators = (
+        requires('ema', length=26),
+        requires('macd_ewm', fast=12, slow=26, signal=9),
+    )
+
+    # Cruce: compara con la vela anterior
+    signal_lookback = 1
     
     def populate_indicators(self, dataframe):
-        closes = dataframe['close']
-        
-        # 1. MACD Manual (12, 26, 9)
-        # EMA 12
-        ema12 = closes.ewm(span=12, adjust=False).mean()
-        # EMA 26
-        ema26 = closes.ewm(span=26, adjust=False).mean()
-        dataframe['ema_26'] = ema26
+        # 1. MACD sobre EMAs recursivas (12, 26, 9)
+        # EMA 26 (soporte dinámico)
+        dataframe['ema_26'] = self.indicator(dataframe, 'ema', length=26)
         
-        # MACD Line = EMA12 - EMA26
-        dataframe['macd'] = ema12 - ema26
-        
-        # Signal Line = EMA9 del MACD
-        dataframe['macdsignal'] = dataframe['macd'].ewm(span=9, adjust=False).mean()
+        # MACD Line = EMA12 - EMA26, Signal Line = EMA9 del MACD
+        macd = self.indicator(dataframe, 'macd_ewm', fast=12, slow=26, signal=9)
+        dataframe['macd'] = macd['macd']
+        dataframe['macdsignal'] = macd['signal']
         
         # Histograma (Para ver fuerza)
-        dataframe['macdhist'] = dataframe['macd'] - dataframe['macdsignal']
+        dataframe['macdhist'] = macd['hist']
         
         return dataframe
 
@@ -68,3 +75,13 @@ class MacdStrategy(BaseStrategy):
         
         dataframe.loc[conditions, 'exit_long'] = 1
         return dataframe
+
+    def batch_signals(self, indicators):
+        # Mismas reglas que populate_entry_trend / populate_exit_trend sobre arrays
+        macd = indicators.get('macd_ewm', fast=12, slow=26, signal=9)
+        line, signal = macd['macd'], macd['signal']
+        prev_line, prev_signal = shift(line), shift(signal)
+
+        enter = (line > signal) & (prev_line <= prev_signal) & (line < 0)
+        exit_ = (line < signal) & (prev_line >= prev_signal)
+        return enter, exit_
@@ -0,0 +1,80 @@
+"""
+Parámetros optimizables de estrategias (como los de Freqtrade)
+Se declaran como atributos de clase y se leen con `.value`:
+
+    class MiEstrategia(BaseStrategy):
+        buy_rsi = IntParameter(20, 45, default=35, space='buy')
+
+        def populate_entry_trend(self, dataframe):
+            ... dataframe['rsi'] < self.buy_rsi.value ...
+
+Cada instancia de la estrategia recibe su propia copia con el valor por
+defecto o el indicado en `params` (ver BaseStrategy.__init__); hyperopt.py
+busca los valores que mejor resultado dan en backtesting.
+"""
+import random
+from abc import ABC, abstractmethod
+from typing import Any
+
+# Espacios de búsqueda (reglas de entrada / salida)
+SPACES = ('buy', 'sell')
+
+
+class BaseParameter(ABC):
+    """Parámetro con valor por defecto y rango de búsqueda"""
+
+    def __init__(self, default: Any, space: str = 'buy', optimize: bool = True):
+        if space not in SPACES:
+            raise ValueError(f"Espacio de parámetro no soportado: {space}")
+        self.default = default
+        self.value = default
+        self.space = space
+        # False = se mantiene fijo en el valor por defecto durante la optimización
+        self.optimize = optimize
+
+    @abstractmethod
+    def cast(self, value: Any) -> Any:
+        """Convierte un valor (ej: leído de JSON) al tipo del parámetro"""
+
+    @abstractmethod
+    def sample(self, rng: random.Random) -> Any:
+        """Valor aleatorio dentro del rango"""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.value})"
+
+
+class IntParameter(BaseParameter):
+    """Entero en [low, high]"""
+
+    def __init__(self, low: int, high: int, default: int, space: str = 'buy', optimize: bool = True):
+        if not low <= default <= high:
+            raise ValueError(f"Valor por defecto {default} fuera de [{low}, {high}]")
+        super().__init__(default, space, optimize)
+        self.low = low
+        self.high = high
+
+    def cast(self, value: Any) -> int:
+        return int(value)
+
+    def sample(self, rng: random.Random) -> int:
+        return rng.randint(self.low, self.high)
+
+
+class DecimalParameter(BaseParameter):
+    """Decimal en [low, high] con `decimals` decimales"""
+
+    def __init__(self, low: float, high: float, default: float, decimals: int = 3,
+                 space: str = 'buy', optimize: bool = True):
+        if not low <= default <= high:
+            raise ValueError(f"Valor por defecto {default} fuera de [{low}, {high}]")
+        super().__init__(default, space, optimize)
+        self.low = low
+        self.high = high
+        self.decimals = decimals
+
+    def cast(self, value: Any) -> float:
+        return round(float(value), self.decimals)
+
+    def sample(self, rng: random.Random) -> float:
+        return round(rng.uniform(self.low, self.high), self.decimals)
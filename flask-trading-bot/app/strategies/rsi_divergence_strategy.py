@@ -1,6 +1,7 @@
 from .base_strategy import BaseStrategy
+from app.core.indicators import requires
+from app.core.panel import shift
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
 
 class RsiDivergenceStrategy(BaseStrategy):
@@ -15,13 +16,22 @@ class RsiDivergenceStrategy(BaseStrategy):
     
     stoploss = -0.07 # 7% Stop
     timeframe = '1d'
+
+    # Convergencia del RSI de Wilder + comparación con 10 velas atrás
+    startup_candle_count = 110
+
+    required_indicators = (
+        requires('rsi', length=14),
+    )
+
+    # Divergencia: precio y RSI contra 10 velas atrás
+    signal_lookback = 10
     
     def populate_indicators(self, dataframe):
-        closes = dataframe['close']
         lows = dataframe['low']
         
         # 1. RSI Clásico
-        dataframe['rsi'] = ta.rsi(closes, length=14)
+        dataframe['rsi'] = self.indicator(dataframe, 'rsi', length=14)
         
         # 2. Pivotes locales (Fractales) para detectar Mínimos
         # Un pivote Low es una vela con bajos más altos a la izquierda y derecha
@@ -75,3 +85,12 @@ class RsiDivergenceStrategy(BaseStrategy):
         
         dataframe.loc[conditions, 'exit_long'] = 1
         return dataframe
+
+    def batch_signals(self, indicators):
+        # Mismas reglas que populate_entry_trend / populate_exit_trend sobre arrays
+        close, open_ = indicators.column('close'), indicators.column('open')
+        rsi = indicators.get('rsi', length=14)
+
+        enter = (close < shift(close, 10)) & (rsi > shift(rsi, 10)) & (rsi < 40) & (close > open_)
+        exit_ = rsi > 65
+        return enter, exit_
@@ -0,0 +1,78 @@
+"""
+Utilidades de timeframes (duración de velas y cierres)
+Mismas unidades que CCXT: s, m, h, d, w, M, y
+"""
+import time
+from datetime import UTC, datetime
+
+_TIMEFRAME_SCALES = {
+    's': 1,
+    'm': 60,
+    'h': 3600,
+    'd': 86400,
+    'w': 604800,
+    'M': 2592000,
+    'y': 31536000,
+}
+
+
+def timeframe_to_seconds(timeframe: str) -> int:
+    """
+    Convierte un timeframe (ej: '5m', '1d') a segundos
+
+    Args:
+        timeframe: Timeframe en formato CCXT
+
+    Returns:
+        Duración de una vela en segundos
+    """
+    amount = int(timeframe[:-1])
+    unit = timeframe[-1]
+    if unit not in _TIMEFRAME_SCALES:
+        raise ValueError(f"Unidad de timeframe no soportada: {timeframe}")
+    return amount * _TIMEFRAME_SCALES[unit]
+
+
+def timeframe_to_msecs(timeframe: str) -> int:
+    """Duración de una vela en milisegundos"""
+    return timeframe_to_seconds(timeframe) * 1000
+
+
+def now_ms() -> int:
+    """Timestamp actual en milisegundos (UTC)"""
+    return int(time.time() * 1000)
+
+
+def is_candle_closed(timestamp_ms: int, timeframe: str, now: int | None = None) -> bool:
+    """Indica si la vela que abre en `timestamp_ms` ya cerró"""
+    now = now_ms() if now is None else now
+    return timestamp_ms + timeframe_to_msecs(timeframe) <= now
+
+
+def next_candle_close_ms(timeframe: str, now: int | None = None) -> int:
+    """Timestamp (ms) del próximo cierre de vela para el timeframe"""
+    now = now_ms() if now is None else now
+    tf_ms = timeframe_to_msecs(timeframe)
+    return (now // tf_ms + 1) * tf_ms
+
+
+def parse_timerange(timerange: str | None) -> tuple[int | None, int | None]:
+    """
+    Convierte un periodo 'YYYYMMDD-YYYYMMDD' (UTC) a milisegundos
+
+    Args:
+        timerange: Periodo; cualquiera de los dos lados puede faltar ('20220101-')
+
+    Returns:
+        (inicio, fin) en ms, None en los lados vacíos
+    """
+    if not timerange:
+        return None, None
+
+    def to_ms(value: str) -> int | None:
+        if not value:
+            return None
+        return int(datetime.strptime(value, '%Y%m%d').replace(tzinfo=UTC).timestamp() * 1000)
+
+    start, _, end = timerange.partition('-')
+    return to_ms(start), to_ms(end)
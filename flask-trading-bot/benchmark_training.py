@@ -0,0 +1,113 @@
+"""
+Tiempo de reentrenamiento de la IA por vela cerrada (app.core.binned_dataset)
+Uso: python benchmark_training.py [--pairs BTC/USDT,ETH/USDT] [--timeframe 1h] [--candles 4000] [--steps 10]
+
+Las filas salen del almacén de features (uno temporal) como en el
+entrenamiento real; con varios pares es el set del modelo conjunto
+(AIPredictor.pooled_arrays). Desliza la ventana una vela por paso y mide
+cada reentrenamiento con:
+  plano:     HistGradientBoosting sobre las features (antes del dataset binneado)
+  completo:  bordes + códigos nuevos y un modelo nuevo sobre los códigos
+  warm:      códigos de la vela nueva + unas iteraciones extra del modelo anterior
+La columna "rebinneo" es lo que scikit-learn tarda en volver a calcular los
+bins de los códigos dentro de cada fit (no se puede evitar desde fuera del
+estimador): la mejora viene de warm start, no de saltar el binning, y solo
+aparece cuando el modelo plano necesita más iteraciones que las del warm.
+"""
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from app.ai_predictor import AIPredictor
+from app.config import config
+from app.core.binned_dataset import MAX_BINS, BinnedDataset
+from app.services.feature_store import FeatureStore
+from benchmark_indicators import load_candles
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark del reentrenamiento de la IA")
+    parser.add_argument('--pairs', default='BTC/USDT', help="Pares separados por coma (varios: modelo conjunto)")
+    parser.add_argument('--timeframe', default='1h')
+    parser.add_argument('--candles', type=int, default=4000, help="Velas de la ventana de entrenamiento")
+    parser.add_argument('--steps', type=int, default=10, help="Velas nuevas (un reentrenamiento por vela)")
+    return parser.parse_args()
+
+
+def training_rows(pairs: list[str], timeframe: str, candles: int, store_dir: str) -> tuple:
+    """(X, y, timestamps) de todas las velas cerradas, ordenadas por vela"""
+    store = FeatureStore(store_dir)
+    rows = {}
+    for pair in pairs:
+        df, origin = load_candles(pair, timeframe, candles)
+        store.update(pair, timeframe, df.to_numpy().tolist())
+        rows[pair] = store.rows(pair, timeframe)
+        logger.info(f"{pair} {timeframe}: {len(rows[pair])} filas de {origin}")
+    if len(pairs) > 1:
+        X, y, _, timestamps = AIPredictor.pooled_arrays(rows, pairs)
+    else:
+        X, y, _, timestamps = AIPredictor.training_arrays(rows[pairs[0]])
+    return X, y, timestamps.astype(np.int64)
+
+
+def timed(func) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    """Función principal"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    args = parse_args()
+    from sklearn.ensemble._hist_gradient_boosting.binning import _BinMapper
+
+    pairs = [pair.strip() for pair in args.pairs.split(',') if pair.strip()]
+    with tempfile.TemporaryDirectory() as tmp:
+        X, y, timestamps = training_rows(pairs, args.timeframe, args.candles + args.steps + 1, tmp)
+        candle_ts = np.unique(timestamps)
+        window = len(candle_ts) - args.steps
+
+        # Sin refit periódico (warm) y con refit en cada vela (completo)
+        warm = BinnedDataset(Path(tmp) / 'warm.bins', refit_every=10 ** 9, warm_iterations=config.ai_warm_iterations)
+        full = BinnedDataset(Path(tmp) / 'full.bins', refit_every=1)
+        first = timestamps <= candle_ts[window - 1]
+        warm.fit(X[first], y[first], timestamps[first], AIPredictor.new_model)
+
+        timings = {'plano': [], 'completo': [], 'warm': [], 'rebinneo': []}
+        agree, iterations = [], []
+        for step in range(1, args.steps + 1):
+            rows = (timestamps >= candle_ts[step]) & (timestamps <= candle_ts[window + step - 1])
+            X_w, y_w, ts_w = X[rows], y[rows], timestamps[rows]
+            ms, plain = timed(lambda: AIPredictor.new_model().fit(X_w, y_w))
+            timings['plano'].append(ms)
+            iterations.append(plain.n_iter_)
+            ms, _ = timed(lambda: full.fit(X_w, y_w, ts_w, AIPredictor.new_model))
+            timings['completo'].append(ms)
+            ms, (model, refit) = timed(lambda: warm.fit(X_w, y_w, ts_w, AIPredictor.new_model))
+            if refit != 'warm':
+                logger.warning(f"  paso {step}: el dataset hizo un entrenamiento completo")
+            timings['warm'].append(ms)
+            codes = warm._load()['records']['codes'][-len(X_w):]
+            ms, _ = timed(lambda: _BinMapper(n_bins=MAX_BINS + 1).fit_transform(codes))
+            timings['rebinneo'].append(ms)
+            # Misma decisión (proba > 0.5) que el modelo plano
+            agree.append(np.mean((model.predict_proba(X_w)[:, 1] > 0.5) == (plain.predict_proba(X_w)[:, 1] > 0.5)))
+
+    logger.info(f"Mediana de {args.steps} reentrenamientos ({len(X_w)} filas, "
+                f"{np.median(iterations):.0f} iteraciones el plano, +{config.ai_warm_iterations} el warm):")
+    for name, values in timings.items():
+        logger.info(f"  {name:9s} {np.median(values):8.1f}ms")
+    logger.info(f"  warm vs plano: {np.median(timings['plano']) / np.median(timings['warm']):.1f}x, "
+                f"rebinneo {np.median(timings['rebinneo']) / np.median(timings['completo']) * 100:.1f}% del completo, "
+                f"misma decisión en {np.mean(agree) * 100:.1f}% de las filas")
+
+
+if __name__ == '__main__':
+    main()
@@ -13,6 +13,11 @@ def main():
     """Función principal"""
     app = create_app()
     
+    # Entrenamiento de la IA en segundo plano (en cada cierre de vela)
+    if config.ai_scheduler_enabled:
+        from app.services.training_scheduler import training_scheduler
+        training_scheduler.start()
+    
     logger.info(f"=== {config.bot_name} ===")
     logger.info(f"Modo: {'DRY RUN' if config.dry_run else 'LIVE TRADING'}")
     logger.info(f"Exchange: {config.exchange_name}")
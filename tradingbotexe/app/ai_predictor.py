@@ -1,66 +1,126 @@
+import hashlib
+import json
+import logging
+import math
+import time
+from bisect import bisect_right
 
 import pandas as pd
 import numpy as np
-import pandas_ta as ta
-from sklearn.ensemble import HistGradientBoostingClassifier
-from sklearn.model_selection import cross_val_score, TimeSeriesSplit
+
+from app.core.indicators import IndicatorEngine
+from app.core.streaming import StreamingIndicatorSet
+from app.core.tree_model import CompiledTrees
+from app.utils.timeframes import is_candle_closed, timeframe_to_msecs
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+NAN = float('nan')
 
 class AIPredictor:
     """
     Motor de Predicción V3 (Turbo) usando HistGradientBoosting.
     Más rápido y preciso que Random Forest para detectar patrones sutiles.
+    Los modelos entrenados se reutilizan hasta la próxima vela cerrada
+    (app.services.model_registry) y se sirven compilados a arrays de NumPy
+    (app.core.tree_model): scikit-learn solo se importa para entrenar.
     """
+
+    # Motor Nuevo: Gradient Boosting (LigthGBM inspired)
+    MODEL_PARAMS = {
+        "learning_rate": 0.05,        # Aprendizaje más fino
+        "max_iter": 200,              # Más iteraciones (árboles)
+        "max_depth": 5,               # Profundidad controlada para evitar overfitting
+        "l2_regularization": 1.0,     # Regularización para generalizar mejor
+        "early_stopping": True,       # Parar si deja de mejorar
+        "random_state": 42,
+    }
+
+    FEATURES = [
+        'rsi', 'rsi_lag1', 
+        'macd', 'macdhist', 'macdhist_lag1',
+        'bb_width', 
+        'adx', 'adx_slope',
+        'dist_sma50', 'volume_rel', 'volume_rel_lag1',
+        # New Macro Features
+        'rsi_macro', 'trend_macro'
+    ]
+
+    # Cambiar si se modifica prepare_data, FeatureStream o el target: invalida los
+    # modelos y las features guardadas
+    FEATURE_VERSION = 2
+
+    # Columnas de cada fila del almacén de features (app.services.feature_store)
+    STORE_COLUMNS = ['timestamp', 'close', 'atr'] + FEATURES
+
+    # Modelo conjunto de la pairlist (ai.pooled): las features en unidades de
+    # precio se dividen por el cierre para que sean comparables entre pares
+    PRICE_FEATURES = ['macd', 'macdhist', 'macdhist_lag1']
+    # Clave del modelo conjunto en el registro y en la evaluación (en lugar del par)
+    POOLED_KEY = 'pooled'
     
     def __init__(self):
-        # Motor Nuevo: Gradient Boosting (LigthGBM inspired)
-        self.model = HistGradientBoostingClassifier(
-            learning_rate=0.05,        # Aprendizaje más fino
-            max_iter=200,              # Más iteraciones (árboles)
-            max_depth=5,               # Profundidad controlada para evitar overfitting
-            l2_regularization=1.0,     # Regularización para generalizar mejor
-            early_stopping=True,       # Parar si deja de mejorar
-            random_state=42
-        )
-
-    def prepare_data(self, df, df_macro=None):
+        self.model: CompiledTrees | None = None
+
+    @classmethod
+    def new_model(cls):
+        """HistGradientBoostingClassifier sin entrenar (importa scikit-learn)"""
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        return HistGradientBoostingClassifier(**cls.MODEL_PARAMS)
+
+    @classmethod
+    def feature_set(cls, pooled: bool = False) -> str:
+        """Identificador de features + hiperparámetros (clave del registro de modelos)"""
+        payload = [cls.FEATURE_VERSION, cls.FEATURES, cls.MODEL_PARAMS]
+        if pooled:
+            payload.append({'pooled': cls.PRICE_FEATURES})
+        return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:10]
+
+    def prepare_data(self, df, df_macro=None, indicators=None):
         """
         Feature Engineering Avanzado con Multi-Timeframe (Micro + Macro)
+        `indicators` permite reutilizar los indicadores ya calculados por
+        las estrategias sobre las mismas velas (IndicatorEngine).
         """
         data = df.copy()
+        if indicators is None or not indicators.covers(df):
+            indicators = IndicatorEngine(df)
         
         # --- 1. Features Micro (5m) ---
-        data['rsi'] = ta.rsi(data['close'], length=14)
+        data['rsi'] = indicators.get('rsi', length=14)
         
-        macd = ta.macd(data['close'])
-        data['macd'] = macd['MACD_12_26_9']
-        data['macdhist'] = macd['MACDh_12_26_9']
+        macd = indicators.get('macd', fast=12, slow=26, signal=9)
+        data['macd'] = macd['macd']
+        data['macdhist'] = macd['hist']
         
-        adx = ta.adx(data['high'], data['low'], data['close'], length=14)
-        if adx is not None and 'ADX_14' in adx:
-            data['adx'] = adx['ADX_14']
+        adx = indicators.get('adx', length=14)
+        if adx is not None:
+            data['adx'] = adx['adx']
             data['adx_slope'] = data['adx'].diff()
         else:
             data['adx'] = 0
             data['adx_slope'] = 0
             
         # Volatilidad
-        data['atr'] = ta.atr(data['high'], data['low'], data['close'], length=14)
-        bb = ta.bbands(data['close'], length=20)
-        data['bb_width'] = (bb['BBU_20_2.0'] - bb['BBL_20_2.0']) / bb['BBM_20_2.0']
+        data['atr'] = indicators.get('atr', length=14)
+        bb = indicators.get('bbands', length=20, std=2.0)
+        data['bb_width'] = (bb['upper'] - bb['lower']) / bb['mid']
         
         # Relativos
-        sma50 = ta.sma(data['close'], length=50)
+        sma50 = indicators.get('sma', length=50)
         data['dist_sma50'] = (data['close'] - sma50) / sma50
         
-        vol_sma = ta.sma(data['volume'], length=20)
+        vol_sma = indicators.get('sma', 'volume', length=20)
         data['volume_rel'] = data['volume'] / vol_sma
         
         # --- 2. Features MACRO (4H) - "La Visión General" ---
         if df_macro is not None and not df_macro.empty:
             # Calculamos indicadores en el DF Macro
             macro = df_macro.copy()
-            macro['rsi_macro'] = ta.rsi(macro['close'], length=14)
-            macro['sma200_macro'] = ta.sma(macro['close'], length=200)
+            macro_indicators = IndicatorEngine(df_macro, kernels=indicators.kernels)
+            macro['rsi_macro'] = macro_indicators.get('rsi', length=14)
+            macro['sma200_macro'] = macro_indicators.get('sma', length=200)
             
             # Tendencia Macro: Precio vs SMA200 (1=Alcista, -1=Bajista)
             macro['trend_macro'] = np.where(macro['close'] > macro['sma200_macro'], 1, -1)
@@ -100,73 +160,299 @@ class AIPredictor:
         data.dropna(inplace=True)
         return data
 
-    def predict(self, df, df_macro=None):
+    @staticmethod
+    def decision(proba_up, trend_macro=0):
+        """
+        Lógica de Decisión V2 (con sesgo macro si la confianza es muy baja)
+
+        Returns:
+            (dirección, confianza en %)
+        """
+        direction = "NEUTRAL"
+        confidence = 0.0
+        
+        if proba_up > 0.55: 
+            direction = "ALCISTA"
+            confidence = proba_up * 100
+        elif proba_up < 0.45: 
+            direction = "BAJISTA"
+            confidence = (1 - proba_up) * 100
+        else:
+            confidence = (1 - abs(proba_up - 0.5) * 2) * 100 
+            # Si estamos neutral pero la tendencia macro es clara, usamos sesgo macro
+            if confidence < 20: # Muy baja confianza
+               if trend_macro == 1: direction = "ALCISTA (Macro)"
+               elif trend_macro == -1: direction = "BAJISTA (Macro)"
+        return direction, confidence
+
+    @staticmethod
+    def last_closed_timestamp(df, timeframe=None):
+        """
+        Timestamp de la última vela cerrada
+        Sin timeframe se asume que la última vela es la actual (sin cerrar).
+        """
+        timestamps = df['timestamp']
+        if timeframe is not None and is_candle_closed(int(timestamps.iloc[-1]), timeframe):
+            return int(timestamps.iloc[-1])
+        return int(timestamps.iloc[-2]) if len(timestamps) > 1 else None
+
+    def training_set(self, df, full_data, timeframe=None):
+        """
+        Split Train/Test: solo velas cuyo target se conoce con velas ya cerradas
+        (la última vela cerrada queda fuera, su target depende de la vela actual)
+
+        Returns:
+            (X, y, timestamp de la última vela cerrada)
+        """
+        # Verificar disponibilidad
+        available_features = [f for f in self.FEATURES if f in full_data.columns]
+        candle_ts = self.last_closed_timestamp(df, timeframe)
+        train_data = full_data[full_data['timestamp'] < candle_ts]
+        return train_data[available_features], train_data['target'], candle_ts
+
+    @classmethod
+    def training_arrays(cls, rows):
         """
-        Entrena y predice la probabilidad de subida significativa.
+        Split Train/Test sobre filas del almacén de features (app.services.feature_store)
+        Misma regla que training_set: la última vela cerrada queda fuera (su
+        target depende de la vela actual) y se descartan filas sin features.
+
+        Args:
+            rows: Array (velas x STORE_COLUMNS) hasta la última vela cerrada
+
+        Returns:
+            (X, y, timestamp de la última vela cerrada, timestamp de cada fila)
+        """
+        if len(rows) < 2:
+            return np.empty((0, len(cls.FEATURES))), np.empty(0, dtype=int), None, np.empty(0)
+        close, atr = rows[:, 1], rows[:, 2]
+        features = rows[:-1, 3:]
+        # Target 1: la próxima vela supera el cierre en más de 0.5 * ATR
+        target = (close[1:] > close[:-1] + atr[:-1] * 0.5).astype(int)
+        usable = np.isfinite(features).all(axis=1) & np.isfinite(atr[:-1])
+        return features[usable], target[usable], int(rows[-1, 0]), rows[:-1, 0][usable]
+
+    @classmethod
+    def scale_free(cls, values, close, columns):
+        """
+        Divide por el cierre las features en unidades de precio (PRICE_FEATURES)
+
+        Args:
+            values: Array (filas x columns), no se modifica
+            close: Cierre de cada fila
+            columns: Nombre de cada columna de `values`
+
+        Returns:
+            Copia de `values` con PRICE_FEATURES relativas al cierre
+        """
+        values = np.array(values, dtype=np.float64)
+        idx = [columns.index(col) for col in cls.PRICE_FEATURES]
+        values[:, idx] /= np.asarray(close, dtype=np.float64).reshape(-1, 1)
+        return values
+
+    @staticmethod
+    def pooled_pairs(previous, pairs):
+        """
+        Pares del modelo conjunto: los del modelo anterior primero, así cada par
+        conserva su pair_id entre entrenamientos, y después los nuevos
+        """
+        return list(dict.fromkeys([*(previous.pairs if previous is not None else ()), *pairs]))
+
+    @staticmethod
+    def pair_id(pairs, pair):
+        """Índice del par en el modelo conjunto (NaN si no participó del entrenamiento)"""
+        return pairs.index(pair) if pair in pairs else NAN
+
+    @classmethod
+    def pooled_arrays(cls, rows_by_pair, pairs):
+        """
+        Split Train/Test del modelo conjunto: training_arrays de cada par sobre
+        features sin escala de precio, con el índice del par en `pairs` como
+        última columna. Las filas quedan ordenadas por vela para que los folds
+        walk-forward no entrenen con el futuro de otro par.
+
+        Args:
+            rows_by_pair: Filas del almacén de features (STORE_COLUMNS) por par
+            pairs: Pares del modelo (su índice es el pair_id)
+
+        Returns:
+            (X, y, timestamp de la última vela cerrada, timestamp de cada fila)
+        """
+        X, y, timestamps, last = [], [], [], []
+        for pair_id, pair in enumerate(pairs):
+            rows = rows_by_pair.get(pair)
+            if rows is None or len(rows) < 2:
+                continue
+            features, target, candle_ts, ts = cls.training_arrays(cls.scale_free(rows, rows[:, 1], cls.STORE_COLUMNS))
+            X.append(np.column_stack([features, np.full(len(features), pair_id, dtype=np.float64)]))
+            y.append(target)
+            timestamps.append(ts)
+            last.append(candle_ts)
+        if not X:
+            return np.empty((0, len(cls.FEATURES) + 1)), np.empty(0, dtype=int), None, np.empty(0)
+        timestamps = np.concatenate(timestamps)
+        order = np.argsort(timestamps, kind='stable')
+        return np.concatenate(X)[order], np.concatenate(y)[order], max(last), timestamps[order]
+
+    @classmethod
+    def pooled_features(cls, features, close, pair_ids):
+        """
+        Filas de inferencia del modelo conjunto
+
+        Args:
+            features: Array (pares x FEATURES), ej. de feature_store.latest
+            close: Cierre de la vela de cada fila
+            pair_ids: pair_id de cada fila (AIPredictor.pair_id)
+        """
+        features = cls.scale_free(np.atleast_2d(features), close, cls.FEATURES)
+        return np.column_stack([features, np.asarray(pair_ids, dtype=np.float64)])
+
+    def train(self, X, y, timestamps=None, evaluate=True, dataset=None):
+        """
+        Entrena un modelo nuevo con todas las filas
+        Con `timestamps` y `evaluate` también evalúa folds walk-forward
+        (TimeSeriesSplit: cada fold entrena con el pasado y predice el bloque
+        siguiente) para arrancar el historial de app.services.model_evaluation;
+        después cada vela cerrada agrega su propio fold sin reentrenar nada extra.
+        Con `dataset` (app.core.binned_dataset) y `timestamps` el modelo se
+        entrena sobre filas pre-binneadas y continúa el anterior (warm start)
+        si solo cerraron unas pocas velas.
+
+        Returns:
+            (modelo compilado (CompiledTrees), (timestamps, probabilidades, target)
+            fuera de muestra o None, 'full' o 'warm')
+        """
+        folds = None
+        if timestamps is not None and evaluate:
+            from sklearn.model_selection import TimeSeriesSplit
+            X_arr, y_arr = np.asarray(X), np.asarray(y)
+            tested, proba = [], []
+            for train_idx, test_idx in TimeSeriesSplit(n_splits=3).split(X_arr):
+                fold_model = self.new_model().fit(X_arr[train_idx], y_arr[train_idx])
+                tested.append(test_idx)
+                proba.append(fold_model.predict_proba(X_arr[test_idx])[:, 1])
+            tested = np.concatenate(tested)
+            folds = (np.asarray(timestamps)[tested], np.concatenate(proba), y_arr[tested])
+
+        if dataset is not None and timestamps is not None:
+            model, refit = dataset.fit(X, y, timestamps, self.new_model)
+            return model, folds, refit
+
+        # Entrenar Final
+        model = self.new_model()
+        model.fit(X, y)
+        return CompiledTrees.from_sklearn(model), folds, 'full'
+
+    def predict(self, df, df_macro=None, indicators=None, pair=None, timeframe=None, train=True):
+        """
+        Predice la probabilidad de subida significativa.
         Ahora soporta contexto MACRO (4H).
+        Con `pair` y `timeframe` las features (Micro + Macro) salen del almacén
+        incremental (app.services.feature_store) y el modelo se entrena una vez
+        por vela cerrada y se reutiliza desde el registro; sin ellos se
+        recalcula todo con prepare_data y se entrena en cada llamada.
+        Con train=False nunca se entrena: se usa el último modelo publicado
+        (None si todavía no hay ninguno). Con ai.pooled el modelo es uno solo
+        para toda la pairlist (pooled_arrays).
         """
         try:
             # Necesitamos más datos para ML (mínimo histórico)
             if len(df) < 150:
                 print("Insuficientes datos para ML")
                 return None 
-            
-            # Feature Engineering con Macro
-            full_data = self.prepare_data(df, df_macro)
-            
-            features = [
-                'rsi', 'rsi_lag1', 
-                'macd', 'macdhist', 'macdhist_lag1',
-                'bb_width', 
-                'adx', 'adx_slope',
-                'dist_sma50', 'volume_rel', 'volume_rel_lag1',
-                # New Macro Features
-                'rsi_macro', 'trend_macro'
-            ]
-            
-            # Verificar disponibilidad
-            available_features = [f for f in features if f in full_data.columns]
-            
-            # Split Train/Test
-            X = full_data[available_features].iloc[:-1]
-            y = full_data['target'].iloc[:-1]
-            last_candle_features = full_data[available_features].iloc[-1:]
-            
-            if len(X) < 100: return None
-                
-            # Cross-Validation Score
-            tscv = TimeSeriesSplit(n_splits=3)
-            cv_scores = cross_val_score(self.model, X, y, cv=tscv, scoring='accuracy')
-            quality_score = np.mean(cv_scores)
-
-            # Entrenar Final
-            self.model.fit(X, y)
+
+            model_info = {}
+            if pair is not None and timeframe is not None:
+                from app.config import config
+                from app.services.feature_store import feature_store
+                from app.services.model_evaluation import model_evaluator
+                from app.services.model_registry import model_registry
+                ohlcv = df[OHLCV_COLUMNS].to_numpy().tolist()
+                ohlcv_macro = df_macro[OHLCV_COLUMNS].to_numpy().tolist() if df_macro is not None else None
+                # La vela actual para inferencia
+                features, candle_ts = feature_store.latest(pair, timeframe, ohlcv, ohlcv_macro)
+                if features is None or not np.isfinite(features).all():
+                    return None
+                last_candle_features = features.reshape(1, -1)
+                trend_macro = features[self.FEATURES.index('trend_macro')]
+                pooled = config.ai_pooled
+                key = self.POOLED_KEY if pooled else pair
+                feature_set = self.feature_set(pooled)
+
+                if train:
+                    # Tantas velas de entrenamiento como la ventana recibida
+                    limit = len(ohlcv)
+                    pairs = ()
+                    if pooled:
+                        # Filas ya guardadas de la pairlist (el scheduler las mantiene al día).
+                        # Solo se suman los pares con filas: un par sin filas no se promete
+                        # en trained.pairs y el modelo se reentrena cuando las tenga
+                        previous = model_registry.latest(key, timeframe, feature_set)
+                        rows = {
+                            p: feature_store.rows(p, timeframe, limit)
+                            for p in self.pooled_pairs(previous, [*config.pairlist, pair])
+                        }
+                        pairs = self.pooled_pairs(previous, [p for p, r in rows.items() if r is not None and len(r) >= 2])
+                        X, y, candle_ts, timestamps = self.pooled_arrays(rows, pairs)
+                    else:
+                        X, y, candle_ts, timestamps = self.training_arrays(feature_store.rows(pair, timeframe, limit))
+                    if len(X) < 100: return None
+
+                    def fit():
+                        # Fold de las velas nuevas con el modelo anterior, antes de reemplazarlo
+                        previous = model_registry.latest(key, timeframe, feature_set)
+                        model_evaluator.score(key, timeframe, feature_set, previous, X, y, timestamps)
+                        bootstrap = model_evaluator.last_timestamp(key, timeframe, feature_set) is None
+                        dataset = model_registry.dataset_for(key, timeframe, feature_set, pairs)
+                        model, folds, _ = self.train(X, y, timestamps, evaluate=bootstrap, dataset=dataset)
+                        if folds is not None:
+                            model_evaluator.record(key, timeframe, feature_set, *folds)
+                        evaluation = model_evaluator.metrics(key, timeframe, feature_set)
+                        return model, evaluation['accuracy'] if evaluation else 0.0, len(X)
+
+                    trained = model_registry.get_or_train(key, timeframe, feature_set, candle_ts, fit, pairs)
+                else:
+                    # Sin entrenar en la petición: último modelo publicado (training_scheduler)
+                    trained = model_registry.latest(key, timeframe, feature_set)
+                    if trained is None:
+                        return None
+                self.model = trained.model
+                if pooled:
+                    last_candle_features = self.pooled_features(
+                        features, [ohlcv[-1][4]], [self.pair_id(trained.pairs, pair)]
+                    )
+                # Métricas walk-forward ya calculadas (sin costo en la petición)
+                evaluation = model_evaluator.metrics(key, timeframe, feature_set)
+                quality_score = evaluation['accuracy'] if evaluation else trained.score
+                model_info = {
+                    "model_age": round(time.time() - trained.trained_at),
+                    # True si el modelo es de una vela cerrada anterior (reentrenamiento pendiente)
+                    "model_stale": bool(trained.candle_ts < candle_ts),
+                    "evaluation": evaluation,
+                }
+            else:
+                # Feature Engineering con Macro
+                full_data = self.prepare_data(df, df_macro, indicators)
+                X, y, _ = self.training_set(df, full_data, timeframe)
+                last_candle_features = full_data[X.columns].iloc[-1:]
+                trend_macro = last_candle_features['trend_macro'].iloc[0]
+                last_candle_features = last_candle_features.to_numpy()
+                if len(X) < 100: return None
+                from app.services.model_evaluation import evaluation_metrics
+                X = X.to_numpy()
+                self.model, (_, proba, target), _ = self.train(X, y, timestamps=np.arange(len(X)))
+                quality_score = evaluation_metrics(proba, target)['accuracy']
             
             # Predecir
             proba_up = self.model.predict_proba(last_candle_features)[0][1]
             
-            # Lógica de Decisión V2
-            direction = "NEUTRAL"
-            confidence = 0.0
-            
-            if proba_up > 0.55: 
-                direction = "ALCISTA"
-                confidence = proba_up * 100
-            elif proba_up < 0.45: 
-                direction = "BAJISTA"
-                confidence = (1 - proba_up) * 100
-            else:
-                confidence = (1 - abs(proba_up - 0.5) * 2) * 100 
-                # Si estamos neutral pero la tendencia macro es clara, usamos sesgo macro
-                if confidence < 20: # Muy baja confianza
-                   current_macro_trend = last_candle_features['trend_macro'].iloc[0]
-                   if current_macro_trend == 1: direction = "ALCISTA (Macro)"
-                   elif current_macro_trend == -1: direction = "BAJISTA (Macro)"
+            direction, confidence = self.decision(proba_up, trend_macro)
 
             return {
                 "direction": direction,
                 "probability": round(confidence, 1), 
-                "model_accuracy": round(quality_score * 100, 1) 
+                "model_accuracy": round(quality_score * 100, 1),
+                **model_info,
             }
             
         except Exception as e:
@@ -175,3 +461,162 @@ class AIPredictor:
             traceback.print_exc()
             return None
 
+
+def _ratio(a, b):
+    """a / b con NaN si b es 0 (prepare_data descarta esas filas igual que las inf)"""
+    return a / b if b != 0 else NAN
+
+
+class FeatureStream:
+    """
+    Features de prepare_data vela a vela con indicadores incrementales
+    (app.core.streaming): mismos valores que prepare_data sobre las mismas
+    velas, pero cada vela cerrada nueva cuesta O(1). El estado se persiste
+    en app.services.feature_store con state() / restore().
+
+    Las features MACRO salen de un segundo conjunto de indicadores sobre las
+    velas 4H: cada vela hereda la vela 4H que la contiene (como merge_asof
+    'backward'); si esa vela 4H sigue abierta se evalúa con peek.
+    """
+
+    def __init__(self):
+        self.indicators = StreamingIndicatorSet()
+        self._rsi = self.indicators.add('rsi', length=14)
+        self._macd = self.indicators.add('macd', fast=12, slow=26, signal=9)
+        self._adx = self.indicators.add('adx', length=14)
+        self._atr = self.indicators.add('atr', length=14)
+        self._bb = self.indicators.add('bbands', length=20, std=2.0)
+        self._sma50 = self.indicators.add('sma', length=50)
+        self._vol_sma = self.indicators.add('sma', 'volume', length=20)
+        # Fila de la última vela cerrada (lags y pendiente del ADX)
+        self.last_row = None
+
+        self.macro = StreamingIndicatorSet()
+        self._rsi_macro = self.macro.add('rsi', length=14)
+        self._sma200_macro = self.macro.add('sma', length=200)
+        # (rsi_macro, trend_macro) de la última vela 4H cerrada
+        self.macro_last = None
+        # Velas 4H recibidas en la llamada actual (no se persisten)
+        self._macro_candles = []
+        self._macro_ts = []
+        self._macro_closed = []
+
+    @property
+    def last_timestamp(self):
+        return self.indicators.last_timestamp
+
+    def set_macro(self, ohlcv_macro, timeframe, now=None):
+        """
+        Velas MACRO para las próximas filas
+
+        Returns:
+            False si no empalman con la última vela 4H procesada (hay que reconstruir)
+        """
+        ohlcv_macro = ohlcv_macro or []
+        last = self.macro.last_timestamp
+        if ohlcv_macro and last is not None and ohlcv_macro[0][0] > last + timeframe_to_msecs(timeframe):
+            return False
+        self._macro_candles = ohlcv_macro
+        self._macro_ts = [row[0] for row in ohlcv_macro]
+        self._macro_closed = [is_candle_closed(row[0], timeframe, now) for row in ohlcv_macro]
+        return True
+
+    def update(self, candle):
+        """Agrega una vela CERRADA y devuelve su fila (AIPredictor.STORE_COLUMNS)"""
+        row = self._row(candle, self.indicators.update(candle))
+        self.last_row = row
+        return [row[col] for col in AIPredictor.STORE_COLUMNS]
+
+    def peek(self, candle):
+        """Fila de la vela en curso, sin avanzar el estado"""
+        row = self._row(candle, self.indicators.peek(candle))
+        return [row[col] for col in AIPredictor.STORE_COLUMNS]
+
+    def _row(self, candle, values):
+        close, volume = float(candle[4]), float(candle[5])
+        previous = self.last_row or {}
+        macd = values[self._macd]
+        adx = values[self._adx]['adx']
+        bb = values[self._bb]
+        sma50 = values[self._sma50]
+        row = {
+            'timestamp': float(candle[0]),
+            'close': close,
+            'atr': values[self._atr],
+            'rsi': values[self._rsi],
+            'macd': macd['macd'],
+            'macdhist': macd['hist'],
+            'adx': adx,
+            'adx_slope': adx - previous.get('adx', NAN),
+            'bb_width': _ratio(bb['upper'] - bb['lower'], bb['mid']),
+            'dist_sma50': _ratio(close - sma50, sma50),
+            'volume_rel': _ratio(volume, values[self._vol_sma]),
+        }
+        row['rsi_macro'], row['trend_macro'] = self._macro_row(candle[0])
+        # Lags: la fila de la vela cerrada anterior
+        for col in ['rsi', 'macdhist', 'volume_rel']:
+            row[f'{col}_lag1'] = previous.get(col, NAN)
+        return row
+
+    def _macro_row(self, timestamp):
+        """(rsi_macro, trend_macro) de la vela 4H que contiene `timestamp`"""
+        index = bisect_right(self._macro_ts, timestamp) - 1
+        if index < 0:
+            # Sin vela 4H: último estado conocido o el relleno de prepare_data
+            return self.macro_last or (50.0, 0.0)
+
+        # Las velas 4H cerradas hasta la que contiene `timestamp` avanzan el estado
+        last = self.macro.last_timestamp
+        start = 0 if last is None else bisect_right(self._macro_ts, last)
+        for i in range(start, index + 1):
+            if not self._macro_closed[i]:
+                break
+            self.macro_last = self._macro_values(self._macro_candles[i], self.macro.update(self._macro_candles[i]))
+
+        candle = self._macro_candles[index]
+        if self.macro_last is not None and candle[0] <= self.macro.last_timestamp:
+            return self.macro_last
+        return self._macro_values(candle, self.macro.peek(candle))
+
+    def _macro_values(self, candle, values):
+        rsi = values[self._rsi_macro]
+        # Tendencia Macro: Precio vs SMA200 (1=Alcista, -1=Bajista)
+        trend = 1.0 if candle[4] > values[self._sma200_macro] else -1.0
+        return (50.0 if math.isnan(rsi) else rsi), trend
+
+    def state(self):
+        """Checkpoint del estado (serializable con pickle)"""
+        return {
+            'indicators': self.indicators.state(),
+            'last_row': self.last_row,
+            'macro': self.macro.state(),
+            'macro_last': self.macro_last,
+        }
+
+    def restore(self, state):
+        self.indicators.restore(state['indicators'])
+        self.last_row = state['last_row']
+        self.macro.restore(state['macro'])
+        self.macro_last = state['macro_last']
+
+
+def train_job(X, y, candle_ts, timestamps, evaluate=False, dataset=None):
+    """
+    Entrena el modelo de un par o el conjunto (en un proceso de app.services.training_scheduler)
+
+    Args:
+        X: Features de entrenamiento Micro + Macro (AIPredictor.training_arrays)
+        y: Target de cada fila
+        candle_ts: Última vela cerrada de los datos (ms)
+        timestamps: Vela de cada fila
+        evaluate: Si el modelo todavía no tiene historial de evaluación (se
+            evalúan los folds walk-forward)
+        dataset: Filas pre-binneadas y estimador anterior (model_registry.dataset_for)
+
+    Returns:
+        (modelo compilado, folds fuera de muestra o None, filas de entrenamiento,
+        última vela cerrada, segundos, 'full' o 'warm')
+    """
+    began = time.perf_counter()
+    model, folds, refit = AIPredictor().train(X, y, timestamps, evaluate, dataset)
+    return model, folds, len(X), candle_ts, round(time.perf_counter() - began, 3), refit
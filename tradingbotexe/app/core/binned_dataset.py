@@ -0,0 +1,183 @@
+"""
+Dataset pre-binneado para reentrenar HistGradientBoosting
+Los bordes de cada feature se congelan en el entrenamiento completo y cada
+fila se codifica una sola vez a uint8 y se agrega al final de un archivo
+(append-only): al cerrar una vela solo se codifican las filas nuevas.
+
+Con los bordes fijos el modelo anterior puede continuar (warm_start) con
+unas pocas iteraciones extra sobre la ventana actual en lugar de entrenarse
+desde cero: de ahí sale la mejora. Cada `refit_every` velas (o si no hay
+estado, cambian los pares o la ventana no empalma con las filas guardadas)
+se rehace todo: bordes nuevos, códigos nuevos y un modelo nuevo.
+
+scikit-learn igual vuelve a binnear los códigos en cada fit (sin API para
+pasarle bins ya calculados); con códigos de 0 a 255 cada uno queda en su
+propio bin y el resultado es el mismo. benchmark_training.py mide plano vs
+completo vs warm y el costo del rebinneo.
+
+El modelo se entrena sobre los códigos y sus umbrales se traducen a valores
+de las features al compilarlo (CompiledTrees.from_sklearn con bin_edges):
+la inferencia no cambia y no necesita los bordes.
+"""
+import logging
+import pickle
+from collections.abc import Callable
+from pathlib import Path
+
+import numpy as np
+
+from app.core.tree_model import CompiledTrees, unsupported_sklearn
+
+logger = logging.getLogger(__name__)
+
+# Bins por feature (el de los valores faltantes lo agrega scikit-learn)
+MAX_BINS = 255
+
+
+def bin_edges(X: np.ndarray) -> list[np.ndarray]:
+    """
+    Bordes de los bins de cada columna, los mismos que usa HistGradientBoosting
+
+    Raises:
+        RuntimeError: Si la versión de scikit-learn no tiene el _BinMapper esperado
+    """
+    try:
+        from sklearn.ensemble._hist_gradient_boosting.binning import _BinMapper
+        mapper = _BinMapper(n_bins=MAX_BINS + 1, random_state=42)
+    except (ImportError, TypeError) as e:
+        raise unsupported_sklearn(f"_BinMapper: {e}") from e
+    edges = getattr(mapper.fit(X), 'bin_thresholds_', None)
+    if edges is None:
+        raise unsupported_sklearn("_BinMapper no tiene bin_thresholds_")
+    return list(edges)
+
+
+def encode(X: np.ndarray, edges: list[np.ndarray]) -> np.ndarray:
+    """Código uint8 de cada valor (bin i: edges[i-1] < x <= edges[i], igual que _BinMapper.transform)"""
+    codes = np.empty(X.shape, dtype=np.uint8)
+    for col, col_edges in enumerate(edges):
+        codes[:, col] = np.searchsorted(col_edges, X[:, col], side='left')
+    return codes
+
+
+class BinnedDataset:
+    """
+    Filas pre-binneadas y estimador de scikit-learn de un modelo (par o conjunto)
+
+    Vive en el proceso que entrena: se crea con la ruta y la configuración
+    (model_registry.dataset_for) y se envía al worker, que lee y escribe los
+    archivos.
+
+    Uso:
+        model, refit = dataset.fit(X, y, timestamps, AIPredictor.new_model)
+    """
+
+    def __init__(self, path: str | Path, refit_every: int = 20, warm_iterations: int = 10, signature: tuple = ()):
+        self.path = Path(path)
+        self.refit_every = refit_every
+        self.warm_iterations = warm_iterations
+        # Cambia si cambia el significado de las columnas (ej: pares del modelo conjunto)
+        self.signature = tuple(signature)
+
+    def _record_dtype(self, n_features: int) -> np.dtype:
+        return np.dtype([('timestamp', '<i8'), ('codes', 'u1', (n_features,))])
+
+    def _load(self) -> dict | None:
+        """Checkpoint (bordes, estimador, velas desde el entrenamiento completo) o None"""
+        try:
+            with open(self.path.with_suffix('.state'), 'rb') as f:
+                state = pickle.load(f)
+            records = np.fromfile(self.path, dtype=self._record_dtype(len(state['edges'])))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"No se pudo cargar el dataset {self.path.name}: {e}")
+            return None
+        if state['rows'] != len(records) or state['signature'] != self.signature:
+            return None
+        state['records'] = records
+        return state
+
+    def _save(self, state: dict, records: np.ndarray, append: bool) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if append:
+                with open(self.path, 'ab') as f:
+                    records.tofile(f)
+            else:
+                tmp = self.path.with_suffix('.tmp')
+                records.tofile(tmp)
+                tmp.replace(self.path)
+            tmp = self.path.with_suffix('.state.tmp')
+            with open(tmp, 'wb') as f:
+                pickle.dump({key: value for key, value in state.items() if key != 'records'}, f)
+            tmp.replace(self.path.with_suffix('.state'))
+        except OSError as e:
+            # Sin checkpoint válido el próximo entrenamiento es completo
+            logger.warning(f"No se pudo guardar el dataset {self.path.name}: {e}")
+
+    def _window_codes(self, state: dict, X: np.ndarray, timestamps: np.ndarray) -> tuple[np.ndarray, np.ndarray] | None:
+        """
+        Códigos de la ventana actual: las filas ya guardadas se reutilizan y
+        solo se codifican las posteriores a la última guardada
+
+        Returns:
+            (códigos de X, registros nuevos) o None si la ventana no empalma
+        """
+        records = state['records']
+        last = records['timestamp'][-1] if len(records) else -1
+        new = timestamps > last
+        old_ts = timestamps[~new]
+        stored = records[records['timestamp'] >= old_ts[0]] if len(old_ts) else records[:0]
+        if new[:len(old_ts)].any() or not np.array_equal(stored['timestamp'], old_ts):
+            return None
+        appended = np.empty(int(new.sum()), dtype=records.dtype)
+        appended['timestamp'] = timestamps[new]
+        appended['codes'] = encode(X[new], state['edges'])
+        return np.concatenate([stored['codes'], appended['codes']]), appended
+
+    def fit(self, X, y, timestamps, new_model: Callable) -> tuple[CompiledTrees, str]:
+        """
+        Entrena con la ventana X (warm start si se puede)
+
+        Args:
+            X: Features de entrenamiento, ordenadas por vela
+            y: Target de cada fila
+            timestamps: Vela de cada fila
+            new_model: Devuelve un HistGradientBoostingClassifier sin entrenar
+
+        Returns:
+            (modelo compilado, 'warm' o 'full')
+        """
+        X = np.asarray(X, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        state = self._load() if self.refit_every > 1 else None
+        if state is not None and len(state['edges']) == X.shape[1] and len(X):
+            # Velas cerradas desde el último entrenamiento completo
+            candles = len(np.unique(timestamps[timestamps > state['refit_ts']]))
+            window = self._window_codes(state, X, timestamps) if candles < self.refit_every else None
+            if window is not None:
+                codes, appended = window
+                model = state['estimator']
+                model.set_params(warm_start=True, max_iter=model.n_iter_ + self.warm_iterations)
+                model.fit(codes, y)
+                state['estimator'] = model
+                state['rows'] += len(appended)
+                self._save(state, appended, append=True)
+                return CompiledTrees.from_sklearn(model, state['edges']), 'warm'
+
+        edges = bin_edges(X)
+        codes = encode(X, edges)
+        model = new_model().fit(codes, y)
+        records = np.empty(len(X), dtype=self._record_dtype(X.shape[1]))
+        records['timestamp'] = timestamps
+        records['codes'] = codes
+        state = {
+            'rows': len(records),
+            'edges': edges,
+            'estimator': model,
+            'refit_ts': int(timestamps[-1]) if len(timestamps) else 0,
+            'signature': self.signature,
+        }
+        self._save(state, records, append=False)
+        return CompiledTrees.from_sklearn(model, edges), 'full'
@@ -0,0 +1,283 @@
+"""
+Optimización de parámetros de estrategias (hyperopt)
+Búsqueda aleatoria sobre los parámetros declarados con IntParameter /
+DecimalParameter (app.strategies.parameters). Cada candidato se evalúa con
+el backtesting vectorizado sobre todos los pares, en un pool de procesos:
+
+- Cada proceso abre las velas con memmap (como backtest_runner) y guarda un
+  IndicatorEngine por par entre candidatos: un indicador se calcula una vez
+  por valor de parámetro (ej. un Donchian de 25 velas), y un candidato que
+  solo cambia umbrales (RSI 35 -> 30) no recalcula ningún indicador
+- Los resultados se guardan en un JSON por estrategia, con clave
+  (parámetros, pares y sus velas, periodo, comisión): repetir la misma
+  búsqueda no vuelve a ejecutar ningún backtest
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+
+from app.core.backtest_runner import open_candles
+from app.core.backtesting import COLUMNS, DEFAULT_FEE, Backtester, summarize
+from app.core.indicators import IndicatorEngine
+from app.strategies import get_strategy
+
+if TYPE_CHECKING:
+    from app.services.candle_store import CandleStore
+
+logger = logging.getLogger(__name__)
+
+# Intentos de muestreo por época antes de dar por agotado el espacio
+MAX_SAMPLE_ATTEMPTS = 50
+
+
+def profit_loss(trades: list[dict]) -> float:
+    """Pérdida = -suma de profit_ratio"""
+    return -float(sum(t['profit_ratio'] for t in trades))
+
+
+def sharpe_loss(trades: list[dict]) -> float:
+    """Pérdida = -Sharpe de los trades (media / desviación * sqrt(n))"""
+    if len(trades) < 2:
+        return 0.0
+    ratios = np.array([t['profit_ratio'] for t in trades])
+    std = ratios.std(ddof=1)
+    if std == 0:
+        return 0.0
+    return -float(ratios.mean() / std * math.sqrt(len(ratios)))
+
+
+LOSS_FUNCTIONS = {
+    'sharpe': sharpe_loss,
+    'profit': profit_loss,
+}
+
+# Estado de cada proceso: (velas, motor de indicadores) por archivo, reutilizado entre candidatos
+_ENGINES: dict[tuple, tuple[np.ndarray, IndicatorEngine]] = {}
+
+
+def _pair_engine(path: str, first_ts: int, last_ts: int, end: int | None) -> tuple[np.ndarray, IndicatorEngine]:
+    key = (path, first_ts, last_ts, end)
+    if key not in _ENGINES:
+        candles = open_candles(path, first_ts, last_ts)
+        if end is not None:
+            candles = candles[:np.searchsorted(candles[:, 0], end)]
+        _ENGINES[key] = (candles, IndicatorEngine(pd.DataFrame(candles, columns=COLUMNS), kernels=True))
+    return _ENGINES[key]
+
+
+def evaluate(candidate: dict[str, Any], settings: dict) -> dict:
+    """
+    Backtesting de un candidato sobre todos los pares (en el proceso del pool)
+
+    Args:
+        candidate: Valores de los parámetros
+        settings: strategy_id, timeframe, files [(par, ruta, primera vela, última vela)], start, end,
+            stake_amount, fee, starting_balance
+
+    Returns:
+        Resumen del backtesting y la pérdida de cada función de LOSS_FUNCTIONS
+    """
+    began = time.perf_counter()
+    backtester = Backtester(
+        get_strategy(settings['strategy_id']), None, '', timeframe=settings['timeframe'],
+        stake_amount=settings['stake_amount'], fee=settings['fee'], params=candidate,
+    )
+    trades = []
+    for pair, path, first_ts, last_ts in settings['files']:
+        candles, engine = _pair_engine(path, first_ts, last_ts, settings['end'])
+        trades.extend(backtester.backtest_pair(pair, candles, settings['start'], indicators=engine))
+
+    return {
+        "params": candidate,
+        "summary": summarize(trades, settings['starting_balance']),
+        "losses": {name: round(func(trades), 6) for name, func in LOSS_FUNCTIONS.items()},
+        "elapsed": round(time.perf_counter() - began, 4),
+    }
+
+
+class Hyperopt:
+    """
+    Búsqueda aleatoria de parámetros de una estrategia
+
+    Uso:
+        hyperopt = Hyperopt('trend', CandleStore(config.datadir), 'binance', config.pairlist,
+                            results_dir=config.hyperopt_results_dir)
+        result = hyperopt.run(epochs=200)
+        result['best']['params']
+    """
+
+    def __init__(
+        self,
+        strategy_id: str,
+        store: 'CandleStore',
+        exchange: str,
+        pairs: list[str],
+        timeframe: str | None = None,
+        start: int | None = None,
+        end: int | None = None,
+        loss: str = 'sharpe',
+        spaces: tuple[str, ...] = ('buy', 'sell'),
+        min_trades: int = 10,
+        workers: int | None = None,
+        stake_amount: float = 100.0,
+        fee: float = DEFAULT_FEE,
+        starting_balance: float | None = None,
+        results_dir: str | Path | None = None,
+    ):
+        if loss not in LOSS_FUNCTIONS:
+            raise ValueError(f"Función de pérdida desconocida: {loss} (disponibles: {', '.join(LOSS_FUNCTIONS)})")
+        self.strategy_id = strategy_id
+        self.strategy_cls = get_strategy(strategy_id)
+        self.store = store
+        self.exchange = exchange
+        self.pairs = pairs
+        self.timeframe = timeframe or self.strategy_cls.timeframe
+        self.start = start
+        self.end = end
+        self.loss = loss
+        self.spaces = spaces
+        # Candidatos con menos trades se descartan (resultados poco significativos)
+        self.min_trades = min_trades
+        self.workers = workers or os.cpu_count() or 1
+        self.stake_amount = stake_amount
+        self.fee = fee
+        self.starting_balance = starting_balance if starting_balance is not None else stake_amount
+        self.results_path = Path(results_dir) / f"{strategy_id}.json" if results_dir else None
+
+    def search_space(self) -> dict:
+        """Parámetros que se optimizan (en los espacios elegidos y con optimize=True)"""
+        return {
+            name: parameter for name, parameter in self.strategy_cls.parameters().items()
+            if parameter.optimize and parameter.space in self.spaces
+        }
+
+    def candidates(self, epochs: int, seed: int) -> list[dict[str, Any]]:
+        """
+        Candidatos a evaluar: primero los valores por defecto y luego combinaciones
+        aleatorias distintas (misma semilla = mismos candidatos)
+        """
+        defaults = {name: p.default for name, p in self.strategy_cls.parameters().items()}
+        space = self.search_space()
+        rng = random.Random(seed)
+        result, seen = [defaults], {json.dumps(defaults, sort_keys=True)}
+        attempts = 0
+        while len(result) < epochs and space and attempts < epochs * MAX_SAMPLE_ATTEMPTS:
+            attempts += 1
+            candidate = defaults | {name: p.sample(rng) for name, p in space.items()}
+            key = json.dumps(candidate, sort_keys=True)
+            if key not in seen:
+                seen.add(key)
+                result.append(candidate)
+        return result
+
+    def _files(self) -> list[tuple[str, str, int, int]]:
+        files = []
+        for pair in self.pairs:
+            first_ts = self.store.first_timestamp(self.exchange, pair, self.timeframe)
+            last_ts = self.store.last_timestamp(self.exchange, pair, self.timeframe)
+            if first_ts is not None and last_ts is not None:
+                files.append((pair, str(self.store.path_for(self.exchange, pair, self.timeframe)), first_ts, last_ts))
+        return files
+
+    def _cache_key(self, candidate: dict[str, Any], fingerprint: list) -> str:
+        payload = {
+            "strategy": self.strategy_cls.__name__,
+            "params": candidate,
+            "timeframe": self.timeframe,
+            "start": self.start,
+            "end": self.end,
+            "fee": self.fee,
+            "stake_amount": self.stake_amount,
+            "starting_balance": self.starting_balance,
+            "data": fingerprint,
+        }
+        return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    def _load_results(self) -> dict[str, dict]:
+        if self.results_path is None or not self.results_path.exists():
+            return {}
+        try:
+            return json.loads(self.results_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo leer {self.results_path}: {e}")
+            return {}
+
+    def _save_results(self, results: dict[str, dict]) -> None:
+        if self.results_path is None:
+            return
+        self.results_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.results_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(results), encoding='utf-8')
+        os.replace(tmp, self.results_path)
+
+    def _score(self, result: dict) -> float:
+        if result['summary']['trades'] < self.min_trades:
+            return math.inf
+        return result['losses'][self.loss]
+
+    def run(self, epochs: int = 100, seed: int = 0) -> dict:
+        """
+        Evalúa los candidatos (los ya guardados se leen del JSON) y ordena por pérdida
+
+        Args:
+            epochs: Candidatos a evaluar (incluido el de valores por defecto)
+            seed: Semilla del muestreo
+
+        Returns:
+            Mejor candidato, todos los resultados ordenados y estadísticas de la ejecución
+        """
+        files = self._files()
+        if not files:
+            raise ValueError(f"No hay velas {self.timeframe} en el almacén para los pares indicados")
+
+        # El rango de velas de cada par identifica los datos: si el backfill agrega velas, la clave cambia
+        fingerprint = [[pair, first_ts, last_ts] for pair, _, first_ts, last_ts in files]
+        stored = self._load_results()
+        began = time.perf_counter()
+
+        candidates = self.candidates(epochs, seed)
+        keys = [self._cache_key(candidate, fingerprint) for candidate in candidates]
+        pending = [(key, candidate) for key, candidate in zip(keys, candidates) if key not in stored]
+        settings = {
+            'strategy_id': self.strategy_id, 'timeframe': self.timeframe, 'files': files,
+            'start': self.start, 'end': self.end, 'stake_amount': self.stake_amount,
+            'fee': self.fee, 'starting_balance': self.starting_balance,
+        }
+
+        if pending:
+            logger.info(f"Hyperopt {self.strategy_id}: {len(pending)} candidatos nuevos, {len(candidates) - len(pending)} en caché")
+        if self.workers <= 1 or len(pending) <= 1:
+            for key, candidate in pending:
+                stored[key] = evaluate(candidate, settings)
+        else:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(pending))) as pool:
+                futures = {pool.submit(evaluate, candidate, settings): key for key, candidate in pending}
+                for done, future in enumerate(as_completed(futures), start=1):
+                    stored[futures[future]] = future.result()
+                    if done % 10 == 0 or done == len(pending):
+                        logger.info(f"  {done}/{len(pending)} candidatos evaluados")
+        if pending:
+            self._save_results(stored)
+
+        results = sorted((stored[key] for key in keys), key=self._score)
+        best = results[0] if results and math.isfinite(self._score(results[0])) else None
+        return {
+            "strategy": self.strategy_id,
+            "timeframe": self.timeframe,
+            "loss": self.loss,
+            "best": best,
+            "results": results,
+            "evaluated": len(pending),
+            "cached": len(candidates) - len(pending),
+            "elapsed": round(time.perf_counter() - began, 3),
+        }
@@ -0,0 +1,284 @@
+"""
+Motor de indicadores compartido
+Cada indicador se identifica por (nombre, columna fuente, parámetros) y se
+calcula una sola vez por set de velas; estrategias y predictor IA leen del
+mismo motor. Las variantes con fórmula distinta (RSI Wilder vs RSI con
+media simple, Bollinger con desviación poblacional vs muestral, MACD de
+pandas_ta vs EWM manual) son indicadores distintos: compartirlos cambiaría
+las señales.
+
+Con `kernels=True` los indicadores de pandas_ta que tienen versión en
+app.core.kernels (rsi, atr, adx, bbands, macd, sma) se calculan sobre
+arrays, con los mismos valores y columnas.
+"""
+from collections.abc import Callable, Iterable
+from typing import Any, NamedTuple
+
+import numpy as np
+import pandas as pd
+import pandas_ta as pta
+
+from app.core import kernels
+
+Indicator = pd.Series | pd.DataFrame
+
+# nombre -> función(engine, source, **params)
+INDICATORS: dict[str, Callable[..., Indicator]] = {}
+# Versiones sobre arrays (app.core.kernels) de algunos indicadores de INDICATORS
+KERNEL_INDICATORS: dict[str, Callable[..., Indicator]] = {}
+
+
+def indicator(name: str, kernel: bool = False) -> Callable:
+    """Registra una función de indicador en INDICATORS (o en KERNEL_INDICATORS)"""
+    def decorator(func: Callable[..., Indicator]) -> Callable[..., Indicator]:
+        (KERNEL_INDICATORS if kernel else INDICATORS)[name] = func
+        return func
+    return decorator
+
+
+def indicator_key(name: str, source: str, params: dict[str, Any]) -> tuple:
+    """Clave única de un indicador: (nombre, fuente, parámetros ordenados)"""
+    return (name, source, tuple(sorted(params.items())))
+
+
+class IndicatorSpec(NamedTuple):
+    """Indicador declarado por un consumidor (ver BaseStrategy.required_indicators)"""
+    name: str
+    source: str = 'close'
+    params: tuple = ()
+
+
+def requires(name: str, source: str = 'close', **params: Any) -> IndicatorSpec:
+    """Declara un indicador con los mismos argumentos que IndicatorEngine.get"""
+    return IndicatorSpec(name, source, tuple(sorted(params.items())))
+
+
+class IndicatorEngine:
+    """
+    Caché de indicadores sobre un DataFrame OHLCV
+
+    Los resultados se comparten entre consumidores: no deben modificarse
+    in-place (asignarlos a una columna del dataframe propio es seguro).
+    """
+
+    def __init__(self, dataframe: pd.DataFrame, kernels: bool = False):
+        self.dataframe = dataframe
+        # Usar app.core.kernels por defecto en get()
+        self.kernels = kernels
+        self._cache: dict[tuple, Indicator] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def covers(self, dataframe: pd.DataFrame) -> bool:
+        """True si `dataframe` tiene las mismas velas que el del motor"""
+        if dataframe is self.dataframe:
+            return True
+        return (
+            len(dataframe) == len(self.dataframe)
+            and dataframe.index.equals(self.dataframe.index)
+            and np.array_equal(dataframe['close'].to_numpy(), self.dataframe['close'].to_numpy())
+        )
+
+    def get(self, name: str, source: str = 'close', kernels: bool | None = None, **params: Any) -> Indicator:
+        """
+        Obtiene un indicador (lo calcula la primera vez)
+
+        Args:
+            name: Nombre registrado en INDICATORS
+            source: Columna de entrada (ignorada por los que usan high/low/close)
+            kernels: Usar la versión de app.core.kernels si existe (None = valor del motor)
+            **params: Parámetros del indicador (length, std...)
+
+        Returns:
+            Serie o DataFrame con el mismo índice que el dataframe del motor
+        """
+        use_kernel = (self.kernels if kernels is None else kernels) and name in KERNEL_INDICATORS
+        key = indicator_key(name, source, params)
+        if use_kernel:
+            key += ('kernel',)
+        if key in self._cache:
+            self.hits += 1
+            return self._cache[key]
+
+        self.misses += 1
+        registry = KERNEL_INDICATORS if use_kernel else INDICATORS
+        result = registry[name](self, source, **params)
+        self._cache[key] = result
+        return result
+
+    def compute(self, specs: Iterable[IndicatorSpec], kernels: bool | None = None) -> None:
+        """Calcula de una vez los indicadores declarados (cada uno una sola vez)"""
+        for spec in specs:
+            self.get(spec.name, spec.source, kernels=kernels, **dict(spec.params))
+
+    def column(self, source: str) -> pd.Series:
+        return self.dataframe[source]
+
+    def array(self, source: str) -> np.ndarray:
+        """Columna como array float64 (entrada de los kernels)"""
+        return self.dataframe[source].to_numpy(dtype=np.float64)
+
+
+# ----------------------------------------------------------------------
+# Medias y extremos
+# ----------------------------------------------------------------------
+
+@indicator('sma')
+def _sma(engine: IndicatorEngine, source: str, length: int) -> pd.Series:
+    return pta.sma(engine.column(source), length=length)
+
+
+@indicator('rolling_mean')
+def _rolling_mean(engine: IndicatorEngine, source: str, length: int) -> pd.Series:
+    return engine.column(source).rolling(window=length).mean()
+
+
+@indicator('rolling_std')
+def _rolling_std(engine: IndicatorEngine, source: str, length: int) -> pd.Series:
+    return engine.column(source).rolling(window=length).std()
+
+
+@indicator('rolling_max')
+def _rolling_max(engine: IndicatorEngine, source: str, length: int) -> pd.Series:
+    return engine.column(source).rolling(window=length).max()
+
+
+@indicator('rolling_min')
+def _rolling_min(engine: IndicatorEngine, source: str, length: int) -> pd.Series:
+    return engine.column(source).rolling(window=length).min()
+
+
+@indicator('ema')
+def _ema(engine: IndicatorEngine, source: str, length: int) -> pd.Series:
+    """EMA recursiva (ewm adjust=False)"""
+    return engine.column(source).ewm(span=length, adjust=False).mean()
+
+
+# ----------------------------------------------------------------------
+# Osciladores
+# ----------------------------------------------------------------------
+
+@indicator('rsi')
+def _rsi(engine: IndicatorEngine, source: str, length: int) -> pd.Series:
+    """RSI de Wilder (pandas_ta)"""
+    return pta.rsi(engine.column(source), length=length)
+
+
+@indicator('rsi_sma')
+def _rsi_sma(engine: IndicatorEngine, source: str, length: int) -> pd.Series:
+    """RSI con medias simples de ganancias/pérdidas (Cutler)"""
+    delta = engine.column(source).diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=length).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=length).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+@indicator('macd')
+def _macd(engine: IndicatorEngine, source: str, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame | None:
+    """MACD de pandas_ta -> columnas macd, hist, signal (None si no hay velas suficientes)"""
+    macd = pta.macd(engine.column(source), fast=fast, slow=slow, signal=signal)
+    if macd is None:
+        return None
+    macd.columns = ['macd', 'hist', 'signal']
+    return macd
+
+
+@indicator('macd_ewm')
+def _macd_ewm(engine: IndicatorEngine, source: str, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
+    """MACD sobre EMAs recursivas -> columnas macd, signal, hist"""
+    macd = engine.get('ema', source, length=fast) - engine.get('ema', source, length=slow)
+    macd_signal = macd.ewm(span=signal, adjust=False).mean()
+    return pd.DataFrame({'macd': macd, 'signal': macd_signal, 'hist': macd - macd_signal})
+
+
+# ----------------------------------------------------------------------
+# Volatilidad y tendencia (usan high/low/close)
+# ----------------------------------------------------------------------
+
+@indicator('atr')
+def _atr(engine: IndicatorEngine, source: str, length: int) -> pd.Series:
+    df = engine.dataframe
+    return pta.atr(df['high'], df['low'], df['close'], length=length)
+
+
+@indicator('adx')
+def _adx(engine: IndicatorEngine, source: str, length: int) -> pd.DataFrame | None:
+    """ADX de pandas_ta -> columnas adx, dmp, dmn (None si no hay velas suficientes)"""
+    df = engine.dataframe
+    adx = pta.adx(df['high'], df['low'], df['close'], length=length)
+    if adx is None:
+        return None
+    adx = adx.iloc[:, :3]
+    adx.columns = ['adx', 'dmp', 'dmn']
+    return adx
+
+
+@indicator('bbands')
+def _bbands(engine: IndicatorEngine, source: str, length: int = 20, std: float = 2.0) -> pd.DataFrame | None:
+    """Bollinger de pandas_ta (desviación poblacional) -> lower, mid, upper, bandwidth, percent"""
+    bb = pta.bbands(engine.column(source), length=length, std=std)
+    if bb is None:
+        return None
+    bb.columns = ['lower', 'mid', 'upper', 'bandwidth', 'percent']
+    return bb
+
+
+@indicator('bbands_sample')
+def _bbands_sample(engine: IndicatorEngine, source: str, length: int = 20, std: float = 2.0) -> pd.DataFrame:
+    """Bollinger con desviación muestral (rolling.std) -> lower, mid, upper"""
+    mid = engine.get('rolling_mean', source, length=length)
+    dev = engine.get('rolling_std', source, length=length)
+    return pd.DataFrame({'lower': mid - (dev * std), 'mid': mid, 'upper': mid + (dev * std)})
+
+
+# ----------------------------------------------------------------------
+# Versiones sobre arrays (mismos valores y columnas que pandas_ta)
+# pandas_ta devuelve None si hay menos velas que el periodo
+# ----------------------------------------------------------------------
+
+@indicator('sma', kernel=True)
+def _sma_kernel(engine: IndicatorEngine, source: str, length: int) -> pd.Series | None:
+    if len(engine.dataframe) < length:
+        return None
+    return pd.Series(kernels.sma(engine.array(source), length), index=engine.dataframe.index)
+
+
+@indicator('rsi', kernel=True)
+def _rsi_kernel(engine: IndicatorEngine, source: str, length: int) -> pd.Series | None:
+    if len(engine.dataframe) < length:
+        return None
+    return pd.Series(kernels.rsi(engine.array(source), length), index=engine.dataframe.index)
+
+
+@indicator('macd', kernel=True)
+def _macd_kernel(engine: IndicatorEngine, source: str, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame | None:
+    if len(engine.dataframe) < max(fast, slow, signal):
+        return None
+    macd, hist, macd_signal = kernels.macd(engine.array(source), fast, slow, signal)
+    return pd.DataFrame({'macd': macd, 'hist': hist, 'signal': macd_signal}, index=engine.dataframe.index)
+
+
+@indicator('atr', kernel=True)
+def _atr_kernel(engine: IndicatorEngine, source: str, length: int) -> pd.Series | None:
+    if len(engine.dataframe) < length:
+        return None
+    atr = kernels.atr(engine.array('high'), engine.array('low'), engine.array('close'), length)
+    return pd.Series(atr, index=engine.dataframe.index)
+
+
+@indicator('adx', kernel=True)
+def _adx_kernel(engine: IndicatorEngine, source: str, length: int) -> pd.DataFrame | None:
+    if len(engine.dataframe) < length:
+        return None
+    adx, dmp, dmn = kernels.adx(engine.array('high'), engine.array('low'), engine.array('close'), length)
+    return pd.DataFrame({'adx': adx, 'dmp': dmp, 'dmn': dmn}, index=engine.dataframe.index)
+
+
+@indicator('bbands', kernel=True)
+def _bbands_kernel(engine: IndicatorEngine, source: str, length: int = 20, std: float = 2.0) -> pd.DataFrame | None:
+    if len(engine.dataframe) < length:
+        return None
+    columns = ['lower', 'mid', 'upper', 'bandwidth', 'percent']
+    bands = kernels.bbands(engine.array(source), length, std)
+    return pd.DataFrame(dict(zip(columns, bands)), index=engine.dataframe.index)
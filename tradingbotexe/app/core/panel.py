@@ -0,0 +1,359 @@
+"""
+Indicadores de varios pares a la vez
+CandlePanel alinea las velas de muchos pares por timestamp en arrays
+(pares x tiempo) y PanelEngine calcula los indicadores de app.core.indicators
+para todos los pares en una sola pasada (pandas recorre las columnas en C).
+Los pares sin vela en un timestamp (listados después, huecos) quedan en NaN.
+
+Con TA-Lib instalado los indicadores de pandas_ta se calculan fila a fila
+con app.core.kernels para dar los mismos valores que el análisis por par.
+"""
+from collections.abc import Callable, Iterable
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from app.core import kernels
+from app.core.indicators import IndicatorSpec, indicator_key
+
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+PanelIndicator = np.ndarray | dict[str, np.ndarray]
+
+# nombre -> función(engine, source, **params); mismos nombres que INDICATORS
+PANEL_INDICATORS: dict[str, Callable[..., PanelIndicator]] = {}
+
+
+def panel_indicator(name: str) -> Callable:
+    """Registra una función de indicador en PANEL_INDICATORS"""
+    def decorator(func: Callable[..., PanelIndicator]) -> Callable[..., PanelIndicator]:
+        PANEL_INDICATORS[name] = func
+        return func
+    return decorator
+
+
+def shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """Equivalente a Series.shift(periods) en el eje del tiempo"""
+    out = np.full_like(values, np.nan)
+    if periods < values.shape[1]:
+        out[:, periods:] = values[:, :values.shape[1] - periods]
+    return out
+
+
+class CandlePanel:
+    """Velas de varios pares alineadas: cada columna OHLCV es un array (pares x tiempo)"""
+
+    def __init__(self, pairs: list[str], timestamps: np.ndarray, data: dict[str, np.ndarray]):
+        self.pairs = pairs
+        self.timestamps = timestamps
+        self.data = data
+
+    @classmethod
+    def from_ohlcv(cls, ohlcv_by_pair: dict[str, list[list]], window: int | None = None) -> 'CandlePanel':
+        """
+        Construye el panel a partir de velas CCXT
+
+        Args:
+            ohlcv_by_pair: {par: [[timestamp, open, high, low, close, volume], ...]}
+            window: Conservar solo los últimos `window` timestamps
+
+        Returns:
+            Panel con los pares que tienen velas
+        """
+        pairs = [pair for pair, rows in ohlcv_by_pair.items() if rows]
+        arrays = [np.asarray(ohlcv_by_pair[pair], dtype=np.float64) for pair in pairs]
+        if not arrays:
+            return cls([], np.empty(0, dtype=np.int64), {c: np.empty((0, 0)) for c in COLUMNS})
+
+        timestamps = np.unique(np.concatenate([a[:, 0] for a in arrays]))
+        if window:
+            timestamps = timestamps[-window:]
+
+        data = {c: np.full((len(pairs), len(timestamps)), np.nan) for c in COLUMNS}
+        for row, candles in enumerate(arrays):
+            positions = np.searchsorted(timestamps, candles[:, 0])
+            inside = (positions < len(timestamps)) & (timestamps[np.minimum(positions, len(timestamps) - 1)] == candles[:, 0])
+            for offset, column in enumerate(COLUMNS, start=1):
+                data[column][row, positions[inside]] = candles[inside, offset]
+
+        # Pares sin velas dentro de la ventana
+        keep = ~np.isnan(data['close']).all(axis=1)
+        if not keep.all():
+            pairs = [pair for pair, kept in zip(pairs, keep) if kept]
+            data = {c: v[keep] for c, v in data.items()}
+        return cls(pairs, timestamps.astype(np.int64), data)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return self.data['close'].shape
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.data[column]
+
+    def tail(self, window: int) -> 'CandlePanel':
+        """Últimos `window` timestamps (vistas, sin copiar)"""
+        if window >= self.shape[1]:
+            return self
+        return CandlePanel(self.pairs, self.timestamps[-window:], {c: v[:, -window:] for c, v in self.data.items()})
+
+    def frame(self, row: int) -> tuple[pd.DataFrame, np.ndarray]:
+        """
+        Velas de un par como DataFrame (sin los timestamps vacíos)
+
+        Returns:
+            (dataframe, posiciones de sus filas en el eje del tiempo)
+        """
+        positions = np.flatnonzero(~np.isnan(self.data['close'][row]))
+        df = pd.DataFrame({'timestamp': self.timestamps[positions]})
+        for column in COLUMNS:
+            df[column] = self.data[column][row, positions]
+        return df, positions
+
+
+class PanelEngine:
+    """Caché de indicadores sobre un CandlePanel (equivalente a IndicatorEngine)"""
+
+    def __init__(self, panel: CandlePanel):
+        self.panel = panel
+        self._cache: dict[tuple, PanelIndicator] = {}
+
+    def get(self, name: str, source: str = 'close', **params: Any) -> PanelIndicator:
+        """
+        Obtiene un indicador para todos los pares (lo calcula la primera vez)
+
+        Returns:
+            Array (pares x tiempo) o dict de arrays para los indicadores de varias columnas
+        """
+        key = indicator_key(name, source, params)
+        if key not in self._cache:
+            self._cache[key] = PANEL_INDICATORS[name](self, source, **params)
+        return self._cache[key]
+
+    def compute(self, specs: Iterable[IndicatorSpec]) -> None:
+        """Calcula de una vez los indicadores declarados"""
+        for spec in specs:
+            self.get(spec.name, spec.source, **dict(spec.params))
+
+    def column(self, source: str) -> np.ndarray:
+        return self.panel[source]
+
+    def frame(self, source: str) -> pd.DataFrame:
+        """Columna como DataFrame (tiempo x pares) para las ventanas de pandas"""
+        return pd.DataFrame(self.panel[source].T)
+
+
+def _back(frame: pd.DataFrame) -> np.ndarray:
+    """DataFrame (tiempo x pares) -> array (pares x tiempo)"""
+    return frame.to_numpy().T
+
+
+def _rowwise(func: Callable[..., Any], *columns: np.ndarray) -> list[np.ndarray]:
+    """
+    Aplica un kernel 1-D a cada par, sin los NaN iniciales (como el análisis por par)
+
+    Returns:
+        Una matriz (pares x tiempo) por cada salida del kernel
+    """
+    n_pairs, n_times = columns[0].shape
+    outputs: list[np.ndarray] = []
+    for row in range(n_pairs):
+        valid = np.flatnonzero(~np.isnan(columns[0][row]))
+        if len(valid) == 0:
+            continue
+        start = valid[0]
+        result = func(*(np.ascontiguousarray(c[row, start:]) for c in columns))
+        result = result if isinstance(result, tuple) else (result,)
+        if not outputs:
+            outputs = [np.full((n_pairs, n_times), np.nan) for _ in result]
+        for out, values in zip(outputs, result):
+            out[row, start:] = values
+    return outputs or [np.full((n_pairs, n_times), np.nan)]
+
+
+def _non_zero_range(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """pandas_ta non_zero_range por par: epsilon en toda la fila si alguna diferencia es 0"""
+    diff = high - low
+    return diff + np.where((diff == 0).any(axis=1, keepdims=True), kernels.EPSILON, 0.0)
+
+
+def _rma(values: np.ndarray, length: int) -> np.ndarray:
+    frame = pd.DataFrame(values.T)
+    return _back(frame.ewm(alpha=1.0 / length, adjust=True, min_periods=length).mean())
+
+
+def _seeded_ema(values: np.ndarray, length: int) -> np.ndarray:
+    """EMA de pandas_ta por fila: semilla = media de los primeros `length` valores válidos"""
+    seeded = np.full_like(values, np.nan)
+    n_times = values.shape[1]
+    valid = ~np.isnan(values)
+    first = np.where(valid.any(axis=1), valid.argmax(axis=1), n_times)
+    for row in np.flatnonzero(first + length <= n_times):
+        start = first[row]
+        seeded[row, start + length - 1] = pd.Series(values[row, start:start + length]).mean()
+        seeded[row, start + length:] = values[row, start + length:]
+    return _back(pd.DataFrame(seeded.T).ewm(span=length, adjust=False).mean())
+
+
+# ----------------------------------------------------------------------
+# Medias y extremos
+# ----------------------------------------------------------------------
+
+@panel_indicator('rolling_mean')
+def _rolling_mean(engine: PanelEngine, source: str, length: int) -> np.ndarray:
+    return _back(engine.frame(source).rolling(window=length).mean())
+
+
+@panel_indicator('sma')
+def _sma(engine: PanelEngine, source: str, length: int) -> np.ndarray:
+    if kernels.talib is not None:
+        return _rowwise(lambda x: kernels.sma(x, length), engine.column(source))[0]
+    return engine.get('rolling_mean', source, length=length)
+
+
+@panel_indicator('rolling_std')
+def _rolling_std(engine: PanelEngine, source: str, length: int) -> np.ndarray:
+    return _back(engine.frame(source).rolling(window=length).std())
+
+
+@panel_indicator('rolling_max')
+def _rolling_max(engine: PanelEngine, source: str, length: int) -> np.ndarray:
+    return _back(engine.frame(source).rolling(window=length).max())
+
+
+@panel_indicator('rolling_min')
+def _rolling_min(engine: PanelEngine, source: str, length: int) -> np.ndarray:
+    return _back(engine.frame(source).rolling(window=length).min())
+
+
+@panel_indicator('ema')
+def _ema(engine: PanelEngine, source: str, length: int) -> np.ndarray:
+    """EMA recursiva (ewm adjust=False)"""
+    return _back(engine.frame(source).ewm(span=length, adjust=False).mean())
+
+
+# ----------------------------------------------------------------------
+# Osciladores
+# ----------------------------------------------------------------------
+
+@panel_indicator('rsi')
+def _rsi(engine: PanelEngine, source: str, length: int) -> np.ndarray:
+    """RSI de Wilder (pandas_ta)"""
+    close = engine.column(source)
+    if kernels.talib is not None:
+        return _rowwise(lambda x: kernels.rsi(x, length), close)[0]
+    negative = close - shift(close)
+    positive = negative.copy()
+    positive[positive < 0] = 0
+    negative[negative > 0] = 0
+    positive_avg = _rma(positive, length)
+    negative_avg = _rma(negative, length)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 * positive_avg / (positive_avg + np.abs(negative_avg))
+
+
+@panel_indicator('rsi_sma')
+def _rsi_sma(engine: PanelEngine, source: str, length: int) -> np.ndarray:
+    """RSI con medias simples de ganancias/pérdidas (Cutler)"""
+    close = engine.column(source)
+    delta = close - shift(close)
+    missing = np.isnan(close)
+    # Como delta.where(...): la primera vela de cada par cuenta como 0
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = -np.where(delta < 0, delta, 0.0)
+    gain[missing] = np.nan
+    loss[missing] = np.nan
+    gain = _back(pd.DataFrame(gain.T).rolling(window=length).mean())
+    loss = _back(pd.DataFrame(loss.T).rolling(window=length).mean())
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + gain / loss))
+
+
+@panel_indicator('macd')
+def _macd(engine: PanelEngine, source: str, fast: int = 12, slow: int = 26, signal: int = 9) -> dict[str, np.ndarray]:
+    """MACD de pandas_ta -> macd, hist, signal"""
+    close = engine.column(source)
+    if kernels.talib is not None:
+        macd, hist, macd_signal = _rowwise(lambda x: kernels.macd(x, fast, slow, signal), close)
+        return {'macd': macd, 'hist': hist, 'signal': macd_signal}
+    if slow < fast:
+        fast, slow = slow, fast
+    macd = _seeded_ema(close, fast) - _seeded_ema(close, slow)
+    macd_signal = _seeded_ema(macd, signal)
+    return {'macd': macd, 'hist': macd - macd_signal, 'signal': macd_signal}
+
+
+@panel_indicator('macd_ewm')
+def _macd_ewm(engine: PanelEngine, source: str, fast: int = 12, slow: int = 26, signal: int = 9) -> dict[str, np.ndarray]:
+    """MACD sobre EMAs recursivas -> macd, signal, hist"""
+    macd = engine.get('ema', source, length=fast) - engine.get('ema', source, length=slow)
+    macd_signal = _back(pd.DataFrame(macd.T).ewm(span=signal, adjust=False).mean())
+    return {'macd': macd, 'signal': macd_signal, 'hist': macd - macd_signal}
+
+
+# ----------------------------------------------------------------------
+# Volatilidad y tendencia (usan high/low/close)
+# ----------------------------------------------------------------------
+
+@panel_indicator('atr')
+def _atr(engine: PanelEngine, source: str, length: int) -> np.ndarray:
+    high, low, close = engine.column('high'), engine.column('low'), engine.column('close')
+    if kernels.talib is not None:
+        return _rowwise(lambda h, l, c: kernels.atr(h, l, c, length), high, low, close)[0]
+    prev_close = shift(close)
+    tr = np.fmax(np.abs(_non_zero_range(high, low)), np.fmax(np.abs(high - prev_close), np.abs(prev_close - low)))
+    # Primera vela de cada par: sin cierre anterior
+    tr[np.isnan(prev_close)] = np.nan
+    return _rma(tr, length)
+
+
+@panel_indicator('adx')
+def _adx(engine: PanelEngine, source: str, length: int) -> dict[str, np.ndarray]:
+    """ADX de pandas_ta -> adx, dmp, dmn"""
+    high, low = engine.column('high'), engine.column('low')
+    atr = engine.get('atr', length=length)
+    up = high - shift(high)
+    dn = shift(low) - low
+
+    pos = np.where((up > dn) & (up > 0), up, 0.0)
+    neg = np.where((dn > up) & (dn > 0), dn, 0.0)
+    pos[np.abs(pos) < kernels.EPSILON] = 0.0
+    neg[np.abs(neg) < kernels.EPSILON] = 0.0
+    pos[np.isnan(up)] = np.nan
+    neg[np.isnan(up)] = np.nan
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = 100.0 / atr
+        dmp = k * _rma(pos, length)
+        dmn = k * _rma(neg, length)
+        dx = 100.0 * np.abs(dmp - dmn) / (dmp + dmn)
+    return {'adx': _rma(dx, length), 'dmp': dmp, 'dmn': dmn}
+
+
+@panel_indicator('bbands')
+def _bbands(engine: PanelEngine, source: str, length: int = 20, std: float = 2.0) -> dict[str, np.ndarray]:
+    """Bollinger de pandas_ta (desviación poblacional) -> lower, mid, upper, bandwidth, percent"""
+    close = engine.column(source)
+    if kernels.talib is not None:
+        columns = _rowwise(lambda x: kernels.bbands(x, length, std), close)
+        return dict(zip(['lower', 'mid', 'upper', 'bandwidth', 'percent'], columns))
+    frame = engine.frame(source)
+    mid = _back(frame.rolling(window=length).mean())
+    deviations = std * np.sqrt(_back(frame.rolling(window=length).var(ddof=0)))
+    lower = mid - deviations
+    upper = mid + deviations
+    ulr = _non_zero_range(upper, lower)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'lower': lower, 'mid': mid, 'upper': upper,
+            'bandwidth': 100 * ulr / mid,
+            'percent': _non_zero_range(close, lower) / ulr,
+        }
+
+
+@panel_indicator('bbands_sample')
+def _bbands_sample(engine: PanelEngine, source: str, length: int = 20, std: float = 2.0) -> dict[str, np.ndarray]:
+    """Bollinger con desviación muestral (rolling.std) -> lower, mid, upper"""
+    mid = engine.get('rolling_mean', source, length=length)
+    dev = engine.get('rolling_std', source, length=length)
+    return {'lower': mid - (dev * std), 'mid': mid, 'upper': mid + (dev * std)}
@@ -0,0 +1,186 @@
+"""
+Inferencia de HistGradientBoostingClassifier sin scikit-learn
+Un modelo entrenado se exporta a arrays planos de NumPy (feature, umbral,
+hijos y valor de cada nodo de todos los árboles) y se evalúa con un
+recorrido vectorizado: todas las filas bajan un nivel de todos los árboles
+en cada paso, así que una predicción son `profundidad` operaciones de NumPy.
+
+Reproduce predict_proba de scikit-learn: mismas reglas de corte (x <= umbral,
+NaN hacia missing_go_to_left), mismo orden de suma de los árboles sobre la
+predicción base y la misma sigmoide. Se guarda como arrays (.npz) y cargarlo
+no importa scikit-learn.
+"""
+import math
+
+import numpy as np
+
+# Arrays que definen el modelo (to_arrays / from_arrays)
+ARRAY_FIELDS = ('feature', 'threshold', 'left', 'right', 'value', 'is_leaf', 'missing_left', 'roots', 'baseline')
+
+# Internos de scikit-learn que lee from_sklearn (versión soportada en requirements.txt)
+SKLEARN_ATTRIBUTES = ('_predictors', '_baseline_prediction')
+NODE_FIELDS = (
+    'feature_idx', 'num_threshold', 'left', 'right', 'value', 'is_leaf', 'missing_go_to_left', 'is_categorical'
+)
+
+
+def unsupported_sklearn(detail: str) -> RuntimeError:
+    """Error de una versión de scikit-learn cuyos internos cambiaron"""
+    import sklearn
+    return RuntimeError(
+        f"scikit-learn {sklearn.__version__} no es compatible ({detail}): "
+        f"instalar la versión de requirements.txt"
+    )
+
+
+def expit(x: np.ndarray) -> np.ndarray:
+    """
+    Sigmoide 1 / (1 + e^-x) como scipy.special.expit
+    math.exp (libm, igual que scipy) en lugar de np.exp: las versiones
+    vectorizadas de NumPy pueden diferir en el último bit.
+    """
+    exp = np.array([math.exp(-v) if v > -709 else math.inf for v in np.ravel(x)])
+    return 1.0 / (1.0 + exp)
+
+
+class CompiledTrees:
+    """
+    Ensamble de árboles de un HistGradientBoostingClassifier binario
+
+    Uso:
+        compiled = CompiledTrees.from_sklearn(model)
+        compiled.predict_proba(X)           # igual que model.predict_proba(X)
+        arrays = compiled.to_arrays()       # np.savez(f, **arrays)
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        is_leaf: np.ndarray,
+        missing_left: np.ndarray,
+        roots: np.ndarray,
+        baseline: float,
+    ):
+        self.feature = feature.astype(np.int64)
+        self.threshold = threshold.astype(np.float64)
+        self.left = left.astype(np.int64)
+        self.right = right.astype(np.int64)
+        self.value = value.astype(np.float64)
+        self.is_leaf = is_leaf.astype(bool)
+        self.missing_left = missing_left.astype(bool)
+        self.roots = roots.astype(np.int64)
+        self.baseline = float(baseline)
+        self.depth = self._max_depth()
+
+    @classmethod
+    def from_sklearn(cls, model, bin_edges: list[np.ndarray] | None = None) -> 'CompiledTrees':
+        """
+        Exporta un HistGradientBoostingClassifier entrenado
+
+        Args:
+            model: Clasificador entrenado
+            bin_edges: Si se entrenó con códigos de bins (app.core.binned_dataset),
+                bordes de cada feature: los umbrales se traducen a valores de
+                las features y el modelo compilado recibe las features sin binnear
+
+        Raises:
+            ValueError: Si no es binario o usa features categóricas
+            RuntimeError: Si la versión de scikit-learn no tiene los internos esperados
+        """
+        missing = [name for name in SKLEARN_ATTRIBUTES if not hasattr(model, name)]
+        if missing:
+            raise unsupported_sklearn(f"el modelo no tiene {', '.join(missing)}")
+        if len(model.classes_) != 2:
+            raise ValueError("Solo se exportan clasificadores binarios")
+
+        fields = {name: [] for name in ('feature', 'threshold', 'left', 'right', 'value', 'is_leaf', 'missing_left')}
+        roots, offset = [], 0
+        for predictors in model._predictors:
+            # Binario: un árbol por iteración
+            nodes = getattr(predictors[0], 'nodes', None)
+            names = nodes.dtype.names if isinstance(nodes, np.ndarray) and nodes.dtype.names else ()
+            missing = [name for name in NODE_FIELDS if name not in names]
+            if missing:
+                raise unsupported_sklearn(f"los nodos no tienen {', '.join(missing)}")
+            if nodes['is_categorical'].any():
+                raise ValueError("Los árboles con features categóricas no se pueden exportar")
+            roots.append(offset)
+            fields['feature'].append(nodes['feature_idx'])
+            fields['threshold'].append(nodes['num_threshold'])
+            # Índices de hijos globales (todos los árboles en los mismos arrays)
+            fields['left'].append(nodes['left'].astype(np.int64) + offset)
+            fields['right'].append(nodes['right'].astype(np.int64) + offset)
+            fields['value'].append(nodes['value'])
+            fields['is_leaf'].append(nodes['is_leaf'])
+            fields['missing_left'].append(nodes['missing_go_to_left'])
+            offset += len(nodes)
+
+        arrays = {name: np.concatenate(values) for name, values in fields.items()}
+        if bin_edges is not None:
+            # código <= t  <=>  código <= floor(t)  <=>  x <= bin_edges[floor(t)]
+            split = ~arrays['is_leaf'].astype(bool)
+            codes = np.floor(arrays['threshold'][split]).astype(np.int64)
+            arrays['threshold'] = arrays['threshold'].astype(np.float64)
+            arrays['threshold'][split] = [
+                bin_edges[feature][code] for feature, code in zip(arrays['feature'][split], codes)
+            ]
+        return cls(roots=np.array(roots), baseline=float(np.ravel(model._baseline_prediction)[0]), **arrays)
+
+    def _max_depth(self) -> int:
+        """Niveles a recorrer: el camino más largo de la raíz a una hoja"""
+        depth = 0
+        level = self.roots
+        while len(level):
+            inner = level[~self.is_leaf[level]]
+            if not len(inner):
+                break
+            depth += 1
+            level = np.concatenate([self.left[inner], self.right[inner]])
+        return depth
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def raw_predict(self, X) -> np.ndarray:
+        """Suma de la predicción base y los árboles (log-odds) por fila"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            go_left = np.where(np.isnan(x), self.missing_left[node], x <= self.threshold[node])
+            child = np.where(go_left, self.left[node], self.right[node])
+            node = np.where(self.is_leaf[node], node, child)
+
+        # Mismo orden de suma que scikit-learn: base + árbol 1 + árbol 2 + ...
+        values = np.empty((len(X), self.n_trees + 1))
+        values[:, 0] = self.baseline
+        values[:, 1:] = self.value[node]
+        return np.cumsum(values, axis=1)[:, -1]
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Probabilidades (n_filas x 2) como HistGradientBoostingClassifier.predict_proba"""
+        proba = np.empty((len(np.atleast_2d(X)), 2))
+        proba[:, 1] = expit(self.raw_predict(X))
+        proba[:, 0] = 1 - proba[:, 1]
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        """Clase predicha (0/1)"""
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Arrays del modelo para np.savez"""
+        return {name: np.asarray(getattr(self, name)) for name in ARRAY_FIELDS}
+
+    @classmethod
+    def from_arrays(cls, arrays) -> 'CompiledTrees':
+        """Modelo desde to_arrays() (o un np.load de un .npz)"""
+        return cls(**{name: np.asarray(arrays[name]) for name in ARRAY_FIELDS})
@@ -0,0 +1,228 @@
+"""
+Descarga de histórico profundo (backfill) hacia el almacén de velas
+Pagina fetch_ohlcv con `since`, procesa pares en paralelo respetando el
+rate limit del exchange y se puede reanudar tras una interrupción.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any
+
+import ccxt
+
+from app.services.candle_store import CandleStore
+from app.utils.timeframes import now_ms, timeframe_to_msecs
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Intervalo mínimo entre peticiones, compartido por todas las threads"""
+
+    def __init__(self, interval_seconds: float):
+        self._interval = interval_seconds
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        """Bloquea hasta el próximo turno disponible"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class BackfillService:
+    """
+    Backfill reanudable de velas por (par, timeframe)
+
+    Progreso y reanudación:
+    - Las velas se agregan al almacén página a página, así que el propio
+      almacén es el checkpoint del tramo hacia adelante.
+    - El histórico anterior a lo ya almacenado se baja a un archivo de
+      staging (`.partial/`) que también se reanuda, y al terminar se une
+      con el almacén en una sola reescritura atómica.
+    - `backfill_state.json` recuerda desde qué `since` ya está completo
+      cada par, para no volver a pedir velas que el exchange no tiene.
+    """
+
+    MAX_RETRIES = 5
+
+    def __init__(
+        self,
+        exchange: Any,
+        store: CandleStore,
+        exchange_name: str,
+        datadir: str | Path,
+        page_limit: int = 1000,
+        workers: int = 4,
+        rate_limit_ms: float | None = None,
+    ):
+        self._exchange = exchange
+        self._store = store
+        self._exchange_name = exchange_name
+        self._page_limit = page_limit
+        self._workers = workers
+        self._staging = CandleStore(Path(datadir) / '.partial')
+        self._state_file = Path(datadir) / 'backfill_state.json'
+        self._state_lock = threading.Lock()
+
+        interval_ms = rate_limit_ms if rate_limit_ms is not None else getattr(exchange, 'rateLimit', 0)
+        self._limiter = RateLimiter((interval_ms or 0) / 1000)
+
+    # ------------------------------------------------------------------
+    # Checkpoint
+    # ------------------------------------------------------------------
+
+    def _state_key(self, pair: str, timeframe: str) -> str:
+        return f"{self._exchange_name}|{pair}|{timeframe}"
+
+    def _load_state(self) -> dict[str, Any]:
+        try:
+            with open(self._state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _covered_since(self, pair: str, timeframe: str) -> int | None:
+        with self._state_lock:
+            return self._load_state().get(self._state_key(pair, timeframe), {}).get('covered_since')
+
+    def _save_covered_since(self, pair: str, timeframe: str, since: int) -> None:
+        with self._state_lock:
+            state = self._load_state()
+            entry = state.setdefault(self._state_key(pair, timeframe), {})
+            entry['covered_since'] = min(since, entry.get('covered_since', since))
+            self._state_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._state_file.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_path, self._state_file)
+
+    # ------------------------------------------------------------------
+    # Descarga
+    # ------------------------------------------------------------------
+
+    def _fetch_page(self, pair: str, timeframe: str, since: int) -> list[list]:
+        """Una página de velas con reintentos ante errores de red / rate limit"""
+        for attempt in range(1, self.MAX_RETRIES + 1):
+            self._limiter.wait()
+            try:
+                return self._exchange.fetch_ohlcv(pair, timeframe, since=since, limit=self._page_limit)
+            except (ccxt.RateLimitExceeded, ccxt.NetworkError) as e:
+                if attempt == self.MAX_RETRIES:
+                    raise
+                backoff = 2 ** attempt
+                logger.warning(f"Backfill {pair} {timeframe}: {e} (reintento {attempt} en {backoff}s)")
+                time.sleep(backoff)
+        return []
+
+    def _download(self, pair: str, timeframe: str, since: int, until: int, sink: CandleStore) -> int:
+        """
+        Pagina desde `since` hasta `until` (exclusivo) agregando a `sink`
+
+        Returns:
+            Cantidad de velas agregadas
+        """
+        tf_ms = timeframe_to_msecs(timeframe)
+        cursor = since
+        added = 0
+
+        while cursor < until:
+            page = self._fetch_page(pair, timeframe, cursor)
+            if not page:
+                break
+
+            now = now_ms()
+            closed = [c for c in page if c[0] < until and c[0] + tf_ms <= now]
+            added += sink.append(self._exchange_name, pair, timeframe, closed)
+
+            next_cursor = page[-1][0] + tf_ms
+            if next_cursor <= cursor or page[-1][0] + tf_ms > now:
+                break
+            cursor = next_cursor
+
+        return added
+
+    def backfill_pair(self, pair: str, timeframe: str, since: int) -> int:
+        """
+        Completa el histórico de un par desde `since` hasta la última vela cerrada
+
+        Args:
+            pair: Par de trading
+            timeframe: Timeframe
+            since: Timestamp (ms) de inicio deseado
+
+        Returns:
+            Cantidad de velas nuevas en el almacén
+        """
+        name = self._exchange_name
+        tf_ms = timeframe_to_msecs(timeframe)
+        before = self._store.count(name, pair, timeframe)
+        first_ts = self._store.first_timestamp(name, pair, timeframe)
+
+        if first_ts is None:
+            # Almacén vacío: se descarga directamente hacia adelante
+            self._download(pair, timeframe, since, now_ms(), self._store)
+            self._save_covered_since(pair, timeframe, since)
+        else:
+            covered_since = self._covered_since(pair, timeframe)
+            if first_ts > since and (covered_since is None or covered_since > since):
+                self._backfill_prefix(pair, timeframe, since, first_ts)
+
+        # Tramo hacia adelante hasta la última vela cerrada
+        last_ts = self._store.last_timestamp(name, pair, timeframe)
+        if last_ts is not None:
+            self._download(pair, timeframe, last_ts + tf_ms, now_ms(), self._store)
+
+        return self._store.count(name, pair, timeframe) - before
+
+    def _backfill_prefix(self, pair: str, timeframe: str, since: int, first_ts: int) -> None:
+        """Descarga el histórico anterior a lo almacenado y lo antepone"""
+        name = self._exchange_name
+        tf_ms = timeframe_to_msecs(timeframe)
+
+        staged_last = self._staging.last_timestamp(name, pair, timeframe)
+        start = since if staged_last is None else staged_last + tf_ms
+        self._download(pair, timeframe, start, first_ts, self._staging)
+
+        prefix = self._staging.load(name, pair, timeframe)
+        self._store.prepend(name, pair, timeframe, prefix)
+        self._save_covered_since(pair, timeframe, since)
+        self._staging.path_for(name, pair, timeframe).unlink(missing_ok=True)
+
+    def run(self, pairs: list[str], timeframes: list[str], since: int) -> dict[str, dict[str, Any]]:
+        """
+        Ejecuta el backfill de todos los (par, timeframe) en paralelo
+
+        Returns:
+            Resultado por job: velas nuevas o error
+        """
+        jobs = [(pair, tf) for pair in pairs for tf in timeframes]
+        results: dict[str, dict[str, Any]] = {}
+
+        with ThreadPoolExecutor(max_workers=self._workers) as pool:
+            futures = {
+                pool.submit(self.backfill_pair, pair, tf, since): (pair, tf)
+                for pair, tf in jobs
+            }
+            for future in as_completed(futures):
+                pair, tf = futures[future]
+                key = f"{pair} {tf}"
+                try:
+                    added = future.result()
+                    total = self._store.count(self._exchange_name, pair, tf)
+                    results[key] = {"added": added, "total": total}
+                    logger.info(f"Backfill {key}: +{added} velas (total {total})")
+                except Exception as e:
+                    results[key] = {"error": str(e)}
+                    logger.error(f"Backfill {key} falló: {e}")
+
+        return results
@@ -0,0 +1,197 @@
+"""
+Almacén local de velas OHLCV (append-only)
+Un archivo binario por (exchange, par, timeframe) con registros de 6 float64:
+[timestamp, open, high, low, close, volume]. Solo se guardan velas CERRADAS.
+"""
+import logging
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Columnas por vela y tamaño del registro en disco
+CANDLE_FIELDS = 6
+RECORD_SIZE = CANDLE_FIELDS * np.dtype(np.float64).itemsize
+
+
+class CandleStore:
+    """
+    Almacén en disco de velas cerradas por (exchange, par, timeframe)
+    Las escrituras normales solo agregan al final del archivo; la lectura
+    de las últimas N velas se hace con un seek, sin leer el archivo completo.
+    """
+
+    def __init__(self, base_dir: str | Path):
+        self._base_dir = Path(base_dir)
+        self._locks: dict[Path, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+
+    def path_for(self, exchange: str, pair: str, timeframe: str) -> Path:
+        """Ruta del archivo de velas (ej: data/binance/BTC_USDT-1d.bin)"""
+        safe_pair = pair.replace('/', '_').replace(':', '_')
+        return self._base_dir / exchange / f"{safe_pair}-{timeframe}.bin"
+
+    def _lock(self, path: Path) -> threading.RLock:
+        with self._locks_guard:
+            if path not in self._locks:
+                self._locks[path] = threading.RLock()
+            return self._locks[path]
+
+    @staticmethod
+    def _count(path: Path) -> int:
+        try:
+            return path.stat().st_size // RECORD_SIZE
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _read_records(path: Path, start: int, count: int) -> np.ndarray:
+        if count <= 0:
+            return np.empty((0, CANDLE_FIELDS), dtype=np.float64)
+        with open(path, 'rb') as f:
+            f.seek(start * RECORD_SIZE)
+            data = np.fromfile(f, dtype=np.float64, count=count * CANDLE_FIELDS)
+        return data.reshape(-1, CANDLE_FIELDS)
+
+    @staticmethod
+    def to_ohlcv(rows: np.ndarray) -> list[list]:
+        """Convierte registros del almacén al formato CCXT (timestamp entero)"""
+        return [[int(r[0]), *r[1:].tolist()] for r in rows]
+
+    def count(self, exchange: str, pair: str, timeframe: str) -> int:
+        """Cantidad de velas almacenadas"""
+        return self._count(self.path_for(exchange, pair, timeframe))
+
+    def first_timestamp(self, exchange: str, pair: str, timeframe: str) -> int | None:
+        """Timestamp (ms) de la primera vela almacenada"""
+        path = self.path_for(exchange, pair, timeframe)
+        with self._lock(path):
+            if self._count(path) == 0:
+                return None
+            return int(self._read_records(path, 0, 1)[0, 0])
+
+    def last_timestamp(self, exchange: str, pair: str, timeframe: str) -> int | None:
+        """Timestamp (ms) de la última vela almacenada"""
+        path = self.path_for(exchange, pair, timeframe)
+        with self._lock(path):
+            n = self._count(path)
+            if n == 0:
+                return None
+            return int(self._read_records(path, n - 1, 1)[0, 0])
+
+    def load(self, exchange: str, pair: str, timeframe: str, limit: int | None = None) -> np.ndarray:
+        """
+        Lee las últimas `limit` velas como array (n, 6)
+
+        Args:
+            exchange: Nombre del exchange
+            pair: Par de trading
+            timeframe: Timeframe
+            limit: Cantidad máxima de velas (None = todas)
+
+        Returns:
+            Array float64 de forma (n, 6)
+        """
+        path = self.path_for(exchange, pair, timeframe)
+        with self._lock(path):
+            n = self._count(path)
+            count = n if limit is None else min(limit, n)
+            return self._read_records(path, n - count, count)
+
+    def read(self, exchange: str, pair: str, timeframe: str, limit: int | None = None) -> list[list]:
+        """Lee las últimas `limit` velas en formato CCXT"""
+        return self.to_ohlcv(self.load(exchange, pair, timeframe, limit))
+
+    def append(self, exchange: str, pair: str, timeframe: str, candles: list[list]) -> int:
+        """
+        Agrega velas cerradas al final del archivo
+        Ignora las velas con timestamp <= al último almacenado (idempotente).
+
+        Returns:
+            Cantidad de velas agregadas
+        """
+        if len(candles) == 0:
+            return 0
+
+        path = self.path_for(exchange, pair, timeframe)
+        with self._lock(path):
+            n = self._count(path)
+            last_ts = int(self._read_records(path, n - 1, 1)[0, 0]) if n else None
+
+            rows = np.asarray(candles, dtype=np.float64).reshape(-1, CANDLE_FIELDS)
+            rows = rows[np.argsort(rows[:, 0], kind='stable')]
+            if last_ts is not None:
+                rows = rows[rows[:, 0] > last_ts]
+            if len(rows) == 0:
+                return 0
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Truncar registros parciales (escritura interrumpida) antes de agregar
+            if path.exists() and path.stat().st_size != n * RECORD_SIZE:
+                os.truncate(path, n * RECORD_SIZE)
+            with open(path, 'ab') as f:
+                rows.tofile(f)
+            return len(rows)
+
+    def replace(self, exchange: str, pair: str, timeframe: str, candles: list[list]) -> int:
+        """
+        Reescribe el archivo completo de forma atómica
+        Se usa solo cuando las velas nuevas no son contiguas con las almacenadas.
+        """
+        path = self.path_for(exchange, pair, timeframe)
+        rows = np.asarray(candles, dtype=np.float64).reshape(-1, CANDLE_FIELDS)
+        rows = rows[np.argsort(rows[:, 0], kind='stable')]
+
+        with self._lock(path):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                rows.tofile(f)
+            os.replace(tmp_path, path)
+        return len(rows)
+
+    def merge(self, exchange: str, pair: str, timeframe: str, candles: list[list], timeframe_ms: int) -> int:
+        """
+        Integra una ventana de velas que puede solaparse con lo almacenado
+        Si la ventana es contigua con el histórico se conserva lo anterior
+        a ella; si hay un hueco, el histórico viejo se descarta.
+
+        Returns:
+            Cantidad total de velas almacenadas tras la operación
+        """
+        if len(candles) == 0:
+            return self.count(exchange, pair, timeframe)
+
+        new_rows = np.asarray(candles, dtype=np.float64).reshape(-1, CANDLE_FIELDS)
+        first_new = new_rows[:, 0].min()
+
+        with self._lock(self.path_for(exchange, pair, timeframe)):
+            stored = self.load(exchange, pair, timeframe)
+            if len(stored) and stored[-1, 0] >= first_new - timeframe_ms:
+                # Contiguo: histórico previo a la ventana + ventana nueva
+                rows = np.vstack([stored[stored[:, 0] < first_new], new_rows])
+            else:
+                rows = new_rows
+            return self.replace(exchange, pair, timeframe, rows)
+
+    def prepend(self, exchange: str, pair: str, timeframe: str, candles: list[list]) -> int:
+        """
+        Antepone histórico más antiguo que la primera vela almacenada
+        Se usa al completar el backfill; requiere una reescritura atómica.
+
+        Returns:
+            Cantidad de velas antepuestas
+        """
+        if len(candles) == 0:
+            return 0
+
+        rows = np.asarray(candles, dtype=np.float64).reshape(-1, CANDLE_FIELDS)
+        with self._lock(self.path_for(exchange, pair, timeframe)):
+            stored = self.load(exchange, pair, timeframe)
+            if len(stored):
+                rows = rows[rows[:, 0] < stored[0, 0]]
+            self.replace(exchange, pair, timeframe, np.vstack([rows, stored]))
+            return len(rows)
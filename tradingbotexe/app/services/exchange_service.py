@@ -3,14 +3,25 @@ Servicio de integración con Exchanges vía CCXT
 Migrado y simplificado desde Freqtrade
 """
 import logging
+import threading
+import time
 from typing import Any
 
 import ccxt
 
 from app.config import config
+from app.services.candle_store import CandleStore
+from app.services.fake_exchange import create_fake_exchange
+from app.services.markets_cache import MarketsCache
+from app.services.ohlcv_cache import OhlcvCache
+from app.utils.singleflight import SingleFlight, coalesce
+from app.utils.timeframes import now_ms, timeframe_to_msecs
 
 logger = logging.getLogger(__name__)
 
+# Nombre de exchange en config.json que activa el exchange simulado
+FAKE_EXCHANGE = 'fake'
+
 
 class ExchangeService:
     """
@@ -23,43 +34,151 @@ class ExchangeService:
         self._exchange_name = config.exchange_name
         self._api_key = config.exchange_key
         self._api_secret = config.exchange_secret
+        
+        # Almacén local de velas cerradas (None = siempre descargar completo)
+        self._candle_store = CandleStore(config.datadir) if config.candle_store_enabled else None
+        # Pares cuyo histórico completo es más corto que la ventana pedida
+        self._short_history: set[tuple[str, str]] = set()
+        
+        # Caché en memoria que vence en el próximo cierre de vela
+        self._ohlcv_cache = OhlcvCache(
+            max_bytes=int(config.ohlcv_cache_max_mb * 1024 * 1024),
+            grace_seconds=config.ohlcv_cache_grace_seconds,
+            live_ttl=config.ohlcv_cache_live_ttl_seconds,
+        ) if config.ohlcv_cache_enabled else None
+        
+        # Llamadas idénticas concurrentes comparten una sola petición
+        self._inflight = SingleFlight()
+        
+        # Snapshot compartido de tickers: par -> (momento de descarga, datos)
+        self._tickers_snapshot: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._tickers_lock = threading.Lock()
+        
+        # Metadatos de mercados: caché en disco + refresco en segundo plano
+        self._markets_cache = MarketsCache(config.markets_cache_dir, self._exchange_name)
+        self._markets_lock = threading.Lock()
+        self._markets_refresher: threading.Thread | None = None
+        self._markets_stop = threading.Event()
+        
         self._init_exchange()
     
     def _init_exchange(self) -> None:
         """Inicializa la conexión con el exchange"""
         try:
-            exchange_class = getattr(ccxt, self._exchange_name)
-            
-            # Configuración básica sin keys por defecto
-            exchange_config = {
-                'enableRateLimit': True,
-                'options': {
-                    'defaultType': 'spot',
-                }
-            }
-            
-            # Solo agregar keys si existen
-            if self._api_key and self._api_secret:
-                exchange_config['apiKey'] = self._api_key
-                exchange_config['secret'] = self._api_secret
+            if self._exchange_name == FAKE_EXCHANGE:
+                # Exchange simulado para pruebas de carga sin red
+                logger.info("Iniciando exchange SIMULADO (fake)")
+                self._exchange = create_fake_exchange(config.fake_exchange, config.pairlist, config.datadir)
             else:
-                logger.info(f"Iniciando {self._exchange_name} en modo PÚBLICO (Sin API Keys)")
-            
-            
-            self._exchange = exchange_class(exchange_config)
+                exchange_class = getattr(ccxt, self._exchange_name)
+                exchange_config = self.exchange_config()
+                
+                if not self._api_key or not self._api_secret:
+                    logger.info(f"Iniciando {self._exchange_name} en modo PÚBLICO (Sin API Keys)")
+                
+                self._exchange = exchange_class(exchange_config)
             
-            # Cargar mercados (datos públicos)
-            try:
-                self._exchange.load_markets()
-                logger.info(f"Exchange {self._exchange_name} inicializado correctamente")
-            except Exception as e:
-                logger.warning(f"Advertencia cargando mercados: {e}")
+            # Mercados desde la caché en disco; la descarga va en segundo plano
+            # (el simulado los genera de la pairlist: sin caché)
+            cached_age = None if self._exchange_name == FAKE_EXCHANGE else self._load_cached_markets()
+            self._start_markets_refresher(cached_age)
+            logger.info(f"Exchange {self._exchange_name} inicializado correctamente")
             
         except Exception as e:
             logger.error(f"Error al inicializar exchange: {e}")
             # No lanzar error, permitir intentar de nuevo o funcionar parcialmente
+    
+    def _load_cached_markets(self) -> float | None:
+        """
+        Carga los mercados desde la caché en disco (sin red)
+        
+        Returns:
+            Antigüedad de la caché en segundos, o None si no hay caché
+        """
+        data = self._markets_cache.load()
+        if data is None:
+            return None
+        try:
+            self._exchange.set_markets(data['markets'], data.get('currencies') or None)
+        except Exception as e:
+            logger.warning(f"No se pudo usar la caché de mercados: {e}")
+            return None
+        age = MarketsCache.age_seconds(data)
+        logger.info(f"Mercados de {self._exchange_name} cargados desde caché ({len(data['markets'])}, {age:.0f}s)")
+        return age
+    
+    def refresh_markets(self) -> bool:
+        """
+        Descarga los mercados del exchange y actualiza la caché en disco
+        
+        Returns:
+            True si se descargaron correctamente
+        """
+        with self._markets_lock:
+            try:
+                self._exchange.load_markets(reload=True)
+            except Exception as e:
+                logger.warning(f"Advertencia cargando mercados: {e}")
+                return False
+            try:
+                if self._exchange_name != FAKE_EXCHANGE:
+                    self._markets_cache.save(self._exchange.markets, self._exchange.currencies)
+            except Exception as e:
+                logger.warning(f"No se pudo guardar la caché de mercados: {e}")
+        logger.info(f"Mercados de {self._exchange_name} actualizados ({len(self._exchange.markets)})")
+        return True
+    
+    def _start_markets_refresher(self, cached_age: float | None) -> None:
+        """Lanza la thread daemon que mantiene los mercados al día"""
+        if self._markets_refresher is not None and self._markets_refresher.is_alive():
+            return
+        self._markets_refresher = threading.Thread(
+            target=self._refresh_markets_loop, args=(cached_age,),
+            name='markets-refresh', daemon=True
+        )
+        self._markets_refresher.start()
+    
+    def _refresh_markets_loop(self, cached_age: float | None) -> None:
+        interval = config.markets_refresh_interval
+        # Sin caché (o caché vencida) se descarga de inmediato
+        if cached_age is None or (interval > 0 and cached_age >= interval):
+            delay = 0.0
+        elif interval > 0:
+            delay = interval - cached_age
+        else:
+            return
+        
+        while not self._markets_stop.wait(delay):
+            if self.refresh_markets():
+                if interval <= 0:
+                    return
+                delay = interval
+            else:
+                # Reintentar antes si el exchange no respondió
+                delay = min(interval, 60) if interval > 0 else 60
+    
+    def stop_markets_refresher(self) -> None:
+        """Detiene el refresco periódico de mercados"""
+        self._markets_stop.set()
 
     
+    def exchange_config(self) -> dict[str, Any]:
+        """Configuración CCXT del exchange (compartida con la variante async)"""
+        # Configuración básica sin keys por defecto
+        exchange_config = {
+            'enableRateLimit': True,
+            'options': {
+                'defaultType': 'spot',
+            }
+        }
+        
+        # Solo agregar keys si existen
+        if self._api_key and self._api_secret:
+            exchange_config['apiKey'] = self._api_key
+            exchange_config['secret'] = self._api_secret
+        
+        return exchange_config
+    
     @property
     def exchange(self) -> ccxt.Exchange:
         """Retorna la instancia del exchange"""
@@ -70,12 +189,9 @@ class ExchangeService:
     def _ensure_markets_loaded(self) -> None:
         """Asegura que los mercados estén cargados"""
         if not hasattr(self.exchange, 'markets') or not self.exchange.markets:
-            try:
-                self.exchange.load_markets()
-                logger.info(f"Mercados cargados para {self._exchange_name}")
-            except Exception as e:
-                logger.warning(f"No se pudieron cargar mercados: {e}")
+            self.refresh_markets()
     
+    @coalesce
     def get_balance(self, currency: str | None = None) -> dict[str, Any]:
         """
         Obtiene el balance de la cuenta
@@ -87,35 +203,52 @@ class ExchangeService:
             Diccionario con balances
         """
         try:
-            balance = self.exchange.fetch_balance()
-            
-            if currency:
-                return {
-                    'currency': currency,
-                    'free': balance.get(currency, {}).get('free', 0),
-                    'used': balance.get(currency, {}).get('used', 0),
-                    'total': balance.get(currency, {}).get('total', 0),
-                }
-            
-            # Filtrar solo monedas con balance > 0
-            filtered_balance = {}
-            for curr, data in balance.items():
-                if curr not in ['free', 'used', 'total', 'info'] and data.get('total', 0) > 0:
-                    filtered_balance[curr] = {
-                        'free': data.get('free', 0),
-                        'used': data.get('used', 0),
-                        'total': data.get('total', 0),
-                    }
-            
-            return filtered_balance
-            
+            return self.format_balance(self.exchange.fetch_balance(), currency)
         except Exception as e:
             logger.error(f"Error al obtener balance: {e}")
             return {}
     
+    @staticmethod
+    def format_balance(balance: dict[str, Any], currency: str | None = None) -> dict[str, Any]:
+        """Formato de balance que expone la API (una moneda o todas con saldo)"""
+        if currency:
+            return {
+                'currency': currency,
+                'free': balance.get(currency, {}).get('free', 0),
+                'used': balance.get(currency, {}).get('used', 0),
+                'total': balance.get(currency, {}).get('total', 0),
+            }
+        
+        # Filtrar solo monedas con balance > 0
+        filtered_balance = {}
+        for curr, data in balance.items():
+            if curr not in ['free', 'used', 'total', 'info'] and data.get('total', 0) > 0:
+                filtered_balance[curr] = {
+                    'free': data.get('free', 0),
+                    'used': data.get('used', 0),
+                    'total': data.get('total', 0),
+                }
+        
+        return filtered_balance
+    
+    @staticmethod
+    def format_ticker(ticker: dict[str, Any]) -> dict[str, Any]:
+        """Formato reducido de ticker que expone la API"""
+        return {
+            'symbol': ticker['symbol'],
+            'bid': ticker.get('bid'),
+            'ask': ticker.get('ask'),
+            'last': ticker.get('last'),
+            'high': ticker.get('high'),
+            'low': ticker.get('low'),
+            'volume': ticker.get('baseVolume'),
+            'timestamp': ticker.get('timestamp'),
+        }
+    
     def get_ticker(self, pair: str) -> dict[str, Any]:
         """
         Obtiene el ticker de un par
+        Se sirve desde el snapshot compartido de tickers (ver get_tickers).
         
         Args:
             pair: Par de trading (ej: BTC/USDT)
@@ -123,22 +256,87 @@ class ExchangeService:
         Returns:
             Datos del ticker
         """
-        try:
-            ticker = self.exchange.fetch_ticker(pair)
-            return {
-                'symbol': ticker['symbol'],
-                'bid': ticker.get('bid'),
-                'ask': ticker.get('ask'),
-                'last': ticker.get('last'),
-                'high': ticker.get('high'),
-                'low': ticker.get('low'),
-                'volume': ticker.get('baseVolume'),
-                'timestamp': ticker.get('timestamp'),
+        return self.get_tickers([pair]).get(pair, {})
+    
+    def get_tickers(self, pairs: list[str] | None = None) -> dict[str, dict[str, Any]]:
+        """
+        Obtiene los tickers de varios pares con una sola petición
+        Usa fetch_tickers si el exchange lo soporta y guarda el snapshot
+        durante `tickers_ttl` segundos. Cada refresco incluye la pairlist
+        completa, así los pedidos de un solo par también se benefician.
+        Los pares que el exchange no lista quedan fuera del lote (un símbolo
+        desconocido haría fallar fetch_tickers para todos).
+        
+        Args:
+            pairs: Pares a consultar (por defecto: pairlist de config)
+            
+        Returns:
+            Diccionario par -> datos del ticker (solo pares disponibles)
+        """
+        pairs = self.listed_pairs(list(pairs) if pairs else config.pairlist)
+        
+        cached = self.cached_tickers(pairs)
+        if cached is not None:
+            return cached
+        
+        snapshot = self._refresh_tickers(self.ticker_refresh_pairs(pairs))
+        return {p: snapshot[p] for p in pairs if p in snapshot}
+    
+    def cached_tickers(self, pairs: list[str]) -> dict[str, dict[str, Any]] | None:
+        """Tickers desde el snapshot si todos los pares están vigentes, sino None"""
+        with self._tickers_lock:
+            now = time.time()
+            fresh = {
+                p: data for p, (fetched_at, data) in self._tickers_snapshot.items()
+                if now - fetched_at < config.tickers_ttl
             }
+        if all(p in fresh for p in pairs):
+            return {p: fresh[p] for p in pairs}
+        return None
+    
+    def listed_pairs(self, pairs: list[str]) -> list[str]:
+        """
+        Pares que existen en los mercados cargados
+        Si los mercados todavía no están cargados no se filtra nada.
+        """
+        markets = getattr(self._exchange, 'markets', None)
+        if not markets:
+            return list(pairs)
+        return [p for p in pairs if p in markets]
+    
+    def ticker_refresh_pairs(self, pairs: list[str]) -> tuple[str, ...]:
+        """Pares a incluir en un refresco: los pedidos más la pairlist (solo los listados)"""
+        return tuple(sorted(self.listed_pairs(list(set(pairs) | set(config.pairlist)))))
+    
+    def remember_tickers(self, tickers: dict[str, dict[str, Any]]) -> None:
+        """Guarda tickers ya formateados en el snapshot compartido"""
+        fetched_at = time.time()
+        with self._tickers_lock:
+            for pair, data in tickers.items():
+                self._tickers_snapshot[pair] = (fetched_at, data)
+    
+    @coalesce
+    def _refresh_tickers(self, pairs: tuple[str, ...]) -> dict[str, dict[str, Any]]:
+        """Descarga el snapshot de tickers y actualiza la caché compartida"""
+        tickers: dict[str, dict[str, Any]] = {}
+        try:
+            if self.exchange.has.get('fetchTickers'):
+                raw = self.exchange.fetch_tickers(list(pairs))
+                tickers = {p: self.format_ticker(t) for p, t in raw.items() if p in pairs}
+            else:
+                # Un par con error no descarta los demás
+                for pair in pairs:
+                    try:
+                        tickers[pair] = self.format_ticker(self.exchange.fetch_ticker(pair))
+                    except Exception as e:
+                        logger.error(f"Error al obtener ticker de {pair}: {e}")
         except Exception as e:
-            logger.error(f"Error al obtener ticker de {pair}: {e}")
-            return {}
+            logger.error(f"Error al obtener tickers de {', '.join(pairs)}: {e}")
+        
+        self.remember_tickers(tickers)
+        return tickers
     
+    @coalesce
     def get_ohlcv(
         self,
         pair: str,
@@ -157,12 +355,120 @@ class ExchangeService:
             Lista de velas [timestamp, open, high, low, close, volume]
         """
         try:
-            ohlcv = self.exchange.fetch_ohlcv(pair, timeframe, limit=limit)
-            return ohlcv
+            cached = self.cached_ohlcv(pair, timeframe, limit)
+            if cached is not None:
+                return cached
+            stale = self.stale_live_ohlcv(pair, timeframe, limit)
+            if stale is not None:
+                # Solo la vela en curso: las cerradas de la ventana siguen vigentes
+                fetched = self.exchange.fetch_ohlcv(pair, timeframe, since=int(stale[-1][0]), limit=1)
+                return self.complete_live_refresh(pair, timeframe, stale, fetched)
+            
+            now = now_ms()
+            request = self.plan_ohlcv_fetch(pair, timeframe, limit, now)
+            fetched = self.exchange.fetch_ohlcv(pair, timeframe, **request)
+            return self.complete_ohlcv_fetch(pair, timeframe, limit, now, request, fetched)
         except Exception as e:
             logger.error(f"Error al obtener OHLCV de {pair}: {e}")
             return []
     
+    def cached_ohlcv(self, pair: str, timeframe: str, limit: int) -> list[list] | None:
+        """Velas desde la caché en memoria (None si no hay entrada vigente)"""
+        if self._ohlcv_cache is None:
+            return None
+        return self._ohlcv_cache.get(pair, timeframe, limit)
+    
+    def stale_live_ohlcv(self, pair: str, timeframe: str, limit: int) -> list[list] | None:
+        """Ventana en caché cuya vela en curso venció (None si no hay o vence entera)"""
+        if self._ohlcv_cache is None:
+            return None
+        return self._ohlcv_cache.get(pair, timeframe, limit, stale_live=True)
+    
+    def complete_live_refresh(
+        self, pair: str, timeframe: str, stale: list[list], fetched: list[list]
+    ) -> list[list]:
+        """
+        Ventana con la vela en curso recién descargada
+        Si el exchange no la devuelve (ej: justo cerró) se usa la de la caché:
+        la ventana entera vence en el cierre y la próxima llamada la descarga.
+        """
+        live = [c for c in fetched if c[0] == stale[-1][0]]
+        if not live:
+            return stale
+        self._ohlcv_cache.refresh_live(pair, timeframe, live[-1])
+        return [*stale[:-1], live[-1]]
+    
+    def plan_ohlcv_fetch(self, pair: str, timeframe: str, limit: int, now: int) -> dict[str, int]:
+        """
+        Decide qué pedir al exchange según el almacén local
+        Solo se piden las velas posteriores a la última guardada; se descarga
+        la ventana completa si no hay histórico, es más corto que la ventana
+        pedida o hay un hueco mayor a ella.
+        
+        Returns:
+            Argumentos para fetch_ohlcv: {'limit'} o {'since', 'limit'}
+        """
+        store = self._candle_store
+        if store is None:
+            return {'limit': limit}
+        
+        name = self._exchange_name
+        tf_ms = timeframe_to_msecs(timeframe)
+        last_ts = store.last_timestamp(name, pair, timeframe)
+        if last_ts is None:
+            return {'limit': limit}
+        
+        missing = (now - last_ts) // tf_ms
+        short_history = (
+            store.count(name, pair, timeframe) < limit - 1
+            and (pair, timeframe) not in self._short_history
+        )
+        if short_history or missing >= limit:
+            return {'limit': limit}
+        
+        # Top-up incremental: velas nuevas desde la última almacenada
+        return {'since': last_ts + tf_ms, 'limit': missing + 1}
+    
+    def complete_ohlcv_fetch(
+        self,
+        pair: str,
+        timeframe: str,
+        limit: int,
+        now: int,
+        request: dict[str, int],
+        fetched: list[list]
+    ) -> list[list]:
+        """
+        Persiste las velas cerradas recibidas y arma la ventana pedida
+        La vela en curso (aún abierta) nunca se persiste.
+        
+        Returns:
+            Lista de velas [timestamp, open, high, low, close, volume]
+        """
+        store = self._candle_store
+        name = self._exchange_name
+        tf_ms = timeframe_to_msecs(timeframe)
+        
+        if store is None:
+            ohlcv = fetched
+        elif 'since' not in request:
+            closed = [c for c in fetched if c[0] + tf_ms <= now]
+            if closed:
+                store.merge(name, pair, timeframe, closed, tf_ms)
+            if len(fetched) < limit:
+                # El exchange no tiene más historia: no repetir la descarga completa
+                self._short_history.add((pair, timeframe))
+            ohlcv = fetched
+        else:
+            closed = [c for c in fetched if c[0] + tf_ms <= now]
+            live = [c for c in fetched if c[0] + tf_ms > now]
+            store.append(name, pair, timeframe, closed)
+            ohlcv = store.read(name, pair, timeframe, limit - len(live)) + live
+        
+        if self._ohlcv_cache is not None:
+            self._ohlcv_cache.put(pair, timeframe, limit, ohlcv)
+        return ohlcv
+    
     def create_order(
         self,
         pair: str,
@@ -278,7 +584,7 @@ class ExchangeService:
     
     def validate_pair(self, pair: str) -> bool:
         """Valida si un par existe en el exchange"""
-        return pair in self.exchange.markets
+        return pair in (self.exchange.markets or {})
 
 
 # Instancia global del servicio (lazy loading)
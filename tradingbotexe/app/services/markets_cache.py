@@ -0,0 +1,60 @@
+"""
+Caché en disco de metadatos de mercados del exchange
+Permite arrancar sin esperar a load_markets(): los mercados se cargan
+del archivo y se refrescan en segundo plano.
+"""
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class MarketsCache:
+    """Archivo JSON con markets + currencies de un exchange"""
+
+    def __init__(self, cache_dir: str | Path, exchange_name: str):
+        self._path = Path(cache_dir) / f"markets_{exchange_name}.json"
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def load(self) -> dict[str, Any] | None:
+        """
+        Lee la caché
+
+        Returns:
+            {'markets', 'currencies', 'saved_at'} o None si no existe / es inválida
+        """
+        try:
+            with open(self._path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not data.get('markets'):
+                return None
+            return data
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Caché de mercados inválida ({self._path}): {e}")
+            return None
+
+    def save(self, markets: dict[str, Any], currencies: dict[str, Any] | None) -> None:
+        """Guarda los mercados de forma atómica"""
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'saved_at': time.time(),
+                'markets': markets,
+                'currencies': currencies or {},
+            }, f)
+        os.replace(tmp_path, self._path)
+
+    @staticmethod
+    def age_seconds(data: dict[str, Any]) -> float:
+        """Antigüedad de una caché leída con load()"""
+        return time.time() - data.get('saved_at', 0)
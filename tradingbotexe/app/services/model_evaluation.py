@@ -0,0 +1,187 @@
+"""
+Evaluación walk-forward de los modelos de la IA
+Cada modelo publicado predice velas que no vio al entrenar: cuando cierra la
+vela siguiente y su target se conoce, esas probabilidades se agregan al
+historial de (par, timeframe, conjunto de features). La accuracy, la
+precisión y la calibración se actualizan así con un fold nuevo por vela
+cerrada (una sola predict_proba del modelo anterior) en lugar de repetir la
+validación cruzada en cada entrenamiento. Solo el primer entrenamiento, sin
+historial, lo arranca con folds walk-forward sobre sus datos
+(AIPredictor.train). Las métricas se guardan ya calculadas: devolverlas con
+cada predicción no cuesta nada.
+"""
+import json
+import logging
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+# Tramos de probabilidad de la curva de calibración
+CALIBRATION_BINS = 5
+
+
+def evaluation_metrics(proba: np.ndarray, target: np.ndarray) -> dict:
+    """
+    Métricas fuera de muestra de un historial de predicciones
+
+    Args:
+        proba: Probabilidad de subida predicha en cada vela
+        target: Target real (1 = subida significativa)
+
+    Returns:
+        accuracy, precisión de las subidas, Brier score y calibración por tramos
+    """
+    predicted = proba > 0.5     # Mismo umbral que predict()
+    hits = predicted == (target == 1)
+    positives = int(predicted.sum())
+    bins = np.minimum((proba * CALIBRATION_BINS).astype(int), CALIBRATION_BINS - 1)
+    calibration = []
+    for b in range(CALIBRATION_BINS):
+        in_bin = bins == b
+        if not in_bin.any():
+            continue
+        calibration.append({
+            "range": [b / CALIBRATION_BINS, (b + 1) / CALIBRATION_BINS],
+            "predicted": round(float(proba[in_bin].mean()), 4),
+            "observed": round(float(target[in_bin].mean()), 4),
+            "count": int(in_bin.sum()),
+        })
+    return {
+        "samples": len(proba),
+        "accuracy": round(float(hits.mean()), 4),
+        "precision": round(float(target[predicted].mean()), 4) if positives else None,
+        "positives": positives,
+        "brier": round(float(np.mean((proba - target) ** 2)), 4),
+        "calibration": calibration,
+    }
+
+
+class ModelEvaluator:
+    """
+    Historial walk-forward (vela, probabilidad, target) por (par, timeframe,
+    conjunto de features), acotado a las últimas `window` velas
+
+    Uso:
+        model_evaluator.score(pair, tf, fs, previous, X, y, timestamps)   # fold de la vela nueva
+        model_evaluator.metrics(pair, tf, fs)                            # O(1)
+    """
+
+    def __init__(self, base_dir: str | Path, window: int = 500):
+        self._dir = Path(base_dir)
+        self._window = window
+        self._history: dict[tuple[str, str, str], dict] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, pair: str, timeframe: str, feature_set: str) -> Path:
+        """Ruta del historial (ej: models/BTC_USDT-1d-3f2a9c1b.evaluation.json)"""
+        safe_pair = pair.replace('/', '_').replace(':', '_')
+        return self._dir / f"{safe_pair}-{timeframe}-{feature_set}.evaluation.json"
+
+    def _entry(self, key: tuple[str, str, str]) -> dict | None:
+        """Historial en memoria o desde disco (llamar con el lock tomado)"""
+        entry = self._history.get(key)
+        if entry is not None:
+            return entry
+        path = self.path_for(*key)
+        if not path.exists():
+            return None
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"No se pudo cargar la evaluación {path.name}: {e}")
+            return None
+        self._history[key] = entry
+        return entry
+
+    def last_timestamp(self, pair: str, timeframe: str, feature_set: str) -> int | None:
+        """Última vela evaluada (None si no hay historial)"""
+        with self._lock:
+            entry = self._entry((pair, timeframe, feature_set))
+        if entry is None or not entry['timestamps']:
+            return None
+        return entry['timestamps'][-1]
+
+    def metrics(self, pair: str, timeframe: str, feature_set: str) -> dict | None:
+        """Métricas ya calculadas del historial (None si no hay)"""
+        with self._lock:
+            entry = self._entry((pair, timeframe, feature_set))
+        return entry['metrics'] if entry is not None else None
+
+    def record(
+        self,
+        pair: str,
+        timeframe: str,
+        feature_set: str,
+        timestamps: np.ndarray,
+        proba: np.ndarray,
+        target: np.ndarray,
+    ) -> dict | None:
+        """
+        Agrega predicciones fuera de muestra (solo velas posteriores a la última
+        registrada) y recalcula las métricas
+
+        Returns:
+            Métricas actualizadas
+        """
+        key = (pair, timeframe, feature_set)
+        with self._lock:
+            entry = self._entry(key) or {'timestamps': [], 'proba': [], 'target': [], 'metrics': None}
+            last = entry['timestamps'][-1] if entry['timestamps'] else None
+            new = np.ones(len(timestamps), dtype=bool) if last is None else np.asarray(timestamps) > last
+            if not new.any():
+                return entry['metrics']
+
+            entry['timestamps'] = (entry['timestamps'] + [int(t) for t in np.asarray(timestamps)[new]])[-self._window:]
+            entry['proba'] = (entry['proba'] + [float(p) for p in np.asarray(proba)[new]])[-self._window:]
+            entry['target'] = (entry['target'] + [int(t) for t in np.asarray(target)[new]])[-self._window:]
+            entry['metrics'] = evaluation_metrics(np.array(entry['proba']), np.array(entry['target']))
+            self._history[key] = entry
+            self._save(self.path_for(*key), entry)
+            return entry['metrics']
+
+    @staticmethod
+    def _save(path: Path, entry: dict) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            tmp.write_text(json.dumps(entry))
+            tmp.replace(path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar la evaluación {path.name}: {e}")
+
+    def score(self, pair: str, timeframe: str, feature_set: str, previous, X, y, timestamps) -> dict | None:
+        """
+        Fold walk-forward de las velas cerradas nuevas: el modelo anterior
+        (entrenado con velas previas a previous.candle_ts) predice las filas
+        que no vio y cuyo target ya se conoce
+
+        Args:
+            previous: Último TrainedModel publicado o None
+            X, y, timestamps: Filas de entrenamiento del modelo nuevo (AIPredictor.training_arrays)
+
+        Returns:
+            Métricas actualizadas (None si todavía no hay historial)
+        """
+        last = self.last_timestamp(pair, timeframe, feature_set)
+        if previous is None or last is None:
+            # Sin historial: lo arranca el entrenamiento con folds walk-forward
+            return self.metrics(pair, timeframe, feature_set)
+        unseen = (timestamps >= previous.candle_ts) & (timestamps > last)
+        if not unseen.any():
+            return self.metrics(pair, timeframe, feature_set)
+        proba = previous.model.predict_proba(X[unseen])[:, 1]
+        return self.record(pair, timeframe, feature_set, timestamps[unseen], proba, y[unseen])
+
+    def clear(self) -> None:
+        """Vacía el historial en memoria (los archivos se conservan)"""
+        with self._lock:
+            self._history.clear()
+
+
+# Instancia global
+model_evaluator = ModelEvaluator(config.ai_models_dir, config.ai_evaluation_window)
@@ -0,0 +1,232 @@
+"""
+Registro persistente de modelos de la IA (.npz)
+Un modelo entrenado sirve hasta que cierra una nueva vela: se guarda en disco
+con su puntuación de validación, indexado por (par, timeframe, conjunto de
+features, última vela cerrada). Cada análisis solo carga el modelo (desde la
+LRU en memoria o desde disco) y ejecuta predict_proba; el entrenamiento
+ocurre una vez por vela cerrada.
+
+Los modelos se guardan compilados (app.core.tree_model): arrays de NumPy sin
+pickle, así que cargarlos y predecir no importa scikit-learn.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from app.config import config
+from app.core.binned_dataset import BinnedDataset
+from app.core.tree_model import CompiledTrees
+from app.utils.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TrainedModel:
+    """Modelo entrenado y sus metadatos"""
+    model: CompiledTrees
+    score: float            # Accuracy walk-forward al publicarlo (app.services.model_evaluation)
+    candle_ts: int          # Última vela cerrada usada en el entrenamiento (ms)
+    samples: int            # Filas de entrenamiento
+    trained_at: float       # Epoch en segundos
+    train_seconds: float
+    pairs: tuple[str, ...] = ()     # Modelo conjunto (ai.pooled): par de cada pair_id
+
+
+# Campos de TrainedModel guardados junto a los arrays del modelo
+METADATA = ('score', 'candle_ts', 'samples', 'trained_at', 'train_seconds', 'pairs')
+
+
+class ModelRegistry:
+    """
+    Modelos por (par, timeframe, conjunto de features)
+    Solo se conserva el de la última vela cerrada: un modelo de una vela
+    anterior se reemplaza al entrenar el nuevo.
+    """
+
+    def __init__(self, models_dir: str | Path, max_models: int = 32):
+        self._dir = Path(models_dir)
+        self._max_models = max_models
+        self._models: OrderedDict[tuple[str, str, str], TrainedModel] = OrderedDict()
+        self._lock = threading.Lock()
+        # Peticiones simultáneas del mismo modelo entrenan una sola vez
+        self._inflight = SingleFlight()
+        self.hits = 0
+        self.loads = 0
+        self.trainings = 0
+
+    def path_for(self, pair: str, timeframe: str, feature_set: str) -> Path:
+        """Ruta del modelo (ej: models/BTC_USDT-1d-3f2a9c1b.npz)"""
+        safe_pair = pair.replace('/', '_').replace(':', '_')
+        return self._dir / f"{safe_pair}-{timeframe}-{feature_set}.npz"
+
+    def dataset_for(self, pair: str, timeframe: str, feature_set: str, pairs: tuple[str, ...] = ()) -> BinnedDataset:
+        """
+        Filas pre-binneadas y estimador para warm start del modelo
+        (ej: models/BTC_USDT-1d-3f2a9c1b.bins); solo los lee el proceso que entrena
+
+        Args:
+            pairs: Pares del modelo conjunto (si cambian, el entrenamiento es completo)
+        """
+        return BinnedDataset(
+            self.path_for(pair, timeframe, feature_set).with_suffix('.bins'),
+            refit_every=config.ai_refit_every,
+            warm_iterations=config.ai_warm_iterations,
+            signature=tuple(pairs),
+        )
+
+    def latest(self, pair: str, timeframe: str, feature_set: str) -> TrainedModel | None:
+        """Último modelo publicado para el par, de la vela que sea (memoria o disco)"""
+        key = (pair, timeframe, feature_set)
+        with self._lock:
+            trained = self._models.get(key)
+            if trained is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return trained
+
+        trained = self._load(self.path_for(*key))
+        if trained is None:
+            return None
+        self.loads += 1
+        self._remember(key, trained)
+        return trained
+
+    def get(self, pair: str, timeframe: str, feature_set: str, candle_ts: int) -> TrainedModel | None:
+        """
+        Modelo entrenado hasta `candle_ts` (memoria o disco)
+
+        Returns:
+            TrainedModel o None si no existe o es de otra vela
+        """
+        trained = self.latest(pair, timeframe, feature_set)
+        if trained is None or trained.candle_ts != candle_ts:
+            return None
+        return trained
+
+    def put(self, pair: str, timeframe: str, feature_set: str, trained: TrainedModel) -> None:
+        """
+        Publica el modelo en memoria y en disco (reemplaza el de la vela anterior)
+        Las lecturas ven el modelo anterior o el nuevo, nunca uno a medio escribir.
+        """
+        key = (pair, timeframe, feature_set)
+        if not self._remember(key, trained):
+            return
+        path = self.path_for(*key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            with open(tmp, 'wb') as f:
+                np.savez(f, **trained.model.to_arrays(), **{field: getattr(trained, field) for field in METADATA})
+            tmp.replace(path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el modelo {path.name}: {e}")
+
+    def get_or_train(
+        self,
+        pair: str,
+        timeframe: str,
+        feature_set: str,
+        candle_ts: int,
+        train: Callable[[], tuple[CompiledTrees, float, int]],
+        pairs: tuple[str, ...] = (),
+    ) -> TrainedModel:
+        """
+        Modelo registrado o entrenado con `train` si no existe para esta vela
+        (o si es el modelo conjunto y le falta alguno de `pairs`)
+
+        Args:
+            pair: Par de trading (o AIPredictor.POOLED_KEY)
+            timeframe: Timeframe de las velas
+            feature_set: Identificador de features e hiperparámetros del modelo
+            candle_ts: Última vela cerrada de los datos de entrenamiento (ms)
+            train: Devuelve (modelo, score, filas de entrenamiento)
+            pairs: Par de cada pair_id si es el modelo conjunto (ai.pooled)
+
+        Returns:
+            TrainedModel
+        """
+        trained = self.get(pair, timeframe, feature_set, candle_ts)
+        if trained is not None and set(pairs) <= set(trained.pairs):
+            return trained
+        return self._inflight.do(
+            (pair, timeframe, feature_set, candle_ts, tuple(pairs)),
+            self._train, pair, timeframe, feature_set, candle_ts, train, pairs,
+        )
+
+    def _train(
+        self, pair: str, timeframe: str, feature_set: str, candle_ts: int, train: Callable, pairs: tuple[str, ...]
+    ) -> TrainedModel:
+        # Otra petición pudo terminar el entrenamiento mientras esperábamos
+        trained = self.get(pair, timeframe, feature_set, candle_ts)
+        if trained is not None and set(pairs) <= set(trained.pairs):
+            return trained
+
+        began = time.perf_counter()
+        model, score, samples = train()
+        trained = TrainedModel(
+            model=model,
+            score=score,
+            candle_ts=candle_ts,
+            samples=samples,
+            trained_at=time.time(),
+            train_seconds=round(time.perf_counter() - began, 3),
+            pairs=tuple(pairs),
+        )
+        self.trainings += 1
+        logger.info(f"Modelo IA {pair} {timeframe} entrenado en {trained.train_seconds:.2f}s (accuracy walk-forward {score:.3f})")
+        self.put(pair, timeframe, feature_set, trained)
+        return trained
+
+    def _remember(self, key: tuple[str, str, str], trained: TrainedModel) -> bool:
+        with self._lock:
+            current = self._models.get(key)
+            if current is not None and current.candle_ts > trained.candle_ts:
+                # Ya hay un modelo de una vela más reciente
+                return False
+            self._models[key] = trained
+            self._models.move_to_end(key)
+            while len(self._models) > self._max_models:
+                self._models.popitem(last=False)
+        return True
+
+    def _load(self, path: Path) -> TrainedModel | None:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as arrays:
+                return TrainedModel(
+                    model=CompiledTrees.from_arrays(arrays),
+                    score=float(arrays['score']),
+                    candle_ts=int(arrays['candle_ts']),
+                    samples=int(arrays['samples']),
+                    trained_at=float(arrays['trained_at']),
+                    train_seconds=float(arrays['train_seconds']),
+                    # Modelos guardados antes del modelo conjunto no tienen pairs
+                    pairs=tuple(str(pair) for pair in arrays['pairs']) if 'pairs' in arrays else (),
+                )
+        except Exception as e:
+            # Archivo corrupto o de otro formato: se reentrena
+            logger.warning(f"No se pudo cargar el modelo {path.name}: {e}")
+            return None
+
+    def stats(self) -> dict:
+        """Modelos en memoria y contadores de uso"""
+        with self._lock:
+            cached = len(self._models)
+        return {"cached": cached, "hits": self.hits, "loads": self.loads, "trainings": self.trainings}
+
+    def clear(self) -> None:
+        """Vacía la LRU en memoria (los archivos se conservan)"""
+        with self._lock:
+            self._models.clear()
+
+
+# Instancia global
+model_registry = ModelRegistry(config.ai_models_dir, config.ai_model_cache_size)
@@ -1 +1,36 @@
 # Flask Trading Bot - Strategies Module
+from app.strategies.bollinger_strategy import BollingerStrategy
+from app.strategies.crypto_swing_v1 import CryptoSwingV1
+from app.strategies.macd_strategy import MacdStrategy
+from app.strategies.rsi_divergence_strategy import RsiDivergenceStrategy
+from app.strategies.trend_strategy import TrendStrategy
+from app.strategies.turtle_soup_strategy import TurtleSoupStrategy
+
+# Estrategias consultadas por el análisis (el orden define la matriz del dashboard)
+STRATEGY_REGISTRY = [
+    {"id": "swing_v1", "name": "CryptoSwing V1 (Master)", "cls": CryptoSwingV1, "main": True},
+    {"id": "turtle", "name": "Turtle Soup (Liquidity)", "cls": TurtleSoupStrategy, "main": False},
+    {"id": "rsi_div", "name": "RSI Divergence", "cls": RsiDivergenceStrategy, "main": False},
+    {"id": "trend", "name": "Classic Trend (RSI)", "cls": TrendStrategy, "main": False},
+    {"id": "macd", "name": "Momentum MACD", "cls": MacdStrategy, "main": False},
+    {"id": "bollinger", "name": "Volatilidad Bollinger", "cls": BollingerStrategy, "main": False}
+]
+
+
+def get_strategy(strategy_id: str) -> type:
+    """Clase de estrategia registrada con ese id"""
+    for meta in STRATEGY_REGISTRY:
+        if meta["id"] == strategy_id:
+            return meta["cls"]
+    raise KeyError(f"Estrategia desconocida: {strategy_id}")
+
+
+def max_startup_candles() -> int:
+    """Mayor startup_candle_count de las estrategias registradas (0 si alguna usa todo el histórico)"""
+    counts = [meta["cls"].startup_candle_count for meta in STRATEGY_REGISTRY]
+    return 0 if min(counts) <= 0 else max(counts)
+
+
+def strategy_timeframes() -> list[str]:
+    """Timeframes usados por las estrategias registradas"""
+    return sorted({meta["cls"].timeframe for meta in STRATEGY_REGISTRY})
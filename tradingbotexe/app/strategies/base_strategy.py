@@ -2,9 +2,16 @@
 Base Strategy Class
 Sigue la estructura estándar de Freqtrade para facilitar la migración de estrategias.
 """
+import copy
+
+import numpy as np
 import pandas as pd
-import pandas_ta as pta # Usamos pandas_ta como alternativa moderna a TA-Lib
 from abc import ABC, abstractmethod
+from typing import Any
+
+from app.core.indicators import Indicator, IndicatorEngine, IndicatorSpec
+from app.core.panel import PanelEngine
+from app.strategies.parameters import BaseParameter
 
 class BaseStrategy(ABC):
     # Configuración de Estrategia
@@ -21,8 +28,61 @@ class BaseStrategy(ABC):
     use_rsi = True
     use_bollinger = True
 
-    def __init__(self, config=None):
+    # Calcular rsi/atr/adx/bbands/macd con app.core.kernels (mismos valores, sin Series intermedias)
+    use_fast_kernels = False
+
+    # Velas de histórico para que los indicadores de la última vela sean estables
+    # (0 = usar todas las velas disponibles)
+    startup_candle_count = 0
+
+    # Indicadores que usa la estrategia, declarados con app.core.indicators.requires
+    # El análisis los calcula una sola vez junto con los del resto de estrategias
+    # (con los valores por defecto de los parámetros optimizables)
+    required_indicators: tuple[IndicatorSpec, ...] = ()
+
+    # Velas anteriores que leen las reglas de entrada/salida (mayor shift usado)
+    # None = desconocido: populate_signals evalúa siempre todo el histórico
+    signal_lookback: int | None = None
+
+    def __init__(self, config=None, indicators: IndicatorEngine | None = None, params: dict[str, Any] | None = None):
         self.config = config
+        # Motor de indicadores compartido con otras estrategias (mismas velas)
+        self.indicators = indicators
+        # Copia propia de cada parámetro optimizable (por defecto o el de `params`)
+        params = params or {}
+        for name, parameter in self.parameters().items():
+            bound = copy.copy(parameter)
+            bound.value = parameter.cast(params[name]) if name in params else parameter.default
+            setattr(self, name, bound)
+
+    @classmethod
+    def parameters(cls) -> dict[str, BaseParameter]:
+        """Parámetros optimizables declarados en la clase (ver app.strategies.parameters)"""
+        return {
+            name: value for name in dir(cls)
+            if isinstance(value := getattr(cls, name), BaseParameter)
+        }
+
+    def parameter_values(self) -> dict[str, Any]:
+        """Valores actuales de los parámetros de esta instancia"""
+        return {name: getattr(self, name).value for name in self.parameters()}
+
+    @classmethod
+    def analysis_window(cls, available: int) -> int:
+        """Velas (las más recientes) sobre las que se evalúa la estrategia"""
+        if cls.startup_candle_count <= 0:
+            return available
+        return min(cls.startup_candle_count, available)
+
+    def indicator(self, dataframe: pd.DataFrame, name: str, source: str = 'close', **params) -> Indicator:
+        """
+        Indicador memoizado (ver app.core.indicators)
+        Si el motor recibido no corresponde a estas velas se crea uno propio.
+        """
+        if self.indicators is None or not self.indicators.covers(dataframe):
+            self.indicators = IndicatorEngine(dataframe)
+        kernels = True if self.use_fast_kernels else None
+        return self.indicators.get(name, source, kernels=kernels, **params)
 
     @abstractmethod
     def populate_indicators(self, dataframe: pd.DataFrame) -> pd.DataFrame:
@@ -32,14 +92,14 @@ class BaseStrategy(ABC):
         """
         # Ejemplo de implementación base
         if self.use_rsi:
-            dataframe['rsi'] = pta.rsi(dataframe['close'], length=14)
+            dataframe['rsi'] = self.indicator(dataframe, 'rsi', length=14)
             
         if self.use_bollinger:
-            bollinger = pta.bbands(dataframe['close'], length=20, std=2)
+            bollinger = self.indicator(dataframe, 'bbands', length=20, std=2.0)
             if bollinger is not None:
-                dataframe['bb_upper'] = bollinger['BBU_20_2.0']
-                dataframe['bb_middle'] = bollinger['BBM_20_2.0']
-                dataframe['bb_lower'] = bollinger['BBL_20_2.0']
+                dataframe['bb_upper'] = bollinger['upper']
+                dataframe['bb_middle'] = bollinger['mid']
+                dataframe['bb_lower'] = bollinger['lower']
                 
         return dataframe
 
@@ -59,6 +119,52 @@ class BaseStrategy(ABC):
         """
         return dataframe
 
+    def populate_signals(self, dataframe: pd.DataFrame, tail: int | None = None) -> pd.DataFrame:
+        """
+        Aplica populate_entry_trend y populate_exit_trend
+
+        Args:
+            dataframe: Velas con los indicadores de populate_indicators
+            tail: Evaluar solo las últimas `tail` velas (análisis en vivo); None = todo
+                el histórico (gráficos, backtests)
+
+        Returns:
+            DataFrame con enter_long / exit_long (solo las últimas `tail` filas si se indica)
+        """
+        if tail is not None and self.signal_lookback is not None:
+            # Las reglas leen hasta signal_lookback velas atrás: basta con esa cola
+            dataframe = dataframe.iloc[-(tail + self.signal_lookback):].copy()
+        dataframe = self.populate_entry_trend(dataframe)
+        dataframe = self.populate_exit_trend(dataframe)
+        return dataframe if tail is None else dataframe.iloc[-tail:]
+
+    def batch_signals(self, indicators: PanelEngine) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Señales de entrada/salida de varios pares a la vez (ver app.core.panel)
+        Por defecto evalúa cada par con populate_*; las estrategias pueden
+        sobrescribirlo con las mismas reglas sobre arrays (pares x tiempo).
+
+        Args:
+            indicators: Motor de indicadores del panel de velas
+
+        Returns:
+            (enter_long, exit_long) como arrays booleanos (pares x tiempo)
+        """
+        panel = indicators.panel
+        enter = np.zeros(panel.shape, dtype=bool)
+        exit_ = np.zeros(panel.shape, dtype=bool)
+        for row in range(len(panel.pairs)):
+            df, positions = panel.frame(row)
+            if df.empty:
+                continue
+            self.indicators = IndicatorEngine(df)
+            df = self.populate_indicators(df)
+            df = self.populate_entry_trend(df)
+            df = self.populate_exit_trend(df)
+            enter[row, positions] = df['enter_long'].to_numpy() == 1
+            exit_[row, positions] = df['exit_long'].to_numpy() == 1
+        return enter, exit_
+
     def should_sell_roi(self, trade_duration_minutes: int, current_profit: float) -> bool:
         """
         Implementación del ALGORITMO ROI de Freqtrade.
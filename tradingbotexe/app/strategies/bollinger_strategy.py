@@ -1,4 +1,6 @@
 from .base_strategy import BaseStrategy
+from app.core.indicators import requires
+from app.core.panel import shift
 
 class BollingerStrategy(BaseStrategy):
     """
@@ -13,16 +15,23 @@ class BollingerStrategy(BaseStrategy):
     
     stoploss = -0.10
     timeframe = '1d'
+
+    # Bollinger 20 comparado con la vela anterior
+    startup_candle_count = 30
+
+    required_indicators = (
+        requires('bbands_sample', length=20, std=2.0),
+    )
+
+    # Cierre anterior bajo la banda inferior
+    signal_lookback = 1
     
     def populate_indicators(self, dataframe):
-        closes = dataframe['close']
+        # Bollinger Bands (desviación muestral, compartidas con TrendStrategy)
+        bb = self.indicator(dataframe, 'bbands_sample', length=20, std=2.0)
         
-        # Bollinger Bands (Calculadas manualmente)
-        sma = closes.rolling(window=20).mean()
-        std = closes.rolling(window=20).std()
-        
-        dataframe['bb_upper'] = sma + (std * 2)
-        dataframe['bb_lower'] = sma - (std * 2)
+        dataframe['bb_upper'] = bb['upper']
+        dataframe['bb_lower'] = bb['lower']
         
         return dataframe
 
@@ -53,3 +62,12 @@ class BollingerStrategy(BaseStrategy):
         
         dataframe.loc[conditions, 'exit_long'] = 1
         return dataframe
+
+    def batch_signals(self, indicators):
+        # Mismas reglas que populate_entry_trend / populate_exit_trend sobre arrays
+        close, open_ = indicators.column('close'), indicators.column('open')
+        bb = indicators.get('bbands_sample', length=20, std=2.0)
+
+        enter = (shift(close) < shift(bb['lower'])) & (close > open_) & (close > bb['lower'])
+        exit_ = close > bb['upper']
+        return enter, exit_
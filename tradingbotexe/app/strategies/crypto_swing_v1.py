@@ -1,6 +1,8 @@
 from .base_strategy import BaseStrategy
+from .parameters import DecimalParameter, IntParameter
+from app.core.indicators import requires
+from app.core.panel import shift
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
 
 class CryptoSwingV1(BaseStrategy):
@@ -17,50 +19,70 @@ class CryptoSwingV1(BaseStrategy):
     
     # Kill Switch Global (Stoploss de emergencia)
     stoploss = -0.99 
+
+    # SMA 200 + pendiente de 10 velas, con margen para que ADX/ATR (Wilder) converjan
+    startup_candle_count = 230
+
+    required_indicators = (
+        requires('sma', length=200),
+        requires('atr', length=14),
+        requires('adx', length=14),
+        requires('rolling_max', 'high', length=20),
+        requires('rolling_min', 'low', length=10),
+        requires('bbands', length=20, std=2.0),
+        requires('rsi', length=14),
+    )
+
+    # Las reglas comparan con la vela anterior (donchian/trailing stop)
+    signal_lookback = 1
+
+    # Parámetros optimizables (hyperopt.py)
+    buy_adx = IntParameter(15, 40, default=25, space='buy')
+    buy_donchian_high = IntParameter(10, 40, default=20, space='buy')
+    sell_donchian_low = IntParameter(5, 30, default=10, space='sell')
+    sell_atr_multiplier = DecimalParameter(1.5, 5.0, default=3.0, decimals=1, space='sell')
     
     def populate_indicators(self, df):
-        # --- 1. Indicadores Generales (Pandas TA) ---
+        # --- 1. Indicadores Generales (Pandas TA, vía motor compartido) ---
         closes = df['close']
-        highs = df['high']
-        lows = df['low']
         
         # SMA 200 y Slope
-        df['sma_200'] = ta.sma(closes, length=200)
+        df['sma_200'] = self.indicator(df, 'sma', length=200)
         # Calculamos slope manualmente porque ta.slope a veces varía en implementación
         df['sma_200_slope'] = df['sma_200'].diff(10)
         
         # ATR 14 (Standard Wilder)
-        df['atr_14'] = ta.atr(highs, lows, closes, length=14)
+        df['atr_14'] = self.indicator(df, 'atr', length=14)
         
         # ADX 14 (Standard Wilder)
-        # pandas_ta devuelve un DF con ADX_14, DMP_14, DMN_14
-        adx_df = ta.adx(highs, lows, closes, length=14)
-        df['adx'] = adx_df['ADX_14']
+        # El motor devuelve un DF con adx, dmp, dmn
+        adx_df = self.indicator(df, 'adx', length=14)
+        df['adx'] = adx_df['adx']
         
         # --- 2. Indicadores Modulo TREND (Donchian) ---
-        df['donchian_high_20'] = highs.rolling(window=20).max()
-        df['donchian_low_10'] = lows.rolling(window=10).min()
+        df['donchian_high_20'] = self.indicator(df, 'rolling_max', 'high', length=self.buy_donchian_high.value)
+        df['donchian_low_10'] = self.indicator(df, 'rolling_min', 'low', length=self.sell_donchian_low.value)
         
         # Trailing Ratchet (Chandelier Exit Proxy)
         # Highest High reciente (20d) - 3 * ATR
         # Nota: En sistemas 'Real Money', usaríamos un acumulador trade-aware.
-        df['trend_atr_stop'] = df['donchian_high_20'] - (df['atr_14'] * 3.0)
+        df['trend_atr_stop'] = df['donchian_high_20'] - (df['atr_14'] * self.sell_atr_multiplier.value)
         
         # --- 3. Indicadores Modulo RANGE (Bollinger & RSI) ---
         # Bollinger Bands (20, 2.0)
-        bb = ta.bbands(closes, length=20, std=2.0)
-        df['bb_upper'] = bb['BBU_20_2.0']
-        df['bb_lower'] = bb['BBL_20_2.0']
-        df['bb_mid'] = bb['BBM_20_2.0']
+        bb = self.indicator(df, 'bbands', length=20, std=2.0)
+        df['bb_upper'] = bb['upper']
+        df['bb_lower'] = bb['lower']
+        df['bb_mid'] = bb['mid']
         
         # RSI 14
-        df['rsi'] = ta.rsi(closes, length=14)
+        df['rsi'] = self.indicator(df, 'rsi', length=14)
         
         # --- 4. REGIME FILTER (3 Estados) ---
         # Estado 1: TREND_UP (Alcista Fuerte)
         # ADX>25, Precio > SMA200, SMA subiendo
         cond_trend = (
-            (df['adx'] > 25) &
+            (df['adx'] > self.buy_adx.value) &
             (closes > df['sma_200']) &
             (df['sma_200_slope'] > 0)
         )
@@ -126,3 +148,31 @@ class CryptoSwingV1(BaseStrategy):
         
         df.loc[cond_trend_exit | cond_atr_exit | cond_range_exit, 'exit_long'] = 1
         return df
+
+    def batch_signals(self, indicators):
+        # Mismas reglas que populate_indicators / populate_entry_trend / populate_exit_trend sobre arrays
+        close = indicators.column('close')
+        sma_200 = indicators.get('sma', length=200)
+        sma_200_slope = sma_200 - shift(sma_200, 10)
+        atr_14 = indicators.get('atr', length=14)
+        adx = indicators.get('adx', length=14)['adx']
+        donchian_high_20 = indicators.get('rolling_max', 'high', length=self.buy_donchian_high.value)
+        donchian_low_10 = indicators.get('rolling_min', 'low', length=self.sell_donchian_low.value)
+        trend_atr_stop = donchian_high_20 - (atr_14 * self.sell_atr_multiplier.value)
+        bb = indicators.get('bbands', length=20, std=2.0)
+        rsi = indicators.get('rsi', length=14)
+
+        # Régimen: TREND_UP / RANGE / BEAR (resto)
+        trend = (adx > self.buy_adx.value) & (close > sma_200) & (sma_200_slope > 0)
+        range_ = (close > sma_200) & ~trend
+
+        enter = (
+            (trend & (close > shift(donchian_high_20))) |
+            (range_ & (close < bb['lower']) & (rsi < 35))
+        )
+        exit_ = (
+            (trend & (close < shift(donchian_low_10))) |
+            (trend & (close < shift(trend_atr_stop))) |
+            (range_ & (close >= bb['mid']))
+        )
+        return enter, exit_
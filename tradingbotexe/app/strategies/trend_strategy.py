@@ -1,4 +1,6 @@
 from .base_strategy import BaseStrategy
+from .parameters import IntParameter
+from app.core.indicators import requires
 import pandas as pd
 import numpy as np
 
@@ -18,26 +20,35 @@ class TrendStrategy(BaseStrategy):
     
     stoploss = -0.10  # 10% Stoploss (Swing da espacio)
     timeframe = '1d'  # Gráfico de 1 Día (24h)
+
+    # SMA 50 (el RSI de medias simples solo necesita 15 velas)
+    startup_candle_count = 60
+
+    required_indicators = (
+        requires('rsi_sma', length=14),
+        requires('bbands_sample', length=20, std=2.0),
+        requires('rolling_mean', length=50),
+    )
+
+    # Reglas solo sobre la vela actual
+    signal_lookback = 0
+
+    # Parámetros optimizables (hyperopt.py)
+    buy_rsi = IntParameter(20, 45, default=35, space='buy')
+    sell_rsi = IntParameter(60, 85, default=70, space='sell')
     
     def populate_indicators(self, dataframe):
-        closes = dataframe['close']
+        # 1. RSI (medias simples, no Wilder)
+        dataframe['rsi'] = self.indicator(dataframe, 'rsi_sma', length=14)
         
-        # 1. RSI (Manual calculation)
-        delta = closes.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        dataframe['rsi'] = 100 - (100 / (1 + rs))
-        
-        # 2. Bollinger Bands (Manual calculation)
-        sma = closes.rolling(window=20).mean()
-        std = closes.rolling(window=20).std()
-        dataframe['bb_upper'] = sma + (std * 2)
-        dataframe['bb_lower'] = sma - (std * 2)
-        dataframe['bb_middle'] = sma
+        # 2. Bollinger Bands (desviación muestral)
+        bb = self.indicator(dataframe, 'bbands_sample', length=20, std=2.0)
+        dataframe['bb_upper'] = bb['upper']
+        dataframe['bb_lower'] = bb['lower']
+        dataframe['bb_middle'] = bb['mid']
         
         # 3. SMA Shorts & Longs
-        dataframe['sma_50'] = closes.rolling(window=50).mean()
+        dataframe['sma_50'] = self.indicator(dataframe, 'rolling_mean', length=50)
         
         return dataframe
 
@@ -46,7 +57,7 @@ class TrendStrategy(BaseStrategy):
         
         # Regla: RSI bajo (<35) Y Precio tocando banda inferior
         conditions = (
-            (dataframe['rsi'] < 35) &
+            (dataframe['rsi'] < self.buy_rsi.value) &
             (dataframe['close'] <= dataframe['bb_lower'])
         )
         
@@ -58,9 +69,19 @@ class TrendStrategy(BaseStrategy):
         
         # Regla: RSI alto (>70) O Precio tocando banda superior
         conditions = (
-            (dataframe['rsi'] > 70) |
+            (dataframe['rsi'] > self.sell_rsi.value) |
             (dataframe['close'] >= dataframe['bb_upper'])
         )
         
         dataframe.loc[conditions, 'exit_long'] = 1
         return dataframe
+
+    def batch_signals(self, indicators):
+        # Mismas reglas que populate_entry_trend / populate_exit_trend sobre arrays
+        close = indicators.column('close')
+        rsi = indicators.get('rsi_sma', length=14)
+        bb = indicators.get('bbands_sample', length=20, std=2.0)
+
+        enter = (rsi < self.buy_rsi.value) & (close <= bb['lower'])
+        exit_ = (rsi > self.sell_rsi.value) | (close >= bb['upper'])
+        return enter, exit_
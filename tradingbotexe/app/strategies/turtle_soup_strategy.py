@@ -1,4 +1,7 @@
 from .base_strategy import BaseStrategy
+from .parameters import IntParameter
+from app.core.indicators import requires
+from app.core.panel import shift
 import pandas as pd
 import numpy as np
 
@@ -18,13 +21,24 @@ class TurtleSoupStrategy(BaseStrategy):
     
     stoploss = -0.05  # Stop muy corto (5%). Si falla el rebote, salimos rápido.
     timeframe = '1d'
+
+    # Donchian 20 desplazado 1 vela
+    startup_candle_count = 30
+
+    required_indicators = (
+        requires('rolling_min', 'low', length=20),
+    )
+
+    # Salida: cierre bajo el mínimo de la vela anterior
+    signal_lookback = 1
+
+    # Parámetros optimizables (hyperopt.py)
+    buy_donchian = IntParameter(10, 40, default=20, space='buy')
     
     def populate_indicators(self, dataframe):
-        mins = dataframe['low']
-        
         # Canal de Donchian de 20 periodos (Mínimos de 20 días)
         # Shift(1) porque queremos el mínimo de los 20 dias ANTERIORES a hoy
-        dataframe['donchian_low_20'] = mins.rolling(window=20).min().shift(1)
+        dataframe['donchian_low_20'] = self.indicator(dataframe, 'rolling_min', 'low', length=self.buy_donchian.value).shift(1)
         
         return dataframe
 
@@ -58,3 +72,12 @@ class TurtleSoupStrategy(BaseStrategy):
         
         dataframe.loc[conditions, 'exit_long'] = 1
         return dataframe
+
+    def batch_signals(self, indicators):
+        # Mismas reglas que populate_entry_trend / populate_exit_trend sobre arrays
+        low, close, open_ = indicators.column('low'), indicators.column('close'), indicators.column('open')
+        donchian_low_20 = shift(indicators.get('rolling_min', 'low', length=self.buy_donchian.value))
+
+        enter = (low < donchian_low_20) & (close > donchian_low_20) & (close > open_)
+        exit_ = close < shift(low)
+        return enter, exit_
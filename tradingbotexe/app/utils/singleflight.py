@@ -0,0 +1,92 @@
+"""
+Coalescencia de llamadas concurrentes (single-flight)
+Si varias threads piden lo mismo a la vez, solo una ejecuta la llamada
+y el resto espera y recibe el mismo resultado (o la misma excepción).
+"""
+import inspect
+import threading
+from collections.abc import Callable, Hashable
+from functools import wraps
+from typing import Any
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Grupo de llamadas en curso indexadas por clave"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Ejecuta `fn` una sola vez por clave entre llamadas concurrentes
+
+        Args:
+            key: Identificador de la llamada (método + argumentos)
+            fn: Función a ejecutar
+
+        Returns:
+            Resultado compartido de la llamada
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def in_flight(self) -> int:
+        """Cantidad de llamadas en curso"""
+        with self._lock:
+            return len(self._calls)
+
+
+def coalesce(method: Callable) -> Callable:
+    """
+    Decorador para métodos de instancia con atributo `_inflight` (SingleFlight)
+    La clave es (nombre del método, argumentos por nombre con sus valores por
+    defecto): get_ohlcv(pair, '1h', 100) y get_ohlcv(pair, timeframe='1h')
+    comparten la llamada. Argumentos no hashables o inválidos ejecutan la
+    llamada directamente.
+    """
+    signature = inspect.signature(method)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = list(bound.arguments.items())[1:]     # Sin self
+            key = (method.__name__, tuple(
+                (name, tuple(sorted(value.items())) if isinstance(value, dict) else value)
+                for name, value in arguments
+            ))
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        return self._inflight.do(key, method, self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,58 @@
+"""
+Descarga de histórico profundo para la pairlist
+Uso: python backfill.py --since 2019-01-01 [--pairs BTC/USDT ETH/USDT] [--timeframes 1d 4h] [--workers 4]
+Si se interrumpe, volver a ejecutar el mismo comando reanuda la descarga.
+"""
+import argparse
+import logging
+from datetime import UTC, datetime
+
+from app.config import config
+from app.services import exchange_service
+from app.services.analysis_service import MACRO_TIMEFRAME
+from app.services.backfill_service import BackfillService
+from app.services.candle_store import CandleStore
+from app.strategies import strategy_timeframes
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backfill de velas OHLCV hacia el almacén local")
+    parser.add_argument('--since', default='2017-01-01', help="Fecha de inicio (YYYY-MM-DD, UTC)")
+    parser.add_argument('--pairs', nargs='+', default=None, help="Pares (por defecto: pairlist de config.json)")
+    parser.add_argument('--timeframes', nargs='+', default=None, help="Timeframes (por defecto: los de las estrategias)")
+    parser.add_argument('--workers', type=int, default=4, help="Pares descargados en paralelo")
+    parser.add_argument('--page-limit', type=int, default=1000, help="Velas por petición")
+    return parser.parse_args()
+
+
+def main():
+    """Función principal"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = parse_args()
+
+    pairs = args.pairs or config.pairlist
+    timeframes = args.timeframes or sorted(set(strategy_timeframes()) | {config.timeframe, MACRO_TIMEFRAME})
+    since = int(datetime.strptime(args.since, '%Y-%m-%d').replace(tzinfo=UTC).timestamp() * 1000)
+
+    service = BackfillService(
+        exchange=exchange_service.exchange,
+        store=CandleStore(config.datadir),
+        exchange_name=config.exchange_name,
+        datadir=config.datadir,
+        page_limit=args.page_limit,
+        workers=args.workers,
+    )
+
+    logger.info(f"Backfill {config.exchange_name}: {len(pairs)} pares x {timeframes} desde {args.since}")
+    results = service.run(pairs, timeframes, since)
+
+    failed = [key for key, res in results.items() if 'error' in res]
+    logger.info(f"Backfill terminado: {len(results) - len(failed)} OK, {len(failed)} con error")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
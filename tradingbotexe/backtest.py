@@ -0,0 +1,107 @@
+"""
+Backtesting de estrategias sobre el almacén local de velas
+Uso: python backtest.py [--strategy swing_v1 macd | --strategy all] [--pairs BTC/USDT ETH/USDT] [--timeframe 1d]
+                        [--timerange 20220101-20240101] [--stake 100] [--fee 0.001] [--workers 8]
+                        [--export resultado.json]
+Las velas se descargan antes con backfill.py (mismo exchange y timeframe).
+Cada (estrategia, par) se ejecuta en un proceso del pool; las velas se leen
+con memmap del almacén, sin copiarlas entre procesos.
+"""
+import argparse
+import json
+import logging
+import os
+
+from app.config import config
+from app.core.backtest_runner import ParallelBacktestRunner
+from app.core.backtesting import DEFAULT_FEE
+from app.strategies import STRATEGY_REGISTRY
+from app.utils.timeframes import parse_timerange
+
+logger = logging.getLogger(__name__)
+
+# Trabajos más lentos a mostrar en el informe
+SLOWEST_JOBS = 10
+
+
+def parse_args() -> argparse.Namespace:
+    strategy_ids = [meta['id'] for meta in STRATEGY_REGISTRY]
+    parser = argparse.ArgumentParser(description="Backtesting vectorizado de estrategias")
+    parser.add_argument('--strategy', nargs='+', default=[strategy_ids[0]], choices=strategy_ids + ['all'],
+                        help="Estrategias ('all' = todas)")
+    parser.add_argument('--pairs', nargs='+', default=None, help="Pares (por defecto: pairlist de config.json)")
+    parser.add_argument('--timeframe', default=None, help="Timeframe (por defecto: el de cada estrategia)")
+    parser.add_argument('--timerange', default=None, help="Periodo YYYYMMDD-YYYYMMDD (cualquiera de los dos lados puede faltar)")
+    parser.add_argument('--stake', type=float, default=config.stake_amount, help="Monto por trade")
+    parser.add_argument('--fee', type=float, default=DEFAULT_FEE, help="Comisión por lado (0.001 = 0.1%%)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Procesos (1 = sin pool)")
+    parser.add_argument('--export', default=None, help="Guardar resultado completo (trades incluidos) en JSON")
+    return parser.parse_args()
+
+
+def log_summary(label: str, summary: dict) -> None:
+    logger.info(
+        f"{label:16s} {summary['trades']:6d} {summary['win_rate'] * 100:5.1f}% "
+        f"{summary['profit_total_abs']:10.2f} {summary['max_drawdown'] * 100:7.2f}%"
+    )
+
+
+def main():
+    """Función principal"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    args = parse_args()
+
+    strategy_ids = [meta['id'] for meta in STRATEGY_REGISTRY] if 'all' in args.strategy else args.strategy
+    pairs = args.pairs or config.pairlist
+    start, end = parse_timerange(args.timerange)
+
+    # Importado aquí: con spawn (Windows) los procesos del pool reimportan este
+    # módulo y app.services crearía en cada uno el servicio de exchange
+    from app.services.candle_store import CandleStore
+
+    runner = ParallelBacktestRunner(
+        CandleStore(config.datadir),
+        config.exchange_name,
+        workers=args.workers,
+        timeframe=args.timeframe,
+        stake_amount=args.stake,
+        fee=args.fee,
+        starting_balance=args.stake * config.max_open_trades,
+    )
+    report = runner.run(strategy_ids, pairs, start, end)
+
+    if not report['jobs']:
+        logger.error("No hay velas en el almacén para esos pares/timeframes: ejecutar antes backfill.py")
+        raise SystemExit(1)
+
+    names = {meta['id']: meta['name'] for meta in STRATEGY_REGISTRY}
+    for strategy_id, result in report['strategies'].items():
+        logger.info(f"\n{names[strategy_id]}")
+        logger.info(f"{'par':16s} {'trades':>6s} {'win%':>6s} {'profit':>10s} {'max dd':>8s}")
+        for pair, summary in result['pairs'].items():
+            log_summary(pair, summary)
+        log_summary('TOTAL', result['summary'])
+        exit_reasons: dict[str, int] = {}
+        for trade in result['trades']:
+            exit_reasons[trade['exit_reason']] = exit_reasons.get(trade['exit_reason'], 0) + 1
+        logger.info(f"Salidas: {exit_reasons}")
+
+    logger.info(f"\nTrabajos más lentos ({len(report['jobs'])} en total):")
+    for job in report['jobs'][:SLOWEST_JOBS]:
+        logger.info(f"  {job['strategy']:10s} {job['pair']:16s} {job['timeframe']:4s} {job['candles']:8d} velas {job['elapsed']:7.3f}s")
+    logger.info(
+        f"{len(report['jobs'])} trabajos en {report['elapsed']:.2f}s con {report['workers']} procesos "
+        f"(paralelismo efectivo {report['parallelism']:.1f}x)"
+    )
+    if report['missing']:
+        missing = ', '.join(f"{m['strategy']}:{m['pair']}" for m in report['missing'])
+        logger.warning(f"Sin velas: {missing}")
+
+    if args.export:
+        with open(args.export, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Resultado guardado en {args.export}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""
+Paridad y rendimiento de app.core.kernels frente a pandas_ta
+Uso: python benchmark_indicators.py [--pair BTC/USDT] [--timeframe 1h] [--candles 1000] [--repeat 20]
+Usa las velas del almacén local si existen; si no, velas sintéticas del
+exchange simulado. Sale con código 1 si algún indicador, señal de
+estrategia (por par o por lote: batch_signals) o feature de la IA difiere.
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.ai_predictor import AIPredictor
+from app.config import config
+from app.core import kernels
+from app.core.indicators import IndicatorEngine
+from app.core.panel import CandlePanel, PanelEngine
+from app.services.candle_store import CandleStore
+from app.services.fake_exchange import FakeExchange
+from app.strategies import STRATEGY_REGISTRY
+from app.strategies.base_strategy import BaseStrategy
+
+logger = logging.getLogger(__name__)
+
+# (nombre, parámetros) de los indicadores con versión kernel
+CASES = [
+    ('sma', {'length': 50}),
+    ('rsi', {'length': 14}),
+    ('macd', {'fast': 12, 'slow': 26, 'signal': 9}),
+    ('atr', {'length': 14}),
+    ('adx', {'length': 14}),
+    ('bbands', {'length': 20, 'std': 2.0}),
+]
+
+RTOL = 1e-9
+ATOL = 1e-12
+
+# Pares sintéticos del panel de batch_signals (listados en distintas velas)
+BATCH_PAIRS = 12
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Paridad y benchmark de kernels de indicadores")
+    parser.add_argument('--pair', default='BTC/USDT')
+    parser.add_argument('--timeframe', default='1h')
+    parser.add_argument('--candles', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20, help="Repeticiones por medición")
+    return parser.parse_args()
+
+
+def load_candles(pair: str, timeframe: str, candles: int) -> tuple[pd.DataFrame, str]:
+    """Velas del almacén local o, si no hay suficientes, sintéticas"""
+    ohlcv = CandleStore(config.datadir).read(config.exchange_name, pair, timeframe, limit=candles)
+    origin = f"almacén local ({config.exchange_name})"
+    if len(ohlcv) < candles:
+        ohlcv = FakeExchange({'seed': 1}, [pair], config.datadir).fetch_ohlcv(pair, timeframe, limit=candles)
+        origin = "exchange simulado"
+    df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+    return df, origin
+
+
+def as_frame(result: pd.Series | pd.DataFrame | None) -> pd.DataFrame:
+    if result is None:
+        return pd.DataFrame()
+    return result.to_frame('value') if isinstance(result, pd.Series) else result
+
+
+def check_indicators(df: pd.DataFrame) -> list[str]:
+    """Compara cada indicador pandas_ta vs kernel"""
+    failures = []
+    for name, params in CASES:
+        reference = as_frame(IndicatorEngine(df).get(name, **params))
+        fast = as_frame(IndicatorEngine(df, kernels=True).get(name, **params))
+        for column in reference.columns:
+            expected = reference[column].to_numpy(dtype=np.float64)
+            got = fast[column].to_numpy(dtype=np.float64)
+            with np.errstate(invalid='ignore'):
+                diff = np.nanmax(np.abs(got - expected)) if np.isfinite(expected).any() else 0.0
+            ok = np.allclose(got, expected, rtol=RTOL, atol=ATOL, equal_nan=True)
+            logger.info(f"  {name:8s} {str(column):10s} {'OK ' if ok else 'FALLO'} max|diff|={diff:.3e}")
+            if not ok:
+                failures.append(f"{name}.{column}")
+    return failures
+
+
+def run_strategy(cls: type, df: pd.DataFrame, fast: bool) -> pd.DataFrame:
+    strategy = cls(config)
+    strategy.use_fast_kernels = fast
+    frame = strategy.populate_indicators(df.copy())
+    frame = strategy.populate_entry_trend(frame)
+    return strategy.populate_exit_trend(frame)
+
+
+def check_signals(df: pd.DataFrame) -> list[str]:
+    """Las señales de cada estrategia deben ser idénticas con y sin kernels"""
+    failures = []
+    for meta in STRATEGY_REGISTRY:
+        reference = run_strategy(meta['cls'], df, fast=False)
+        fast = run_strategy(meta['cls'], df, fast=True)
+        for column in ('enter_long', 'exit_long'):
+            if column not in reference:
+                continue
+            same = reference[column].fillna(0).equals(fast[column].fillna(0))
+            logger.info(f"  {meta['id']:14s} {column:10s} {'OK' if same else 'FALLO'}")
+            if not same:
+                failures.append(f"{meta['id']}.{column}")
+    return failures
+
+
+def batch_panel(timeframe: str, candles: int) -> CandlePanel:
+    """Panel de pares sintéticos con huecos al inicio y un par sin movimiento"""
+    pairs = [f"SYN{i}/USDT" for i in range(BATCH_PAIRS)]
+    exchange = FakeExchange({'seed': 2}, pairs, config.datadir)
+    ohlcv = {}
+    for i, pair in enumerate(pairs):
+        # Cada par se lista más tarde que el anterior (NaN al inicio del panel)
+        ohlcv[pair] = exchange.fetch_ohlcv(pair, timeframe, limit=candles)[i * candles // (3 * BATCH_PAIRS):]
+    ohlcv[pairs[0]] = [[row[0], 1.0, 1.0, 1.0, 1.0, 0.0] for row in ohlcv[pairs[0]]]
+    return CandlePanel.from_ohlcv(ohlcv)
+
+
+def check_batch_signals(timeframe: str, candles: int) -> list[str]:
+    """batch_signals de cada estrategia vs populate_* par por par (BaseStrategy.batch_signals)"""
+    panel = batch_panel(timeframe, candles)
+    failures = []
+    for meta in STRATEGY_REGISTRY:
+        cls = meta['cls']
+        if cls.batch_signals is BaseStrategy.batch_signals:
+            continue
+        batch = cls(config).batch_signals(PanelEngine(panel))
+        reference = BaseStrategy.batch_signals(cls(config), PanelEngine(panel))
+        for column, got, expected in zip(('enter_long', 'exit_long'), batch, reference):
+            diff = int((got != expected).sum())
+            logger.info(f"  {meta['id']:14s} {column:10s} {'OK' if not diff else 'FALLO'} ({int(expected.sum())} señales, {diff} distintas)")
+            if diff:
+                failures.append(f"{meta['id']}.batch.{column}")
+    return failures
+
+
+def check_ai_features(df: pd.DataFrame) -> list[str]:
+    predictor = AIPredictor()
+    reference = predictor.prepare_data(df, indicators=IndicatorEngine(df))
+    fast = predictor.prepare_data(df, indicators=IndicatorEngine(df, kernels=True))
+    columns = reference.select_dtypes('number').columns
+    ok = np.allclose(fast[columns].to_numpy(np.float64), reference[columns].to_numpy(np.float64),
+                     rtol=RTOL, atol=ATOL, equal_nan=True)
+    logger.info(f"  features IA ({len(columns)} columnas) {'OK' if ok else 'FALLO'}")
+    return [] if ok else ['ai_features']
+
+
+def best_time(func, repeat: int) -> float:
+    """Mejor tiempo de `repeat` ejecuciones, en ms"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def benchmark(df: pd.DataFrame, repeat: int) -> None:
+    logger.info(f"{'indicador':10s} {'pandas_ta':>10s} {'kernel':>10s} {'x':>6s}")
+    totals = [0.0, 0.0]
+    for name, params in CASES:
+        # Primera llamada fuera de la medición (compilación de numba)
+        IndicatorEngine(df, kernels=True).get(name, **params)
+        slow = best_time(lambda: IndicatorEngine(df).get(name, **params), repeat)
+        fast = best_time(lambda: IndicatorEngine(df, kernels=True).get(name, **params), repeat)
+        totals[0] += slow
+        totals[1] += fast
+        logger.info(f"{name:10s} {slow:8.3f}ms {fast:8.3f}ms {slow / fast:5.1f}x")
+    logger.info(f"{'total':10s} {totals[0]:8.3f}ms {totals[1]:8.3f}ms {totals[0] / totals[1]:5.1f}x")
+
+
+def main():
+    """Función principal"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    args = parse_args()
+
+    df, origin = load_candles(args.pair, args.timeframe, args.candles)
+    logger.info(f"{args.pair} {args.timeframe}: {len(df)} velas de {origin}; backend de kernels: {kernels.backend()}")
+
+    logger.info("Paridad de indicadores:")
+    failures = check_indicators(df)
+    logger.info("Paridad de señales:")
+    failures += check_signals(df)
+    logger.info(f"Paridad de señales por lote ({BATCH_PAIRS} pares):")
+    failures += check_batch_signals(args.timeframe, args.candles)
+    logger.info("Paridad de features IA:")
+    failures += check_ai_features(df)
+
+    logger.info("Benchmark:")
+    benchmark(df, args.repeat)
+
+    if failures:
+        logger.error(f"Diferencias en: {', '.join(failures)}")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""
+Servidor HTTP del exchange simulado
+Uso: python fake_exchange_server.py [--port 8800] [--latency-ms 50] [--jitter-ms 20] [--error-rate 0.01]
+Las opciones por defecto salen de `exchange.fake` en config.json. El bot
+lo usa con `"exchange": {"name": "fake", "fake": {"url": "http://127.0.0.1:8800"}}`.
+"""
+import argparse
+import logging
+
+from app.config import config
+from app.services.fake_exchange import FakeExchange, FakeExchangeServer
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Exchange simulado (HTTP/JSON) para pruebas de carga")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8800)
+    parser.add_argument('--latency-ms', type=float, default=None, help="Latencia base por petición")
+    parser.add_argument('--jitter-ms', type=float, default=None, help="Media de la cola exponencial de latencia")
+    parser.add_argument('--error-rate', type=float, default=None, help="Probabilidad de error 503")
+    parser.add_argument('--rate-limit', type=float, default=None, help="Peticiones por segundo antes de 429")
+    parser.add_argument('--source', default=None, help="Reproducir velas grabadas de este exchange (almacén local)")
+    parser.add_argument('--seed', type=int, default=None)
+    return parser.parse_args()
+
+
+def main():
+    """Función principal"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = parse_args()
+
+    options = {k: v for k, v in config.fake_exchange.items() if k != 'url'}
+    overrides = {
+        'latency_ms': args.latency_ms,
+        'jitter_ms': args.jitter_ms,
+        'error_rate': args.error_rate,
+        'rate_limit_per_second': args.rate_limit,
+        'source': args.source,
+        'seed': args.seed,
+    }
+    options.update({k: v for k, v in overrides.items() if v is not None})
+
+    server = FakeExchangeServer(FakeExchange(options, config.pairlist, config.datadir), args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Optimización de parámetros de una estrategia sobre el almacén local de velas
+Uso: python hyperopt.py --strategy trend [--epochs 200] [--loss sharpe] [--spaces buy sell]
+                        [--pairs BTC/USDT ETH/USDT] [--timeframe 1d] [--timerange 20220101-20240101]
+                        [--min-trades 10] [--workers 8] [--seed 0]
+Los resultados se guardan en user_data/hyperopt_results/<estrategia>.json:
+repetir la misma búsqueda (misma semilla, pares y velas) es instantáneo.
+"""
+import argparse
+import json
+import logging
+import os
+
+from app.config import config
+from app.core.backtesting import DEFAULT_FEE
+from app.core.hyperopt import LOSS_FUNCTIONS, Hyperopt
+from app.strategies import STRATEGY_REGISTRY
+from app.strategies.parameters import SPACES
+from app.utils.timeframes import parse_timerange
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    strategy_ids = [meta['id'] for meta in STRATEGY_REGISTRY if meta['cls'].parameters()]
+    parser = argparse.ArgumentParser(description="Hyperopt (búsqueda aleatoria) de parámetros de estrategias")
+    parser.add_argument('--strategy', required=True, choices=strategy_ids)
+    parser.add_argument('--epochs', type=int, default=100, help="Candidatos a evaluar")
+    parser.add_argument('--loss', default='sharpe', choices=list(LOSS_FUNCTIONS))
+    parser.add_argument('--spaces', nargs='+', default=list(SPACES), choices=list(SPACES))
+    parser.add_argument('--pairs', nargs='+', default=None, help="Pares (por defecto: pairlist de config.json)")
+    parser.add_argument('--timeframe', default=None, help="Timeframe (por defecto: el de la estrategia)")
+    parser.add_argument('--timerange', default=None, help="Periodo YYYYMMDD-YYYYMMDD")
+    parser.add_argument('--min-trades', type=int, default=10, help="Descartar candidatos con menos trades")
+    parser.add_argument('--stake', type=float, default=config.stake_amount, help="Monto por trade")
+    parser.add_argument('--fee', type=float, default=DEFAULT_FEE, help="Comisión por lado")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Procesos (1 = sin pool)")
+    parser.add_argument('--seed', type=int, default=0, help="Semilla del muestreo")
+    parser.add_argument('--top', type=int, default=10, help="Mejores candidatos a mostrar")
+    return parser.parse_args()
+
+
+def main():
+    """Función principal"""
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    args = parse_args()
+    start, end = parse_timerange(args.timerange)
+
+    # Importado aquí: con spawn (Windows) los procesos del pool reimportan este
+    # módulo y app.services crearía en cada uno el servicio de exchange
+    from app.services.candle_store import CandleStore
+
+    hyperopt = Hyperopt(
+        args.strategy,
+        CandleStore(config.datadir),
+        config.exchange_name,
+        args.pairs or config.pairlist,
+        timeframe=args.timeframe,
+        start=start,
+        end=end,
+        loss=args.loss,
+        spaces=tuple(args.spaces),
+        min_trades=args.min_trades,
+        workers=args.workers,
+        stake_amount=args.stake,
+        fee=args.fee,
+        starting_balance=args.stake * config.max_open_trades,
+        results_dir=config.hyperopt_results_dir,
+    )
+    try:
+        result = hyperopt.run(epochs=args.epochs, seed=args.seed)
+    except ValueError as e:
+        logger.error(f"{e}: ejecutar antes backfill.py")
+        raise SystemExit(1)
+
+    logger.info(
+        f"{len(result['results'])} candidatos ({result['evaluated']} evaluados, {result['cached']} en caché) "
+        f"en {result['elapsed']:.2f}s - pérdida '{result['loss']}'"
+    )
+    logger.info(f"{'#':>3s} {'pérdida':>9s} {'trades':>6s} {'win%':>6s} {'profit':>10s} {'max dd':>8s}  parámetros")
+    for rank, res in enumerate(result['results'][:args.top], start=1):
+        summary = res['summary']
+        logger.info(
+            f"{rank:3d} {res['losses'][result['loss']]:9.4f} {summary['trades']:6d} {summary['win_rate'] * 100:5.1f}% "
+            f"{summary['profit_total_abs']:10.2f} {summary['max_drawdown'] * 100:7.2f}%  {json.dumps(res['params'])}"
+        )
+
+    if result['best'] is None:
+        logger.warning(f"Ningún candidato con al menos {args.min_trades} trades")
+        return
+    logger.info(f"\nMejores parámetros para {args.strategy}:\n{json.dumps(result['best']['params'], indent=2)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -53,6 +53,12 @@ def main():
     # Usamos allow_unsafe_werkzeug=True si es necesario, pero async_mode='threading' ya está configurado
     try:
         app = create_app()
+        
+        # Entrenamiento de la IA en segundo plano (en cada cierre de vela)
+        if config.ai_scheduler_enabled:
+            from app.services.training_scheduler import training_scheduler
+            training_scheduler.start()
+        
         socketio.run(
             app,
             host='127.0.0.1',
@@ -64,5 +70,8 @@ def main():
         logger.error(f"Error fatal: {e}")
 
 if __name__ == '__main__':
+    # Necesario en el ejecutable (Windows): los procesos del scheduler de IA arrancan con spawn
+    import multiprocessing
+    multiprocessing.freeze_support()
     from threading import Timer
     main()